@@ -12,12 +12,26 @@
 #   License for the specific language governing permissions and limitations
 #   under the License.
 
-import pbr.version
+try:
+    from importlib import metadata as importlib_metadata
+except ImportError:
+    import importlib_metadata
 
 from subjectclient import api_versions
 
 
-__version__ = pbr.version.VersionInfo('python-subjectclient').version_string()
+def _get_version():
+    try:
+        return importlib_metadata.version('python-subjectclient')
+    except importlib_metadata.PackageNotFoundError:
+        # NOTE: pbr computes the version of a source tree from git, it is
+        # only imported then for its cost at startup.
+        import pbr.version
+        return pbr.version.VersionInfo(
+            'python-subjectclient').version_string()
+
+
+__version__ = _get_version()
 
 API_MIN_VERSION = api_versions.APIVersion("1.0")
 # The max version should be the latest version that is supported in the client,
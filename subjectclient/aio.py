@@ -0,0 +1,394 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Asyncio client interface, requires python 3.6 or later.
+
+The requests are sent by a pluggable AsyncTransport, aiohttp is used when no
+transport is given. Authentication, URL building and error handling are
+shared with subjectclient.client.HTTPClient.
+"""
+
+import asyncio
+import collections
+import ssl
+
+from requests import structures
+
+from subjectclient import api_versions
+from subjectclient import circuit_breaker
+from subjectclient import client
+from subjectclient import exceptions
+from subjectclient.i18n import _
+from subjectclient import retry
+from subjectclient import utils
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+RequestInfo = collections.namedtuple('RequestInfo', ['method', 'url'])
+
+
+class AsyncResponse(object):
+    """Response returned by an AsyncTransport.
+
+    Either the whole `content` is known, or the body is read from `chunks`,
+    a callable taking a chunk size and returning an async iterator over the
+    data. `release` is called once the body has been consumed or the
+    response closed.
+    """
+
+    def __init__(self, method, url, status_code, headers, content=None,
+                 chunks=None, release=None):
+        self.request = RequestInfo(method, url)
+        self.url = url
+        self.status_code = status_code
+        self.headers = structures.CaseInsensitiveDict(headers or {})
+        self.content = content
+        self._chunks = chunks
+        self._release = release
+
+    @property
+    def text(self):
+        if not self.content:
+            return ''
+        return self.content.decode('utf-8', 'replace')
+
+    async def read(self):
+        """Read the whole body, if not done yet, and return it."""
+        if self.content is None:
+            self.content = b''.join([chunk async for chunk in
+                                     self.iter_content(client.CHUNKSIZE)])
+        return self.content
+
+    async def iter_content(self, chunk_size):
+        try:
+            if self.content is not None:
+                for start in range(0, len(self.content), chunk_size):
+                    yield self.content[start:start + chunk_size]
+            else:
+                async for chunk in self._chunks(chunk_size):
+                    yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        if self._release is not None:
+            self._release()
+            self._release = None
+
+
+class AsyncTransport(object):
+    """Sends the HTTP requests of an AsyncHTTPClient.
+
+    Subclasses implement request() on top of an asyncio HTTP library.
+    """
+
+    async def request(self, method, url, headers=None, data=None,
+                      timeout=None, verify=True, allow_redirects=True,
+                      stream=False):
+        """Send a request.
+
+        :param data: bytes, str, or a file-like object to stream.
+        :param verify: False to skip checking the server certificate, or
+                       the path of a CA bundle to check it against.
+        :param stream: leave the body to be read by the caller instead of
+                       reading it before returning.
+        :returns: AsyncResponse
+        """
+        raise NotImplementedError()
+
+    async def close(self):
+        """Release the connections held by the transport."""
+
+
+class AiohttpTransport(AsyncTransport):
+    """AsyncTransport sending the requests with aiohttp.
+
+    :param session: aiohttp.ClientSession to use, one is created on the
+                    first request otherwise and closed by close().
+    """
+
+    def __init__(self, session=None):
+        if aiohttp is None:
+            raise exceptions.InvalidUsage(
+                _("aiohttp is required by the asyncio client unless another "
+                  "transport is given."))
+        self._session = session
+        self._own_session = session is None
+
+    async def request(self, method, url, headers=None, data=None,
+                      timeout=None, verify=True, allow_redirects=True,
+                      stream=False):
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        kwargs = {}
+        if timeout is not None:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+        if verify is False:
+            kwargs['ssl'] = False
+        elif isinstance(verify, str):
+            kwargs['ssl'] = ssl.create_default_context(cafile=verify)
+
+        if hasattr(data, 'read'):
+            length = utils.get_remaining_size(data)
+            if length is not None:
+                headers = dict(headers or {}, **{'Content-Length':
+                                                 str(length)})
+            data = _iter_file(data, client.CHUNKSIZE)
+
+        resp = await self._session.request(method, url, headers=headers,
+                                           data=data,
+                                           allow_redirects=allow_redirects,
+                                           **kwargs)
+        if stream:
+            return AsyncResponse(method, url, resp.status, resp.headers,
+                                 chunks=resp.content.iter_chunked,
+                                 release=resp.release)
+        try:
+            content = await resp.read()
+        finally:
+            resp.release()
+        return AsyncResponse(method, url, resp.status, resp.headers,
+                             content=content)
+
+    async def close(self):
+        if self._session is not None and self._own_session:
+            await self._session.close()
+            self._session = None
+
+
+async def _iter_file(file_obj, chunk_size):
+    """Read a file-like object in chunks without blocking the event loop."""
+    loop = asyncio.get_event_loop()
+    while True:
+        chunk = await loop.run_in_executor(None, file_obj.read, chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+class AsyncHTTPClient(client.HTTPClient):
+    """HTTPClient whose requests are coroutines.
+
+    :param transport: AsyncTransport sending the requests, defaults to an
+                      AiohttpTransport.
+
+    The other arguments are the ones of HTTPClient. Authentication plugins
+    are not supported since they send their requests synchronously, nor are
+    hedging policies.
+    """
+
+    def __init__(self, *args, **kwargs):
+        if kwargs.get('hedging_policy') is not None:
+            raise TypeError("The asyncio client doesn't hedge its requests, "
+                            "'hedging_policy' is not supported.")
+        transport = kwargs.pop('transport', None)
+        super(AsyncHTTPClient, self).__init__(*args, **kwargs)
+        if self.auth_plugin is not None:
+            raise exceptions.InvalidUsage(
+                _("Authentication plugins are not supported by the asyncio "
+                  "client."))
+        self.transport = transport or AiohttpTransport()
+        self._reauth_lock = None
+
+    def _stream_body(self, body):
+        # NOTE: transports read file-like objects themselves.
+        return body
+
+    async def close(self):
+        await self.transport.close()
+
+    async def request(self, url, method, **kwargs):
+        self._prepare_request(kwargs)
+        self.http_log_req(method, url, kwargs)
+
+        resp = await self.transport.request(
+            method, url, headers=kwargs['headers'], data=kwargs.get('data'),
+            timeout=kwargs.get('timeout'), verify=kwargs['verify'],
+            allow_redirects=kwargs.get('allow_redirects', True),
+            stream=kwargs.get('stream', False))
+
+        self.last_request_id = client._get_request_id(resp)
+        if client._is_streamed(resp, kwargs):
+            return resp, None
+
+        await resp.read()
+        return resp, self._process_response(resp, url, method)
+
+    async def _time_request(self, url, method, attempt=0, **kwargs):
+        with circuit_breaker.guard(self.circuit_breaker, url):
+            with utils.record_time(self.times, self.timings, method, url,
+                                   *retry.attempt_label(attempt)):
+                resp, body = await self.request(url, method, **kwargs)
+        return resp, body
+
+    async def _retry_request(self, url, method, **kwargs):
+        policy = self.retry_policy
+        if policy is None or not retry.is_replayable(kwargs):
+            return await self._time_request(url, method, **kwargs)
+        policy.request_sent()
+        attempt = 0
+        while True:
+            try:
+                return await self._time_request(url, method, attempt,
+                                                **kwargs)
+            except Exception as e:
+                attempt += 1
+                delay = policy.next_delay(method, e, attempt)
+                if delay is None:
+                    raise
+                self._logger.warning("Retrying %(method)s in %(delay).1fs "
+                                     "after: %(error)s",
+                                     {'method': method, 'delay': delay,
+                                      'error': e})
+            await asyncio.sleep(delay)
+
+    async def _cs_request(self, url, method, **kwargs):
+        if not self.management_url:
+            await self.authenticate()
+        url = self._service_url(url)
+
+        try:
+            self._set_auth_headers(kwargs)
+            return await self._retry_request(url, method, **kwargs)
+        except exceptions.Unauthorized as e:
+            try:
+                await self._reauthenticate(kwargs['headers']['X-Auth-Token'])
+                self._set_auth_headers(kwargs)
+                return await self._retry_request(url, method, **kwargs)
+            except exceptions.Unauthorized:
+                raise e
+
+    async def _reauthenticate(self, stale_token):
+        # NOTE: the lock is created on first use, for it to belong to the
+        # running event loop.
+        if self._reauth_lock is None:
+            self._reauth_lock = asyncio.Lock()
+        async with self._reauth_lock:
+            if self.auth_token and self.auth_token != stale_token:
+                return
+            self.keyring_saved = False
+            await self._obtain_token(self._parse_auth_url(), use_token=False)
+
+    async def get(self, url, **kwargs):
+        return await self._cs_request(url, 'GET', **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self._cs_request(url, 'POST', **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self._cs_request(url, 'PUT', **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self._cs_request(url, 'DELETE', **kwargs)
+
+    async def _fetch_endpoints_from_auth(self, url):
+        url = self._endpoints_url(url)
+        resp, body = await self._time_request(
+            url, "GET", headers={'X-Auth-Token': self.auth_token})
+        return self._extract_service_catalog(url, resp, body,
+                                             extract_token=False)
+
+    async def authenticate(self):
+        admin_url = self._parse_auth_url()
+        if self.auth_token and self.management_url:
+            self._save_keys()
+            return
+        await self._obtain_token(admin_url)
+
+    async def _obtain_token(self, admin_url, use_token=True):
+        auth_url = self.auth_url
+        if self.version == "v1.0":
+            while auth_url:
+                auth_url = await self._v2_auth(auth_url, use_token)
+
+            if self.proxy_token:
+                if self.bypass_url:
+                    self.set_management_url(self.bypass_url)
+                else:
+                    await self._fetch_endpoints_from_auth(admin_url)
+                self.auth_token = self.proxy_token
+        else:
+            try:
+                while auth_url:
+                    auth_url = await self._v1_auth(auth_url)
+            except exceptions.AuthorizationFailure:
+                if auth_url.find('v1.0') < 0:
+                    auth_url = auth_url + '/v1.0'
+                await self._v2_auth(auth_url, use_token)
+
+        self._finish_authenticate()
+
+    async def _v1_auth(self, url):
+        if self.proxy_token:
+            raise exceptions.NoTokenLookupException()
+
+        resp, body = await self._time_request(
+            url, 'GET', headers=self._v1_auth_headers())
+        return self._v1_auth_response(url, resp, body)
+
+    async def _v2_auth(self, url, use_token=True):
+        return await self._authenticate(url, self._v2_auth_body(use_token))
+
+    async def _authenticate(self, url, body, **kwargs):
+        resp, respbody = await self._time_request(
+            url + "/tokens", "POST", body=body, allow_redirects=True,
+            **kwargs)
+        return self._extract_service_catalog(url, resp, respbody)
+
+
+async def discover_version(client, requested_version):
+    """Coroutine counterpart of api_versions.discover_version.
+
+    :param client: asyncio client object
+    :param requested_version: requested version represented by APIVersion obj
+    :returns: APIVersion
+    """
+    try:
+        return await _discover_version(client, requested_version)
+    except exceptions.UnsupportedVersion:
+        if not client.versions.invalidate_cache():
+            raise
+        return await _discover_version(client, requested_version)
+
+
+async def _discover_version(client, requested_version):
+    version = await client.versions.get_current()
+    return api_versions._select_version(
+        requested_version, *api_versions._get_version_range(version))
+
+
+def Client(version, username=None, api_key=None, project_id=None,
+           auth_url=None, **kwargs):
+    """Initialize an asyncio client object based on given version.
+
+    Takes the same arguments as subjectclient.client.Client, plus an
+    optional `transport` (see AsyncTransport), except `session`,
+    `auth_plugin` and `hedging_policy`. The version is discovered with
+    discover_version::
+
+        >>> from subjectclient import aio
+        >>> subject = aio.Client(VERSION, USERNAME, PASSWORD,
+        ...                      PROJECT_ID, AUTH_URL)
+        >>> async for s in subject.subjects.list():
+        ...     print(s.id)
+        >>> await subject.close()
+    """
+    api_version, client_class = client._get_client_class_and_version(
+        version, module='aio')
+    return client_class(username=username, api_key=api_key,
+                        project_id=project_id, auth_url=auth_url,
+                        api_version=api_version, **kwargs)
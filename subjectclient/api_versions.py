@@ -214,8 +214,6 @@ def check_major_version(api_version):
                                                       supported
     """
     available_versions = get_available_major_versions()
-    print available_versions
-    print api_version
     if (not api_version.is_null() and
             str(api_version.ver_major) not in available_versions):
         if len(available_versions) == 1:
@@ -250,12 +248,7 @@ def get_api_version(version_string):
 
 
 def _get_server_version_range(client):
-    version = client.versions.get_current()
-
-    if not hasattr(version, 'version') or not version.version:
-        return APIVersion(), APIVersion()
-
-    return APIVersion(version.min_version), APIVersion(version.version)
+    return _get_version_range(client.versions.get_current())
 
 
 def discover_version(client, requested_version):
@@ -264,13 +257,41 @@ def discover_version(client, requested_version):
     Checks ``requested_version`` and returns the most recent version
     supported by both the API and the client.
 
+    The versions cached by the client are discovered again if they don't
+    fit, the server may have been upgraded since.
+
     :param client: client object
     :param requested_version: requested version represented by APIVersion obj
     :returns: APIVersion
     """
+    try:
+        return _discover_version(client, requested_version)
+    except exceptions.UnsupportedVersion:
+        if not client.versions.invalidate_cache():
+            raise
+        return _discover_version(client, requested_version)
+
+
+def _discover_version(client, requested_version):
     server_start_version, server_end_version = _get_server_version_range(
         client)
+    return _select_version(requested_version, server_start_version,
+                           server_end_version)
+
 
+def _get_version_range(version):
+    if not hasattr(version, 'version') or not version.version:
+        return APIVersion(), APIVersion()
+
+    return APIVersion(version.min_version), APIVersion(version.version)
+
+
+def _select_version(requested_version, server_start_version,
+                    server_end_version):
+    """Return the version to use given the range supported by the server.
+
+    :raises: UnsupportedVersion if there is none.
+    """
     if (not requested_version.is_latest() and
             requested_version != APIVersion('1.0')):
         if server_start_version.is_null() and server_end_version.is_null():
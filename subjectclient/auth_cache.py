@@ -0,0 +1,92 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Local cache of the authentication tokens and service catalogs.
+
+It saves a round trip to the identity service on every run of the shell
+when --os-cache is given.
+"""
+
+import calendar
+import time
+
+from oslo_utils import timeutils
+
+from subjectclient import utils
+
+
+# Cached tokens expiring sooner than that many seconds are not used, so that
+# a new one is obtained before the old one expires in the middle of a run.
+REFRESH_MARGIN = 300
+
+
+class TokenCache(utils.JsonFileCache):
+    """File store of authentication data, one file per key.
+
+    The entries are dicts, whose `expires_at` (seconds since the epoch)
+    tells when their token expires.
+
+    :param path: Directory of the files, defaults to env[OS_AUTH_CACHE_DIR]
+                 or ~/.subjectclient/auth.
+    :param margin: Entries whose token expires within that many seconds are
+                   ignored.
+    """
+
+    def __init__(self, path=None, margin=REFRESH_MARGIN):
+        super(TokenCache, self).__init__(
+            path or utils.env('OS_AUTH_CACHE_DIR',
+                              default='~/.subjectclient/auth'))
+        self.margin = margin
+
+    def get(self, key):
+        """Return the entry saved for `key`, or None.
+
+        Entries which can't be read or whose token is about to expire are
+        not returned.
+        """
+        entry = super(TokenCache, self).get(key)
+        if entry is None:
+            return None
+        expires_at = entry.get('expires_at')
+        if expires_at is not None and expires_at - self.margin <= time.time():
+            return None
+        return entry
+
+
+def load_auth_state(cache, auth):
+    """Restore the token of a keystoneauth plugin saved in `cache`.
+
+    :returns: whether a token was restored.
+    """
+    key = auth.get_cache_id()
+    entry = cache.get(key) if key else None
+    if not entry:
+        return False
+    auth.set_auth_state(entry['auth_state'])
+    return True
+
+
+def save_auth_state(cache, auth):
+    """Save the token of a keystoneauth plugin in `cache`, if it has one."""
+    key = auth.get_cache_id()
+    state = auth.get_auth_state()
+    if not key or not state:
+        return
+    entry = cache.get(key)
+    if entry and entry['auth_state'] == state:
+        return
+    expires = auth.auth_ref.expires
+    if expires is not None:
+        expires = calendar.timegm(
+            timeutils.normalize_time(expires).timetuple())
+    cache.set(key, {'auth_state': state, 'expires_at': expires})
@@ -16,7 +16,6 @@
 
 import logging
 
-import pkg_resources
 import six
 
 from subjectclient import exceptions
@@ -35,17 +34,10 @@ def discover_auth_systems():
     This won't take into account the old style auth-systems.
     """
     ep_name = 'openstack.client.auth_plugin'
-    for ep in pkg_resources.iter_entry_points(ep_name):
+    for ep in utils.iter_entry_points(ep_name):
         try:
-            # FIXME(dhellmann): It would be better to use stevedore
-            # here, since it abstracts this difference in behavior
-            # between versions of setuptools, but this seemed like a
-            # more expedient fix.
-            if hasattr(ep, 'resolve') and hasattr(ep, 'require'):
-                auth_plugin = ep.resolve()
-            else:
-                auth_plugin = ep.load(require=False)
-        except (ImportError, pkg_resources.UnknownExtra, AttributeError) as e:
+            auth_plugin = ep.load()
+        except (ImportError, AttributeError) as e:
             logger.debug("ERROR: Cannot load auth plugin %s" % ep.name)
             logger.debug(e, exc_info=1)
         else:
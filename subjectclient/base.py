@@ -103,9 +103,10 @@ class RequestIdMixin(object):
             self._append_request_id(resp)
 
     def _append_request_id(self, resp):
-        if isinstance(resp, Response):
+        if isinstance(resp, Response) or hasattr(resp, 'headers'):
             # Extract 'x-openstack-request-id' from headers if
-            # response is a Response object.
+            # response is a Response object, or the response of an
+            # asyncio transport.
             request_id = (resp.headers.get('x-openstack-request-id') or
                           resp.headers.get('x-subject-request-id'))
         else:
@@ -248,6 +249,9 @@ class Manager(HookableMixin):
         else:
             resp, body = self.api.client.get(url)
 
+        return self._list_from_body(resp, body, response_key, obj_class)
+
+    def _list_from_body(self, resp, body, response_key, obj_class=None):
         if obj_class is None:
             obj_class = self.resource_class
 
@@ -342,6 +346,20 @@ class Manager(HookableMixin):
         if cache:
             cache.write("%s\n" % val)
 
+    def write_many_to_completion_cache(self, resources):
+        """Append resources to the completion caches, opening them once."""
+        if not resources:
+            return
+        with self.completion_cache('human_id', self.resource_class, mode="a"):
+            with self.completion_cache('uuid', self.resource_class, mode="a"):
+                for resource in resources:
+                    human_id = resource.human_id
+                    if human_id:
+                        self.write_to_completion_cache('human_id', human_id)
+                    uuid = getattr(resource, 'id', None)
+                    if uuid:
+                        self.write_to_completion_cache('uuid', uuid)
+
     def _get(self, url, response_key):
         resp, body = self.api.client.get(url)
         if response_key is not None:
@@ -0,0 +1,195 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Client-side circuit breaker.
+
+Pass a CircuitBreaker as the `circuit_breaker` of a client to stop sending
+requests to a service URL which keeps failing, giving it time to recover::
+
+    >>> from subjectclient import circuit_breaker
+    >>> from subjectclient import client
+    >>> breaker = circuit_breaker.CircuitBreaker()
+    >>> subject = client.Client(VERSION, USERNAME, PASSWORD, PROJECT_ID,
+    ...                         AUTH_URL, circuit_breaker=breaker)
+
+The same breaker can be given to every client of a process, for all of them
+to back off together.
+"""
+
+import contextlib
+import threading
+import time
+
+from keystoneauth1 import exceptions as ks_exceptions
+import requests
+from six.moves.urllib import parse
+
+from subjectclient import exceptions
+from subjectclient import retry
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+# Statuses of the server errors counted as failures.
+FAILURE_STATUSES = frozenset([500, 502, 503, 504])
+
+TIMEOUT_ERRORS = (requests.exceptions.Timeout, ks_exceptions.ConnectTimeout)
+
+
+def service_url(url):
+    """Return the scheme and host part of `url`, the key of its circuit."""
+    scheme, netloc, path, query, frag = parse.urlsplit(url)
+    return '%s://%s' % (scheme, netloc)
+
+
+class _Circuit(object):
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probes = 0
+
+
+class CircuitBreaker(object):
+    """Fail fast the requests to service URLs which failed repeatedly.
+
+    After `failure_threshold` consecutive connection errors, timeouts or
+    server errors of a service URL its circuit opens: its requests raise
+    CircuitOpen without being sent for `reset_timeout` seconds. The circuit
+    is then half-open, up to `half_open_probes` requests at a time are sent
+    to probe the service, the others still fail fast. A successful probe
+    closes the circuit, a failed one opens it again.
+
+    :param failure_threshold: Number of consecutive failures opening the
+                              circuit.
+    :param reset_timeout: Seconds the circuit stays open before probing.
+    :param half_open_probes: Number of concurrent probe requests.
+    :param statuses: Statuses of the server errors counted as failures.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30,
+                 half_open_probes=1, statuses=FAILURE_STATUSES):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.statuses = frozenset(statuses)
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def is_failure(self, error):
+        """Whether a request failing with `error` counts as a failure."""
+        if isinstance(error, exceptions.ClientException):
+            return error.code in self.statuses
+        return isinstance(error, retry.CONNECTION_ERRORS + TIMEOUT_ERRORS)
+
+    def _acquire(self, key):
+        with self._lock:
+            circuit = self._circuits.setdefault(key, _Circuit())
+            if circuit.state == OPEN:
+                retry_in = (circuit.opened_at + self.reset_timeout -
+                            time.time())
+                if retry_in > 0:
+                    raise exceptions.CircuitOpen(key, retry_in)
+                circuit.state = HALF_OPEN
+            if circuit.state == HALF_OPEN:
+                if circuit.probes >= self.half_open_probes:
+                    raise exceptions.CircuitOpen(key, 0)
+                circuit.probes += 1
+                return True
+            return False
+
+    def _release(self, key, probe, failed):
+        """Account for the outcome of a request to `key`.
+
+        :param probe: whether the request held a probe slot.
+        :param failed: whether the request failed, None if it was
+                       interrupted before telling (e.g. KeyboardInterrupt),
+                       which leaves the circuit as it is.
+        """
+        with self._lock:
+            circuit = self._circuits.setdefault(key, _Circuit())
+            if probe:
+                circuit.probes = max(circuit.probes - 1, 0)
+            if failed is None:
+                return
+            if not failed:
+                circuit.state = CLOSED
+                circuit.failures = 0
+                return
+            circuit.failures += 1
+            if (circuit.state == HALF_OPEN or
+                    circuit.failures >= self.failure_threshold):
+                circuit.state = OPEN
+                circuit.opened_at = time.time()
+
+    @contextlib.contextmanager
+    def guard(self, url):
+        """Context manager wrapping the sending of a request to `url`.
+
+        :raises: CircuitOpen if the request must not be sent.
+        """
+        key = service_url(url)
+        probe = self._acquire(key)
+        failed = None
+        try:
+            yield
+            failed = False
+        except Exception as e:
+            failed = self.is_failure(e)
+            raise
+        finally:
+            # NOTE: the probe slot is freed whatever interrupted the
+            # request, only exceptions are counted as failures.
+            self._release(key, probe, failed)
+
+    def get_state(self, url=None):
+        """Return the state of the circuits.
+
+        :param url: URL whose circuit state is returned, all of them are
+                    returned by service URL when not given.
+        :returns: dict of the `state`, number of consecutive `failures` and
+                  seconds before an open circuit is probed (`retry_in`).
+        """
+        now = time.time()
+        with self._lock:
+            states = {}
+            for key, circuit in self._circuits.items():
+                retry_in = 0
+                if circuit.state == OPEN:
+                    retry_in = max(circuit.opened_at + self.reset_timeout -
+                                   now, 0)
+                states[key] = {'state': circuit.state,
+                               'failures': circuit.failures,
+                               'retry_in': retry_in}
+        if url is None:
+            return states
+        return states.get(service_url(url),
+                          {'state': CLOSED, 'failures': 0, 'retry_in': 0})
+
+    def reset(self):
+        """Close all of the circuits."""
+        with self._lock:
+            self._circuits.clear()
+
+
+@contextlib.contextmanager
+def guard(breaker, url):
+    """CircuitBreaker.guard of `breaker`, doing nothing if it is None."""
+    if breaker is None:
+        yield
+    else:
+        with breaker.guard(url):
+            yield
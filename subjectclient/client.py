@@ -24,32 +24,38 @@ import copy
 import functools
 import glob
 import hashlib
-import imp
+import importlib.util
 import itertools
 import logging
 import os
 import pkgutil
 import re
+import sys
+import threading
+import time
 import warnings
 
 from keystoneauth1 import adapter
 from keystoneauth1 import session
 from oslo_utils import importutils
 from oslo_utils import netutils
-import pkg_resources
 import requests
+from urllib3 import connectionpool
 
 try:
     import json
 except ImportError:
     import simplejson as json
 
+import six
 from six.moves.urllib import parse
 
 from subjectclient import api_versions
+from subjectclient import circuit_breaker
 from subjectclient import exceptions
 from subjectclient import extension as ext
 from subjectclient.i18n import _, _LW
+from subjectclient import retry
 from subjectclient import service_catalog
 from subjectclient import utils
 
@@ -59,20 +65,152 @@ from subjectclient import utils
 # remove the whole function
 extensions_ignored_name = ["__init__"]
 
+# Size of the buffer used to stream file-like request bodies.
+CHUNKSIZE = 1024 * 64  # 64kB
 
-class _ClientConnectionPool(object):
+# Seconds to wait before trying again to refresh a token after a failure.
+TOKEN_REFRESH_RETRY_DELAY = 10
+
+
+class _PoolStats(object):
+    """Thread-safe counters describing the use of connection pools."""
 
     def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {'requests': 0, 'misses': 0, 'waits': 0,
+                          'wait_time': 0.0, 'discarded': 0}
+
+    def add(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def snapshot(self):
+        """Return the counters as a dict.
+
+        `requests` connections were taken from the pools: `hits` of them
+        were reused, `misses` were newly opened. `waits` requests waited
+        `wait_time` seconds in total for a connection to be released and
+        `discarded` connections were closed because their pool was full.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+        stats['hits'] = stats['requests'] - stats['misses']
+        return stats
+
+
+class _CountingPoolMixin(object):
+    """Record the use of a urllib3 connection pool in a _PoolStats."""
+
+    def __init__(self, *args, **kwargs):
+        self._stats = kwargs.pop('stats')
+        super(_CountingPoolMixin, self).__init__(*args, **kwargs)
+
+    def _get_conn(self, timeout=None):
+        self._stats.add('requests')
+        if not (self.block and self.pool is not None and self.pool.empty()):
+            return super(_CountingPoolMixin, self)._get_conn(timeout)
+        # NOTE: every connection is in use, wait for one to be put back.
+        start = time.time()
+        try:
+            return super(_CountingPoolMixin, self)._get_conn(timeout)
+        finally:
+            self._stats.add('waits')
+            self._stats.add('wait_time', time.time() - start)
+
+    def _new_conn(self):
+        self._stats.add('misses')
+        return super(_CountingPoolMixin, self)._new_conn()
+
+    def _put_conn(self, conn):
+        if conn is not None and self.pool is not None and self.pool.full():
+            self._stats.add('discarded')
+        return super(_CountingPoolMixin, self)._put_conn(conn)
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin,
+                                  connectionpool.HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin,
+                                   connectionpool.HTTPSConnectionPool):
+    pass
+
+
+class _PoolAdapter(session.TCPKeepAliveAdapter):
+    """TCPKeepAliveAdapter whose connection pools record their use."""
+
+    def __init__(self, stats, **kwargs):
+        self._stats = stats
+        super(_PoolAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(_PoolAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': functools.partial(_CountingHTTPConnectionPool,
+                                      stats=self._stats),
+            'https': functools.partial(_CountingHTTPSConnectionPool,
+                                       stats=self._stats),
+        }
+
+
+class _ClientConnectionPool(object):
+
+    def __init__(self, pool_connections=None, pool_maxsize=None,
+                 pool_block=None):
         self._adapters = {}
+        self._adapter_kwargs = {}
+        if pool_connections is not None:
+            self._adapter_kwargs['pool_connections'] = pool_connections
+        if pool_maxsize is not None:
+            self._adapter_kwargs['pool_maxsize'] = pool_maxsize
+        if pool_block is not None:
+            self._adapter_kwargs['pool_block'] = pool_block
+        self.stats = _PoolStats()
 
     def get(self, url):
         """Store and reuse HTTP adapters per Service URL."""
         if url not in self._adapters:
-            self._adapters[url] = session.TCPKeepAliveAdapter()
+            self._adapters[url] = _PoolAdapter(self.stats,
+                                               **self._adapter_kwargs)
 
         return self._adapters[url]
 
 
+class _SizedBody(object):
+    """Iterable request body whose length is known up front.
+
+    requests sends such a body with a Content-Length header and writes every
+    chunk to the socket as is, while a plain generator is re-framed (and so
+    copied) for chunked transfer encoding.
+    """
+
+    def __init__(self, chunks, length):
+        self._chunks = chunks
+        self._length = length
+
+    def __iter__(self):
+        return iter(self._chunks)
+
+    def __len__(self):
+        return self._length
+
+
+def _chunk_body(body, chunk_size=CHUNKSIZE):
+    """Return an iterable streaming a file-like object in chunks.
+
+    Memory usage stays flat no matter how big ``body`` is, see
+    utils.iter_chunks. When the amount of data left in ``body`` is known
+    (e.g. a regular file) the chunks are sent with a Content-Length header,
+    otherwise (pipes, stdin) with chunked transfer encoding.
+    """
+    chunks = utils.iter_chunks(body, chunk_size)
+    length = utils.get_remaining_size(body)
+    if length is None:
+        return chunks
+    return _SizedBody(chunks, length)
+
+
 def _log_request_id(logger, resp, service_name):
     request_id = (resp.headers.get('x-openstack-request-id') or
                   resp.headers.get('x-subject-request-id'))
@@ -85,6 +223,17 @@ def _log_request_id(logger, resp, service_name):
                       'response_request_id': request_id})
 
 
+def _copy_headers(kwargs):
+    """Return request arguments whose headers can be changed safely."""
+    return dict(kwargs, headers=dict(kwargs.get('headers') or {}))
+
+
+def _mount_transport(requests_session, transport):
+    """Send the requests of a requests.Session through `transport`."""
+    requests_session.mount('http://', transport)
+    requests_session.mount('https://', transport)
+
+
 class SessionClient(adapter.LegacyJsonAdapter):
 
     def __init__(self, *args, **kwargs):
@@ -92,19 +241,69 @@ class SessionClient(adapter.LegacyJsonAdapter):
         self.timings = kwargs.pop('timings', False)
         self.api_version = kwargs.pop('api_version', None)
         self.api_version = self.api_version or api_versions.APIVersion()
+        transport = kwargs.pop('transport', None)
+        self.retry_policy = kwargs.pop('retry_policy', None)
+        self.circuit_breaker = kwargs.pop('circuit_breaker', None)
+        self.hedging_policy = kwargs.pop('hedging_policy', None)
         super(SessionClient, self).__init__(*args, **kwargs)
+        if transport is not None:
+            # NOTE: this affects every user of the keystoneauth session.
+            _mount_transport(self.session.session, transport)
 
     def request(self, url, method, **kwargs):
+        if self.retry_policy is None or not retry.is_replayable(kwargs):
+            return self._guarded_request(url, method, **kwargs)
+        return self.retry_policy.call(
+            method,
+            functools.partial(self._guarded_request, url, method, **kwargs),
+            self.logger)
+
+    def _guarded_request(self, url, method, attempt=0, **kwargs):
+        if self.circuit_breaker is None:
+            return self._hedged_request(url, method, attempt, **kwargs)
+        with self.circuit_breaker.guard(self._absolute_url(url)):
+            return self._hedged_request(url, method, attempt, **kwargs)
+
+    def _hedged_request(self, url, method, attempt=0, **kwargs):
+        # NOTE: a hedged request is timed once, however many requests
+        # were sent for it.
+        with utils.record_time(self.times, self.timings, method, url,
+                               *retry.attempt_label(attempt)):
+            policy = self.hedging_policy
+            if policy is None or not policy.applies(method, kwargs):
+                return self._send_request(url, method, **kwargs)
+            if policy.alternate_urls:
+                url = self._absolute_url(url)
+            return policy.call(
+                lambda target: self._send_request(target, method,
+                                                  **_copy_headers(kwargs)),
+                url)
+
+    def _absolute_url(self, url):
+        """Return the URL a request to `url` is sent to."""
+        if parse.urlsplit(url).netloc:
+            return url
+        return self.get_endpoint() or url
+
+    def _send_request(self, url, method, **kwargs):
         kwargs.setdefault('headers', kwargs.get('headers', {}))
         api_versions.update_headers(kwargs["headers"], self.api_version)
+        if hasattr(kwargs.get('body'), 'read'):
+            # NOTE: LegacyJsonAdapter would try to serialize a file-like
+            # body as json, so stream it as raw data instead.
+            kwargs['data'] = _chunk_body(kwargs.pop('body'))
         # NOTE(jamielennox): The standard call raises errors from
         # keystoneauth1, where we need to raise the subjectclient errors.
         raise_exc = kwargs.pop('raise_exc', True)
-        with utils.record_time(self.times, self.timings, method, url):
-            resp, body = super(SessionClient, self).request(url,
-                                                            method,
-                                                            raise_exc=False,
-                                                            **kwargs)
+        if kwargs.get('stream'):
+            # NOTE: LegacyJsonAdapter always decodes the body, which would
+            # read a streamed response until its end.
+            resp = adapter.Adapter.request(self, url, method,
+                                           raise_exc=False, **kwargs)
+            body = None
+        else:
+            resp, body = super(SessionClient, self).request(
+                url, method, raise_exc=False, **kwargs)
 
         # if service name is None then use service_type for logging
         service = self.service_name or self.service_type
@@ -114,6 +313,11 @@ class SessionClient(adapter.LegacyJsonAdapter):
         #   check only subject-related calls
         # api_versions.check_headers(resp, self.api_version)
         if raise_exc and resp.status_code >= 400:
+            if body is None and kwargs.get('stream'):
+                try:
+                    body = resp.json()
+                except ValueError:
+                    pass
             raise exceptions.from_response(resp, body, url, method)
 
         return resp, body
@@ -125,6 +329,19 @@ class SessionClient(adapter.LegacyJsonAdapter):
         self.times = []
 
 
+def _get_request_id(resp):
+    return (resp.headers.get('x-openstack-request-id')
+            if resp.headers else None)
+
+
+def _is_streamed(resp, kwargs):
+    """Whether the body of `resp` must be left for the caller to consume.
+
+    Error responses are always read, for their message to be reported.
+    """
+    return bool(kwargs.get('stream')) and resp.status_code < 400
+
+
 def _original_only(f):
     """Decorator to indicate and enforce original HTTPClient object.
 
@@ -160,7 +377,22 @@ class HTTPClient(object):
                  auth_plugin=None, auth_token=None,
                  cacert=None, tenant_id=None, user_id=None,
                  connection_pool=False, api_version=None,
-                 logger=None):
+                 logger=None, thread_safe=False, pool_connections=None,
+                 pool_maxsize=None, pool_block=None, transport=None,
+                 retry_policy=None, circuit_breaker=None,
+                 hedging_policy=None, token_refresh_margin=None):
+        # NOTE: in thread safe mode the request ids and timings are kept per
+        # thread, see the properties below.
+        self._local = threading.local() if thread_safe else None
+        self._auth_lock = threading.RLock()
+        self._session_lock = threading.Lock()
+        # The token is replaced by a background thread that many seconds
+        # before it expires, see _maybe_refresh_token.
+        self.token_refresh_margin = token_refresh_margin
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread = None
+        self._next_refresh = 0
+        self.thread_safe = thread_safe
         self.user = user
         self.user_id = user_id
         self.password = password
@@ -168,8 +400,24 @@ class HTTPClient(object):
         self.tenant_id = tenant_id
         self.api_version = api_version or api_versions.APIVersion()
 
-        self._connection_pool = (_ClientConnectionPool()
-                                 if connection_pool else None)
+        self._connection_pool = (
+            _ClientConnectionPool(pool_connections=pool_connections,
+                                  pool_maxsize=pool_maxsize,
+                                  pool_block=pool_block)
+            if connection_pool else None)
+        # Sessions of the connection pool, per service URL.
+        self._sessions = {}
+        # requests transport adapter sending all of the requests, e.g. an
+        # http2.HTTP2Adapter. It takes care of the connections itself.
+        self.transport = transport
+        self._transport_session = None
+        # retry.RetryPolicy of the requests failing for a transient reason.
+        self.retry_policy = retry_policy
+        # circuit_breaker.CircuitBreaker failing fast the requests to the
+        # service URLs which keep failing.
+        self.circuit_breaker = circuit_breaker
+        # hedging.HedgingPolicy duplicating the reads slow to answer.
+        self.hedging_policy = hedging_policy
 
         # This will be called by #_get_password if self.password is None.
         # EG if a password can only be obtained by prompting the user, but a
@@ -204,6 +452,8 @@ class HTTPClient(object):
 
         self.management_url = self.bypass_url or None
         self.auth_token = auth_token
+        # When the token expires, in seconds since the epoch, if known.
+        self.auth_expires = None
         self.proxy_token = proxy_token
         self.proxy_tenant_id = proxy_tenant_id
         self.keyring_saver = None
@@ -220,7 +470,6 @@ class HTTPClient(object):
         self.auth_system = auth_system
         self.auth_plugin = auth_plugin
         self._session = None
-        self._current_url = None
         self._logger = logger or logging.getLogger(__name__)
 
         if (self.http_log_debug and logger is None and
@@ -241,6 +490,37 @@ class HTTPClient(object):
         self.services_url = {}
         self.last_request_id = None
 
+    def _get_local(self, name, default=None):
+        if self._local is None:
+            return self.__dict__.get('_' + name, default)
+        return getattr(self._local, name, default)
+
+    def _set_local(self, name, value):
+        if self._local is None:
+            self.__dict__['_' + name] = value
+        else:
+            setattr(self._local, name, value)
+
+    @property
+    def times(self):
+        times = self._get_local('times')
+        if times is None:
+            times = []
+            self._set_local('times', times)
+        return times
+
+    @times.setter
+    def times(self, value):
+        self._set_local('times', value)
+
+    @property
+    def last_request_id(self):
+        return self._get_local('last_request_id')
+
+    @last_request_id.setter
+    def last_request_id(self, value):
+        self._set_local('last_request_id', value)
+
     def use_token_cache(self, use_it):
         self.os_cache = use_it
 
@@ -248,6 +528,7 @@ class HTTPClient(object):
         """Forget all of our authentication information."""
         self.management_url = None
         self.auth_token = None
+        self.auth_expires = None
 
     def set_management_url(self, url):
         self.management_url = url
@@ -315,7 +596,7 @@ class HTTPClient(object):
             header = ' -H "%s: %s"' % (name, value)
             string_parts.append(header)
 
-        if 'data' in kwargs:
+        if isinstance(kwargs.get('data'), six.string_types):
             data = json.loads(kwargs['data'])
             self._redact(data, ['auth', 'passwordCredentials', 'password'])
             string_parts.append(" -d '%s'" % json.dumps(data))
@@ -346,6 +627,8 @@ class HTTPClient(object):
     def open_session(self):
         if not self._connection_pool:
             self._session = requests.Session()
+            if self.transport is not None:
+                _mount_transport(self._session, self.transport)
 
     def close_session(self):
         if self._session and not self._connection_pool:
@@ -353,24 +636,40 @@ class HTTPClient(object):
             self._session = None
 
     def _get_session(self, url):
+        if self.transport is not None and not self._session:
+            with self._session_lock:
+                if self._transport_session is None:
+                    self._transport_session = requests.Session()
+                    _mount_transport(self._transport_session,
+                                     self.transport)
+                return self._transport_session
         if self._connection_pool:
             magic_tuple = parse.urlsplit(url)
             scheme, netloc, path, query, frag = magic_tuple
             service_url = '%s://%s' % (scheme, netloc)
-            if self._current_url != service_url:
-                # Invalidate Session object in case the url is somehow changed
-                if self._session:
-                    self._session.close()
-                self._current_url = service_url
-                self._logger.debug(
-                    "New session created for: (%s)" % service_url)
-                self._session = requests.Session()
-                self._session.mount(service_url,
-                                    self._connection_pool.get(service_url))
-            return self._session
+            # NOTE: keep the sessions of the other service URLs, their
+            # connections may be in use by other threads or needed again.
+            with self._session_lock:
+                if service_url not in self._sessions:
+                    self._logger.debug(
+                        "New session created for: (%s)" % service_url)
+                    pool_session = requests.Session()
+                    pool_session.mount(
+                        service_url, self._connection_pool.get(service_url))
+                    self._sessions[service_url] = pool_session
+                return self._sessions[service_url]
         elif self._session:
             return self._session
 
+    def get_pool_stats(self):
+        """Return statistics about the connection pool.
+
+        See _PoolStats.snapshot, None is returned unless the connection pool
+        is enabled.
+        """
+        if self._connection_pool:
+            return self._connection_pool.stats.snapshot()
+
     def _set_common_request_kwargs(self, headers, kwargs):
         """Handle the common parameters used to send the request."""
 
@@ -388,29 +687,47 @@ class HTTPClient(object):
                 # Here we assume it's
                 # a file-like object
                 # and we'll chunk it
-                data = self._chunk_body(data)
+                data = self._stream_body(data)
 
         headers['Content-Type'] = content_type
-        kwargs['stream'] = content_type == 'application/octet-stream'
 
         return data
 
-    def request(self, url, method, **kwargs):
+    def _stream_body(self, body):
+        """Return what to send for a file-like request body."""
+        return _chunk_body(body)
+
+    def _prepare_request(self, kwargs):
+        """Fill in the headers and options common to every request."""
         kwargs.setdefault('headers', kwargs.get('headers', {}))
         kwargs['headers']['User-Agent'] = self.USER_AGENT
         kwargs['headers']['Accept'] = 'application/json'
         if 'body' in kwargs:
-            kwargs['headers']['Content-Type'] = 'application/json'
-            data = self._set_common_request_kwargs(kwargs['headers'], **kwargs)
+            kwargs['headers'].setdefault('Content-Type', 'application/json')
+            data = self._set_common_request_kwargs(kwargs['headers'], kwargs)
             kwargs['data'] = data
 
-        kwargs['headers']['Accept'] = kwargs['headers']['Content-Type']
-
         api_versions.update_headers(kwargs["headers"], self.api_version)
         if self.timeout is not None:
             kwargs.setdefault('timeout', self.timeout)
         kwargs['verify'] = self.verify_cert
 
+    def request(self, url, method, **kwargs):
+        resp = self._send(url, method, kwargs)
+        self.last_request_id = _get_request_id(resp)
+
+        if _is_streamed(resp, kwargs):
+            # NOTE: the body is binary data that the caller reads in chunks,
+            # accessing resp.text here would load all of it in memory.
+            return resp, None
+
+        return resp, self._process_response(resp, url, method)
+
+    def _send(self, url, method, kwargs):
+        """Send a request and return the response, whose body isn't read
+        yet.
+        """
+        self._prepare_request(kwargs)
         self.http_log_req(method, url, kwargs)
 
         request_func = requests.request
@@ -426,7 +743,14 @@ class HTTPClient(object):
         # TODO(andreykurilin): uncomment this line, when we will be able to
         #   check only subject-related calls
         # api_versions.check_headers(resp, self.api_version)
+        return resp
 
+    def _process_response(self, resp, url, method):
+        """Log a fully read response and return its decoded body.
+
+        :raises: the ClientException matching the status of an error
+                 response.
+        """
         self.http_log_resp(resp)
 
         if resp.text:
@@ -447,21 +771,137 @@ class HTTPClient(object):
         else:
             body = None
 
-        self.last_request_id = (resp.headers.get('x-openstack-request-id')
-                                if resp.headers else None)
         if resp.status_code >= 400:
             raise exceptions.from_response(resp, body, url, method)
 
+        return body
+
+    def _time_request(self, url, method, attempt=0, **kwargs):
+        with circuit_breaker.guard(self.circuit_breaker, url):
+            with utils.record_time(self.times, self.timings, method, url,
+                                   *retry.attempt_label(attempt)):
+                resp, body = self._hedged_request(url, method, **kwargs)
         return resp, body
 
-    def _time_request(self, url, method, **kwargs):
-        with utils.record_time(self.times, self.timings, method, url):
-            resp, body = self.request(url, method, **kwargs)
+    def _hedged_request(self, url, method, **kwargs):
+        """Send a request, and a duplicate of it if it is slow to answer."""
+        policy = self.hedging_policy
+        if policy is None or not policy.applies(method, kwargs):
+            return self.request(url, method, **kwargs)
+
+        def send(target):
+            target_kwargs = _copy_headers(kwargs)
+            resp = self._send(target, method, target_kwargs)
+            return resp, self._process_response(resp, target, method)
+
+        # NOTE: the requests are sent by other threads, only the request id
+        # of the response used is kept.
+        resp, body = policy.call(send, url)
+        self.last_request_id = _get_request_id(resp)
         return resp, body
 
+    def _retry_request(self, url, method, **kwargs):
+        """Send a request, and again as far as the retry policy allows."""
+        if self.retry_policy is None or not retry.is_replayable(kwargs):
+            return self._time_request(url, method, **kwargs)
+        return self.retry_policy.call(
+            method,
+            functools.partial(self._time_request, url, method, **kwargs),
+            self._logger)
+
     def _cs_request(self, url, method, **kwargs):
         if not self.management_url:
-            self.authenticate()
+            with self._auth_lock:
+                # NOTE: another thread may have authenticated while this one
+                # was waiting for the lock.
+                if not self.management_url:
+                    self.authenticate()
+        self._maybe_refresh_token()
+        url = self._service_url(url)
+
+        # Perform the request once. If we get a 401 back then it
+        # might be because the auth token expired, so try to
+        # re-authenticate and try again. If it still fails, bail.
+        try:
+            self._set_auth_headers(kwargs)
+            resp, body = self._retry_request(url, method, **kwargs)
+            return resp, body
+        except exceptions.Unauthorized as e:
+            try:
+                self._reauthenticate(kwargs['headers']['X-Auth-Token'])
+                self._set_auth_headers(kwargs)
+                resp, body = self._retry_request(url, method, **kwargs)
+                return resp, body
+            except exceptions.Unauthorized:
+                raise e
+
+    def _reauthenticate(self, stale_token):
+        """Replace a token the server rejected.
+
+        Only one thread authenticates again, the other ones whose requests
+        were rejected wait for it and then use the new token.
+        """
+        with self._auth_lock:
+            if self.auth_token and self.auth_token != stale_token:
+                return
+            # NOTE: the stale token and the management url stay in use by
+            # the other requests until the new ones replace them, the new
+            # token is obtained from the credentials instead.
+            self.keyring_saved = False
+            self._obtain_token(self._parse_auth_url(), use_token=False)
+
+    def _can_refresh_token(self):
+        # NOTE: only tokens from a service catalog tell when they expire,
+        # and a new one is only obtained from the user's credentials.
+        return (self.service_catalog is not None and not self.proxy_token and
+                self.auth_plugin is None and
+                bool(self.password or self.password_func))
+
+    def _maybe_refresh_token(self):
+        """Start replacing the token in the background if it expires soon.
+
+        The requests keep using the current token until the new one is
+        obtained, so that none of them fails with a 401 nor waits for the
+        authentication.
+        """
+        if (self.token_refresh_margin is None or self.auth_expires is None or
+                time.time() < max(self._next_refresh, self.auth_expires -
+                                  self.token_refresh_margin)):
+            return
+        with self._refresh_lock:
+            if self._refresh_thread is not None or not (
+                    self._can_refresh_token()):
+                return
+            self._refresh_thread = threading.Thread(target=self._refresh_token)
+            self._refresh_thread.daemon = True
+            self._refresh_thread.start()
+
+    def _refresh_token(self):
+        try:
+            with self._auth_lock:
+                if (self.auth_expires is not None and time.time() <
+                        self.auth_expires - self.token_refresh_margin):
+                    # NOTE: the token was replaced meanwhile, e.g. after a
+                    # 401.
+                    return
+                self._parse_auth_url()
+                auth_url = self.auth_url
+                while auth_url:
+                    auth_url = self._authenticate(
+                        auth_url, self._v2_auth_body(use_token=False))
+                self.keyring_saved = False
+                self._finish_authenticate()
+        except Exception as e:
+            # NOTE: try again a bit later, a request failing with a 401
+            # authenticates again meanwhile anyway.
+            self._next_refresh = time.time() + TOKEN_REFRESH_RETRY_DELAY
+            self._logger.warning(_LW("Unable to refresh the token: %s"), e)
+        finally:
+            with self._refresh_lock:
+                self._refresh_thread = None
+
+    def _service_url(self, url):
+        """Turn the path of a request into the URL to send it to."""
         if url is None:
             # To get API version information, it is necessary to GET
             # a subject endpoint directly without "v1/<tenant-id>".
@@ -474,30 +914,12 @@ class HTTPClient(object):
                 url = self.get_service_url(self.service_type) + url
             else:
                 url = self.management_url + url
+        return url
 
-        # Perform the request once. If we get a 401 back then it
-        # might be because the auth token expired, so try to
-        # re-authenticate and try again. If it still fails, bail.
-        try:
-            kwargs.setdefault('headers', {})['X-Auth-Token'] = self.auth_token
-            if self.projectid:
-                kwargs['headers']['X-Auth-Project-Id'] = self.projectid
-
-            resp, body = self._time_request(url, method, **kwargs)
-            return resp, body
-        except exceptions.Unauthorized as e:
-            try:
-                # first discard auth token, to avoid the possibly expired
-                # token being re-used in the re-authentication attempt
-                self.unauthenticate()
-                # overwrite bad token
-                self.keyring_saved = False
-                self.authenticate()
-                kwargs['headers']['X-Auth-Token'] = self.auth_token
-                resp, body = self._time_request(url, method, **kwargs)
-                return resp, body
-            except exceptions.Unauthorized:
-                raise e
+    def _set_auth_headers(self, kwargs):
+        kwargs.setdefault('headers', {})['X-Auth-Token'] = self.auth_token
+        if self.projectid:
+            kwargs['headers']['X-Auth-Project-Id'] = self.projectid
 
     def _get_password(self):
         if not self.password and self.password_func:
@@ -517,6 +939,8 @@ class HTTPClient(object):
         return self._cs_request(url, 'DELETE', **kwargs)
 
     def get_service_url(self, service_type):
+        # NOTE: services_url is emptied whenever a new service catalog is
+        # received, the catalog indexes its endpoints for the first lookups.
         if service_type not in self.services_url:
             url = self.service_catalog.url_for(
                 attr='region',
@@ -543,9 +967,11 @@ class HTTPClient(object):
                 self.auth_url = url
                 self.service_catalog = \
                     service_catalog.ServiceCatalog(body)
+                self.services_url = {}
                 if extract_token:
                     self.auth_token = self.service_catalog.get_token()
                     self.tenant_id = self.service_catalog.get_tenant_id()
+                    self.auth_expires = self.service_catalog.get_expires()
 
                 self.management_url = self.get_service_url(self.service_type)
                 return None
@@ -579,46 +1005,38 @@ class HTTPClient(object):
         This will overwrite our admin token with the user token.
         """
 
-        # GET ...:5001/v1.0/tokens/#####/endpoints
-        url = '/'.join([url, 'tokens', '%s?belongsTo=%s'
-                        % (self.proxy_token, self.proxy_tenant_id)])
-        self._logger.debug("Using Endpoint URL: %s" % url)
+        url = self._endpoints_url(url)
         resp, body = self._time_request(
             url, "GET", headers={'X-Auth-Token': self.auth_token})
         return self._extract_service_catalog(url, resp, body,
                                              extract_token=False)
 
-    def authenticate(self):
-        if not self.auth_url:
-            msg = _("Authentication requires 'auth_url', which should be "
-                    "specified in '%s'") % self.__class__.__name__
-            raise exceptions.AuthorizationFailure(msg)
-        magic_tuple = netutils.urlsplit(self.auth_url)
-        scheme, netloc, path, query, frag = magic_tuple
-        port = magic_tuple.port
-        if port is None:
-            port = 80
-        path_parts = path.split('/')
-        for part in path_parts:
-            if len(part) > 0 and part[0] == 'v':
-                self.version = part
-                break
+    def _endpoints_url(self, url):
+        # GET ...:5001/v1.0/tokens/#####/endpoints
+        url = '/'.join([url, 'tokens', '%s?belongsTo=%s'
+                        % (self.proxy_token, self.proxy_tenant_id)])
+        self._logger.debug("Using Endpoint URL: %s" % url)
+        return url
 
+    def authenticate(self):
+        admin_url = self._parse_auth_url()
         if self.auth_token and self.management_url:
             self._save_keys()
             return
+        self._obtain_token(admin_url)
 
-        # TODO(sandy): Assume admin endpoint is 35357 for now.
-        # Ideally this is going to have to be provided by the service catalog.
-        new_netloc = netloc.replace(':%d' % port, ':%d' % (35357,))
-        admin_url = parse.urlunsplit(
-            (scheme, new_netloc, path, query, frag))
+    def _obtain_token(self, admin_url, use_token=True):
+        """Authenticate against the auth service.
 
+        :param admin_url: URL of the admin endpoint of the auth service.
+        :param use_token: Whether a v1.0 auth service may be given the
+                          current token rather than the credentials.
+        """
         auth_url = self.auth_url
         if self.version == "v1.0":  # FIXME(chris): This should be better.
             while auth_url:
                 if not self.auth_system or self.auth_system == 'keystone':
-                    auth_url = self._v2_auth(auth_url)
+                    auth_url = self._v2_auth(auth_url, use_token)
                 else:
                     auth_url = self._plugin_auth(auth_url)
 
@@ -644,8 +1062,36 @@ class HTTPClient(object):
             except exceptions.AuthorizationFailure:
                 if auth_url.find('v1.0') < 0:
                     auth_url = auth_url + '/v1.0'
-                self._v2_auth(auth_url)
+                self._v2_auth(auth_url, use_token)
+
+        self._finish_authenticate()
+
+    def _parse_auth_url(self):
+        """Detect the auth version from `auth_url`.
+
+        :returns: the URL of the admin endpoint of the auth service.
+        """
+        if not self.auth_url:
+            msg = _("Authentication requires 'auth_url', which should be "
+                    "specified in '%s'") % self.__class__.__name__
+            raise exceptions.AuthorizationFailure(msg)
+        magic_tuple = netutils.urlsplit(self.auth_url)
+        scheme, netloc, path, query, frag = magic_tuple
+        port = magic_tuple.port
+        if port is None:
+            port = 80
+        path_parts = path.split('/')
+        for part in path_parts:
+            if len(part) > 0 and part[0] == 'v':
+                self.version = part
+                break
 
+        # TODO(sandy): Assume admin endpoint is 35357 for now.
+        # Ideally this is going to have to be provided by the service catalog.
+        new_netloc = netloc.replace(':%d' % port, ':%d' % (35357,))
+        return parse.urlunsplit((scheme, new_netloc, path, query, frag))
+
+    def _finish_authenticate(self):
         if self.bypass_url:
             self.set_management_url(self.bypass_url)
         elif not self.management_url:
@@ -658,9 +1104,11 @@ class HTTPClient(object):
         if (self.keyring_saver and self.os_cache and not self.keyring_saved and
                 self.auth_token and self.management_url and
                 self.tenant_id):
-            self.keyring_saver.save(self.auth_token,
-                                    self.management_url,
-                                    self.tenant_id)
+            self.keyring_saver.save(
+                self.auth_token, self.management_url, self.tenant_id,
+                expires_at=self.auth_expires,
+                catalog=(self.service_catalog.catalog
+                         if self.service_catalog else None))
             # Don't save it again
             self.keyring_saved = True
 
@@ -668,12 +1116,18 @@ class HTTPClient(object):
         if self.proxy_token:
             raise exceptions.NoTokenLookupException()
 
+        resp, body = self._time_request(url, 'GET',
+                                        headers=self._v1_auth_headers())
+        return self._v1_auth_response(url, resp, body)
+
+    def _v1_auth_headers(self):
         headers = {'X-Auth-User': self.user,
                    'X-Auth-Key': self._get_password()}
         if self.projectid:
             headers['X-Auth-Project-Id'] = self.projectid
+        return headers
 
-        resp, body = self._time_request(url, 'GET', headers=headers)
+    def _v1_auth_response(self, url, resp, body):
         if resp.status_code in (200, 204):  # in some cases we get No Content
             try:
                 mgmt_header = 'x-server-management-url'
@@ -690,9 +1144,12 @@ class HTTPClient(object):
     def _plugin_auth(self, auth_url):
         return self.auth_plugin.authenticate(self, auth_url)
 
-    def _v2_auth(self, url):
+    def _v2_auth(self, url, use_token=True):
         """Authenticate against a v1.0 auth service."""
-        if self.auth_token:
+        return self._authenticate(url, self._v2_auth_body(use_token))
+
+    def _v2_auth_body(self, use_token=True):
+        if self.auth_token and use_token:
             body = {"auth": {
                     "token": {"id": self.auth_token}}}
         elif self.user_id:
@@ -709,7 +1166,7 @@ class HTTPClient(object):
         elif self.projectid:
             body['auth']['tenantName'] = self.projectid
 
-        return self._authenticate(url, body)
+        return body
 
     def _authenticate(self, url, body, **kwargs):
         """Authenticate and extract the service catalog."""
@@ -739,7 +1196,12 @@ def _construct_http_client(username=None, password=None, project_id=None,
                            auth_token=None, cacert=None, tenant_id=None,
                            user_id=None, connection_pool=False, session=None,
                            auth=None, user_agent='python-subjectclient',
-                           interface=None, api_version=None, **kwargs):
+                           interface=None, api_version=None,
+                           thread_safe=False, pool_connections=None,
+                           pool_maxsize=None, pool_block=None, transport=None,
+                           retry_policy=None, circuit_breaker=None,
+                           hedging_policy=None, token_refresh_margin=None,
+                           **kwargs):
     # TODO(mordred): If not session, just make a Session, then return
     # SessionClient always
     if session:
@@ -752,6 +1214,10 @@ def _construct_http_client(username=None, password=None, project_id=None,
                              user_agent=user_agent,
                              timings=timings,
                              api_version=api_version,
+                             transport=transport,
+                             retry_policy=retry_policy,
+                             circuit_breaker=circuit_breaker,
+                             hedging_policy=hedging_policy,
                              **kwargs)
     else:
         # FIXME(jamielennox): username and password are now optional. Need
@@ -782,10 +1248,19 @@ def _construct_http_client(username=None, password=None, project_id=None,
                           cacert=cacert,
                           connection_pool=connection_pool,
                           api_version=api_version,
-                          logger=logger)
-
-
-def discover_extensions(version, only_contrib=False):
+                          logger=logger,
+                          thread_safe=thread_safe,
+                          pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          pool_block=pool_block,
+                          transport=transport,
+                          retry_policy=retry_policy,
+                          circuit_breaker=circuit_breaker,
+                          hedging_policy=hedging_policy,
+                          token_refresh_margin=token_refresh_margin)
+
+
+def discover_extensions(version, only_contrib=False, manifest=None):
     """Returns the list of extensions, which can be discovered by python path,
     contrib path and by entry-point 'subjectclient.extension'.
 
@@ -793,16 +1268,62 @@ def discover_extensions(version, only_contrib=False):
     :type version: str or subjectclient.api_versions.APIVersion
     :param only_contrib: search only in contrib directory or not
     :type only_contrib: bool
+    :param manifest: ExtensionManifest of the extensions discovered before.
+        When it is up to date the extensions are not searched for and their
+        modules are only imported when used.
+    :type manifest: subjectclient.extension.ExtensionManifest
     """
     if not isinstance(version, api_versions.APIVersion):
         version = api_versions.get_api_version(version)
     if only_contrib:
         chain = _discover_via_contrib_path(version)
+        manifest = None
     else:
+        contrib_paths = [_get_contrib_path(version)]
+        if manifest is not None:
+            infos = manifest.get(version, contrib_paths)
+            if infos is not None:
+                return [ext.LazyExtension(
+                    functools.partial(_load_extension_module, info), info)
+                    for info in infos]
         chain = itertools.chain(_discover_via_python_path(),
                                 _discover_via_contrib_path(version),
                                 _discover_via_entry_points())
-    return [ext.Extension(name, module) for name, module in chain]
+
+    extensions = []
+    infos = []
+    for name, module, source, target in chain:
+        extension = ext.Extension(name, module)
+        extensions.append(extension)
+        if manifest is not None:
+            infos.append(dict(extension.get_info(), source=source,
+                              target=target))
+    if manifest is not None:
+        manifest.set(version, infos, contrib_paths)
+    return extensions
+
+
+def _load_extension_module(info):
+    if info['source'] == 'contrib':
+        return _load_source(info['name'], info['target'])
+    module_name, _sep, attrs = info['target'].partition(':')
+    module = importutils.import_module(module_name)
+    for attr in attrs.split('.') if attrs else ():
+        module = getattr(module, attr)
+    return module
+
+
+def _load_source(name, path):
+    """Import the python source file `path` as the module `name`."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
 
 
 def _discover_via_python_path():
@@ -812,16 +1333,20 @@ def _discover_via_python_path():
             if not hasattr(module_loader, 'load_module'):
                 module_loader = module_loader.find_module(name)
             module = module_loader.load_module(name)
+            module_name = name
             if hasattr(module, 'extension_name'):
                 name = module.extension_name
 
-            yield name, module
+            yield name, module, 'python_path', module_name
 
 
-def _discover_via_contrib_path(version):
+def _get_contrib_path(version):
     module_path = os.path.dirname(os.path.abspath(__file__))
-    ext_path = os.path.join(module_path, "v%s" % version.ver_major, 'contrib')
-    ext_glob = os.path.join(ext_path, "*.py")
+    return os.path.join(module_path, "v%s" % version.ver_major, 'contrib')
+
+
+def _discover_via_contrib_path(version):
+    ext_glob = os.path.join(_get_contrib_path(version), "*.py")
 
     for ext_path in glob.iglob(ext_glob):
         name = os.path.basename(ext_path)[:-3]
@@ -829,19 +1354,19 @@ def _discover_via_contrib_path(version):
         if name in extensions_ignored_name:
             continue
 
-        module = imp.load_source(name, ext_path)
-        yield name, module
+        module = _load_source(name, ext_path)
+        yield name, module, 'contrib', ext_path
 
 
 def _discover_via_entry_points():
-    for ep in pkg_resources.iter_entry_points('subjectclient.extension'):
+    for ep in utils.iter_entry_points('subjectclient.extension'):
         name = ep.name
         module = ep.load()
 
-        yield name, module
+        yield name, module, 'entry_point', utils.get_entry_point_target(ep)
 
 
-def _get_client_class_and_version(version):
+def _get_client_class_and_version(version, module='client'):
     if not isinstance(version, api_versions.APIVersion):
         version = api_versions.get_api_version(version)
     else:
@@ -850,7 +1375,7 @@ def _get_client_class_and_version(version):
         raise exceptions.UnsupportedVersion(
             _("The version should be explicit, not latest."))
     return version, importutils.import_class(
-        "subjectclient.v%s.client.Client" % version.ver_major)
+        "subjectclient.v%s.%s.Client" % (version.ver_major, module))
 
 
 def get_client_class(version):
@@ -95,6 +95,19 @@ class ConnectionRefused(Exception):
         return "ConnectionRefused: %s" % repr(self.response)
 
 
+class CircuitOpen(Exception):
+    """
+    The requests to a service URL fail fast after it failed repeatedly.
+    """
+    def __init__(self, service_url, retry_in):
+        self.service_url = service_url
+        self.retry_in = retry_in
+
+    def __str__(self):
+        return ("CircuitOpen: requests to %s are suspended for %.1f more "
+                "seconds" % (self.service_url, self.retry_in))
+
+
 class ResourceInErrorState(Exception):
     """Resource is in the error state."""
 
@@ -106,6 +119,21 @@ class ResourceInErrorState(Exception):
         self.message = "%s." % msg
 
 
+class ChecksumMismatch(Exception):
+    """The checksum of subject data doesn't match the expected one."""
+
+    def __init__(self, algorithm, expected, actual):
+        self.algorithm = algorithm
+        self.expected = expected
+        self.actual = actual
+
+    def __str__(self):
+        return ("ChecksumMismatch: %(algorithm)s checksum of the data is "
+                "%(actual)s, expected %(expected)s" %
+                {"algorithm": self.algorithm, "actual": self.actual,
+                 "expected": self.expected})
+
+
 class VersionNotFoundForAPIMethod(Exception):
     msg_fmt = "API version '%(vers)s' is not supported on '%(method)s' method."
 
@@ -240,6 +268,15 @@ class HTTPNotImplemented(ClientException):
     message = "Not Implemented"
 
 
+class ServiceUnavailable(RetryAfterException):
+    """
+    HTTP 503 - Service Unavailable: the server is temporarily unable to
+    handle the request.
+    """
+    http_status = 503
+    message = "Service Unavailable"
+
+
 # In Python 2.4 Exception is old-style and thus doesn't have a __subclasses__()
 # so we can do this:
 #     _code_map = dict((c.http_status, c)
@@ -248,7 +285,7 @@ class HTTPNotImplemented(ClientException):
 # Instead, we have to hardcode it:
 _error_classes = [BadRequest, Unauthorized, Forbidden, NotFound,
                   MethodNotAllowed, NotAcceptable, Conflict, OverLimit,
-                  RateLimit, HTTPNotImplemented]
+                  RateLimit, HTTPNotImplemented, ServiceUnavailable]
 _code_map = dict((c.http_status, c) for c in _error_classes)
 
 
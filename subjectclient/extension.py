@@ -13,6 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
+import json
+import os
+import sys
+
 from subjectclient import base
 from subjectclient import utils
 
@@ -22,6 +27,8 @@ class Extension(base.HookableMixin):
 
     SUPPORTED_HOOKS = ('__pre_parse_args__', '__post_parse_args__')
 
+    loaded = True
+
     def __init__(self, name, module):
         self.name = name
         self.module = module
@@ -35,5 +42,140 @@ class Extension(base.HookableMixin):
             elif utils.safe_issubclass(attr_value, base.Manager):
                 self.manager_class = attr_value
 
+    @property
+    def commands(self):
+        """Names of the shell commands of the extension."""
+        return [attr[3:].replace('_', '-') for attr in dir(self.module)
+                if attr.startswith('do_')]
+
+    def provides(self, argv):
+        """Whether one of the commands of the extension is in `argv`."""
+        return not set(self.commands).isdisjoint(argv or ())
+
+    def get_info(self):
+        """Return what an ExtensionManifest records of the extension."""
+        path = getattr(self.module, '__file__', None)
+        return {'name': self.name,
+                'commands': self.commands,
+                'hooks': any(hasattr(self.module, hook)
+                             for hook in self.SUPPORTED_HOOKS),
+                'manager': self.manager_class is not None,
+                'path': path,
+                'mtime': _get_mtime(path)}
+
     def __repr__(self):
         return "<Extension '%s'>" % self.name
+
+
+class LazyExtension(Extension):
+    """Extension whose module is imported when first used.
+
+    :param load: Callable importing and returning the module.
+    :param info: What the manifest recorded of the extension, see
+                 Extension.get_info.
+
+    The modules with hooks are imported right away, for their hooks to be
+    registered.
+    """
+
+    def __init__(self, load, info):
+        self.name = info['name']
+        self.info = info
+        self._load = load
+        self._module = None
+        self._manager_class = None
+        if info['hooks']:
+            self._import()
+
+    def _import(self):
+        if self._module is None:
+            self._module = self._load()
+            self._parse_extension_module()
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    @property
+    def module(self):
+        return self._import()
+
+    @property
+    def manager_class(self):
+        if not self.info['manager']:
+            return None
+        self._import()
+        return self._manager_class
+
+    @manager_class.setter
+    def manager_class(self, value):
+        self._manager_class = value
+
+    @property
+    def commands(self):
+        return self.info['commands']
+
+    def get_info(self):
+        return self.info
+
+
+def _get_mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except (OSError, TypeError):
+        return None
+
+
+class ExtensionManifest(object):
+    """What the extensions found at the last discovery provide.
+
+    The manifest is kept for sys.path and the modification times of its
+    entries, which change when distributions are installed or removed. It
+    is discarded when one of the extension files changed.
+
+    :param path: Directory of the manifests, defaults to
+                 env[OS_EXTENSION_CACHE_DIR] or ~/.subjectclient/extensions.
+    """
+
+    def __init__(self, path=None):
+        self._store = utils.JsonFileCache(
+            path or utils.env('OS_EXTENSION_CACHE_DIR',
+                              default='~/.subjectclient/extensions'))
+
+    def _get_key(self, version, extra_paths):
+        # NOTE: '' stands for the current directory, whose modification
+        # time changes as users work in it.
+        paths = [path for path in sys.path if path] + list(extra_paths)
+        fingerprint = [version.get_string()]
+        fingerprint.extend((path, _get_mtime(path)) for path in paths)
+        return hashlib.sha1(
+            json.dumps(fingerprint).encode('utf-8')).hexdigest()
+
+    def get(self, version, extra_paths=()):
+        """Return the info of the extensions of `version`, or None.
+
+        :param extra_paths: Directories searched for extensions besides
+                            sys.path.
+        """
+        entry = self._store.get(self._get_key(version, extra_paths))
+        if not entry:
+            return None
+        for info in entry['extensions']:
+            if info['path'] and _get_mtime(info['path']) != info['mtime']:
+                return None
+        return entry['extensions']
+
+    def set(self, version, extensions, extra_paths=()):
+        """Save the info of the extensions of `version`.
+
+        :param extensions: list of the dicts of Extension.get_info, with
+                           what the caller needs to import the modules.
+        """
+        try:
+            self._store.set(self._get_key(version, extra_paths),
+                            {'extensions': extensions})
+        except (IOError, OSError):
+            # NOTE: the extensions are discovered again by the next process,
+            # which is no reason to fail this one.
+            pass
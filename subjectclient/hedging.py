@@ -0,0 +1,214 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Hedged requests.
+
+Pass a HedgingPolicy as the `hedging_policy` of a client to send a
+duplicate of the reads which are slower to answer than most recent ones,
+and use whichever response arrives first::
+
+    >>> from subjectclient import client
+    >>> from subjectclient import hedging
+    >>> subject = client.Client(VERSION, USERNAME, PASSWORD, PROJECT_ID,
+    ...                         AUTH_URL,
+    ...                         hedging_policy=hedging.HedgingPolicy())
+"""
+
+import collections
+from concurrent import futures
+import itertools
+import math
+import threading
+
+from six.moves.urllib import parse
+
+from subjectclient import utils
+
+
+# Methods whose requests can be sent twice.
+HEDGED_METHODS = frozenset(['GET', 'HEAD'])
+
+# Maximum number of requests sent at the same time by the threads shared by
+# the policies; requests wait for a thread beyond it.
+MAX_WORKERS = 32
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Return the thread pool shared by the policies, created on first use.
+
+    The policies don't know the lifetime of the clients using them, a
+    single pool keeps the number of threads bounded however many policies
+    are created.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = futures.ThreadPoolExecutor(MAX_WORKERS)
+        return _executor
+
+
+class _LatencyWindow(object):
+    """Latencies of the most recent requests.
+
+    It is given as the `times` of utils.record_time, which appends to it.
+    """
+
+    def __init__(self, size):
+        self._latencies = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def append(self, timing):
+        label, start, end = timing
+        with self._lock:
+            self._latencies.append(end - start)
+
+    def __len__(self):
+        return len(self._latencies)
+
+    def percentile(self, percent):
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        rank = int(math.ceil(percent / 100.0 * len(latencies)))
+        return latencies[max(rank, 1) - 1]
+
+
+class HedgingPolicy(object):
+    """When to send a duplicate of a slow read, and where.
+
+    A GET or HEAD request whose response hasn't arrived after the
+    `percentile` of the latencies of the `window` most recent requests is
+    sent once more, the first response is used. No request is hedged until
+    `min_samples` latencies were recorded. Streamed requests (subject data)
+    are never hedged.
+
+    :param percentile: Percentile of the recent latencies after which a
+                       duplicate request is sent.
+    :param window: Number of recent latencies kept.
+    :param min_samples: Number of latencies needed before hedging.
+    :param alternate_urls: Service URLs (scheme and host) the duplicate
+                           requests are sent to in turn, instead of the URL
+                           of the original request.
+
+    The latencies and statistics are kept by the policy, it can be shared by
+    clients talking to the same service. The requests are sent by a pool of
+    MAX_WORKERS threads shared by all of the policies. The asyncio client
+    doesn't hedge its requests.
+    """
+
+    def __init__(self, percentile=95, window=200, min_samples=20,
+                 alternate_urls=None):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.alternate_urls = [u.rstrip('/') for u in alternate_urls or ()]
+        self.latencies = _LatencyWindow(window)
+        self._alternates = itertools.cycle(self.alternate_urls)
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'hedged': 0, 'hedge_wins': 0}
+
+    def applies(self, method, kwargs):
+        """Whether a request may be hedged."""
+        return (method.upper() in HEDGED_METHODS and
+                not kwargs.get('stream'))
+
+    def delay(self):
+        """Return how long to wait before hedging, None not to hedge."""
+        if len(self.latencies) < self.min_samples:
+            return None
+        return self.latencies.percentile(self.percentile)
+
+    def hedge_url(self, url):
+        """Return the URL the duplicate of a request to `url` is sent to."""
+        if not self.alternate_urls or not parse.urlsplit(url).netloc:
+            return url
+        with self._lock:
+            alternate = next(self._alternates)
+        scheme, netloc, path, query, frag = parse.urlsplit(url)
+        return alternate + parse.urlunsplit(('', '', path, query, frag))
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get_stats(self):
+        """Return the number of `requests`, how many of them were `hedged`
+        and how many times the duplicate answered first (`hedge_wins`).
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _timed(self, send, url, started=None):
+        if started is not None:
+            started.set()
+        with utils.record_time(self.latencies, True, url):
+            return send(url)
+
+    def call(self, send, url):
+        """Send a request with `send`, and a duplicate if it is slow.
+
+        :param send: callable taking the URL to send the request to and
+                     returning the response, or a tuple whose first item is
+                     the response. It is called from other threads and
+                     shouldn't change the state of the client, the caller
+                     records what it needs of the response returned.
+        :returns: the first successful response. The error of the original
+                  request is raised if both requests failed. The response
+                  which isn't used is closed once it arrives.
+        """
+        self._count('requests')
+        delay = self.delay()
+        if delay is None:
+            return self._timed(send, url)
+
+        executor = _get_executor()
+        started = threading.Event()
+        first = executor.submit(self._timed, send, url, started)
+        # NOTE: the time spent waiting for a thread of the shared pool
+        # doesn't count, the delay runs from when the request is sent.
+        started.wait()
+        done, pending = futures.wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        self._count('hedged')
+        second = executor.submit(self._timed, send, self.hedge_url(url))
+        done, pending = futures.wait([first, second],
+                                     return_when=futures.FIRST_COMPLETED)
+        winner = second if second in done and first not in done else first
+        if winner.exception() is not None:
+            # NOTE: the other request may still succeed.
+            winner = second if winner is first else first
+            if winner.exception() is not None:
+                return first.result()
+        loser = first if winner is second else second
+        if not loser.cancel():
+            loser.add_done_callback(_close_response)
+        if winner is second:
+            self._count('hedge_wins')
+        return winner.result()
+
+
+def _close_response(future):
+    """Release the connection of the response of a request not used."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    resp = future.result()
+    if isinstance(resp, tuple):
+        resp = resp[0]
+    close = getattr(resp, 'close', None)
+    if close is not None:
+        close()
@@ -0,0 +1,173 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+HTTP/2 transport, requires httpx with its http2 extra.
+
+Pass an HTTP2Adapter as the `transport` of a client to send its requests
+over HTTP/2, many concurrent requests to the same host are then multiplexed
+over a single TLS connection::
+
+    >>> from subjectclient import client
+    >>> from subjectclient import http2
+    >>> subject = client.Client(VERSION, USERNAME, PASSWORD, PROJECT_ID,
+    ...                         AUTH_URL, transport=http2.HTTP2Adapter())
+"""
+
+import ssl
+import threading
+
+import requests
+from requests import adapters
+from requests import structures
+from requests import utils as requests_utils
+import six
+
+from subjectclient import exceptions
+from subjectclient.i18n import _
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+def _to_bytes(chunks):
+    # NOTE: h2 frames only take bytes, while the bodies streamed from files
+    # are made of memoryviews.
+    for chunk in chunks:
+        if isinstance(chunk, six.text_type):
+            chunk = chunk.encode('utf-8')
+        yield bytes(chunk)
+
+
+class _RawResponse(object):
+    """Minimal urllib3-like raw response over an httpx response.
+
+    It is what requests reads the body of a streamed response from.
+    """
+
+    def __init__(self, resp):
+        self._resp = resp
+        self._chunks = None
+
+    def stream(self, chunk_size, decode_content=True):
+        for chunk in self._resp.iter_bytes(chunk_size):
+            yield chunk
+
+    def read(self, amt=None, decode_content=True):
+        if amt is None:
+            return b''.join(self._resp.iter_bytes())
+        if self._chunks is None:
+            self._chunks = self._resp.iter_bytes(amt)
+        return next(self._chunks, b'')
+
+    def close(self):
+        self._resp.close()
+
+    def release_conn(self):
+        self._resp.close()
+
+
+class HTTP2Adapter(adapters.BaseAdapter):
+    """requests transport adapter sending requests with httpx over HTTP/2.
+
+    HTTP/2 is negotiated with the server during the TLS handshake, and
+    HTTP/1.1 is used with servers which don't support it.
+
+    :param http1: Set to False to send cleartext requests with HTTP/2 prior
+                  knowledge (h2c), e.g. to a local test server.
+    :param max_connections: Maximum number of connections kept per host.
+    :param client_kwargs: Other arguments given to httpx.Client.
+
+    Proxy settings of requests are not used, configure them through
+    `client_kwargs` instead.
+    """
+
+    def __init__(self, http1=True, max_connections=None, **client_kwargs):
+        if httpx is None:
+            raise exceptions.InvalidUsage(
+                _("httpx with its http2 extra is required by the HTTP/2 "
+                  "transport."))
+        super(HTTP2Adapter, self).__init__()
+        self._client_kwargs = dict(client_kwargs, http1=http1, http2=True)
+        if max_connections is not None:
+            self._client_kwargs['limits'] = httpx.Limits(
+                max_connections=max_connections)
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _get_client(self, verify, cert):
+        """Return the httpx client for a TLS configuration."""
+        key = (verify, cert if not isinstance(cert, list) else tuple(cert))
+        with self._lock:
+            if key not in self._clients:
+                if isinstance(verify, six.string_types):
+                    verify = ssl.create_default_context(cafile=verify)
+                kwargs = dict(self._client_kwargs, verify=verify)
+                if cert:
+                    kwargs['cert'] = cert
+                self._clients[key] = httpx.Client(**kwargs)
+            return self._clients[key]
+
+    @staticmethod
+    def _timeout(timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return httpx.Timeout(timeout)
+
+    def send(self, request, stream=False, timeout=None, verify=True,
+             cert=None, proxies=None):
+        client = self._get_client(verify, cert)
+        body = request.body
+        if body is not None and not isinstance(body, (six.binary_type,
+                                                      six.text_type)):
+            body = _to_bytes(body)
+        try:
+            resp = client.send(
+                client.build_request(request.method, request.url,
+                                     headers=dict(request.headers),
+                                     content=body,
+                                     timeout=self._timeout(timeout)),
+                stream=stream)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+        return self.build_response(request, resp, stream)
+
+    def build_response(self, request, resp, stream):
+        """Turn an httpx response into a requests.Response."""
+        response = requests.Response()
+        response.status_code = resp.status_code
+        response.headers = structures.CaseInsensitiveDict(resp.headers)
+        response.encoding = requests_utils.get_encoding_from_headers(
+            response.headers)
+        response.reason = resp.reason_phrase
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.raw = _RawResponse(resp)
+        if not stream:
+            try:
+                response._content = resp.read()
+                response._content_consumed = True
+            finally:
+                resp.close()
+        return response
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            client.close()
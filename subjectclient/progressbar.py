@@ -17,6 +17,8 @@ import sys
 
 import six
 
+from subjectclient import utils
+
 
 class _ProgressBarBase(object):
     """A progress bar provider for a wrapped obect.
@@ -68,6 +70,25 @@ class VerboseFileWrapper(_ProgressBarBase):
                 sys.stdout.write('\n')
         return data
 
+    def iter_chunks(self, chunk_size):
+        for chunk in utils.iter_chunks(self._wrapped, chunk_size):
+            self._display_progress_bar(len(chunk))
+            yield chunk
+        if self._show_progress:
+            # Break to a new line from the progress bar for incoming
+            # output.
+            sys.stdout.write('\n')
+
+    def readinto(self, buf):
+        size = self._wrapped.readinto(buf)
+        if size:
+            self._display_progress_bar(size)
+        elif self._show_progress:
+            # Break to a new line from the progress bar for incoming
+            # output.
+            sys.stdout.write('\n')
+        return size
+
 
 class VerboseIteratorWrapper(_ProgressBarBase):
     """An iterator wrapper with a progress bar.
@@ -0,0 +1,167 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Retry policy of the failed requests.
+
+Pass a RetryPolicy as the `retry_policy` of a client to send the requests
+which failed for a transient reason again::
+
+    >>> from subjectclient import client
+    >>> from subjectclient import retry
+    >>> subject = client.Client(VERSION, USERNAME, PASSWORD, PROJECT_ID,
+    ...                         AUTH_URL, retry_policy=retry.RetryPolicy())
+"""
+
+import random
+import threading
+import time
+
+from keystoneauth1 import exceptions as ks_exceptions
+import requests
+
+from subjectclient import exceptions
+
+
+# Methods which can be sent again without changing their outcome.
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+# Statuses of the server errors which are worth trying again.
+RETRY_STATUSES = frozenset([500, 502, 503, 504])
+
+# The connection dropped or could not be opened.
+CONNECTION_ERRORS = (requests.exceptions.ConnectionError,
+                     ks_exceptions.ConnectionError,
+                     exceptions.ConnectionRefused)
+
+
+class RetryPolicy(object):
+    """When and how long to wait before sending a failed request again.
+
+    Idempotent requests are retried on the server errors in `statuses` and
+    on connection errors. Requests of any method are retried when rejected
+    with an HTTP 413 or 429, the server didn't act on them.
+
+    The n-th retry waits a random time between 0 and
+    ``backoff * 2 ** (n - 1)`` seconds (capped at `max_backoff`), or the
+    Retry-After the server sent if it is longer.
+
+    :param retries: Maximum number of retries of a request.
+    :param backoff: Base of the exponential backoff, in seconds.
+    :param max_backoff: Longest backoff between two attempts, in seconds.
+    :param max_retry_after: A request is not retried when the server asks
+                            to wait longer than that many seconds.
+    :param budget_ratio: Number of retries allowed per request sent, on
+                         average, so that a failing server isn't flooded
+                         with retries.
+    :param budget_reserve: Number of retries which can be saved up for
+                           bursts of failures.
+    :param methods: Methods retried on server and connection errors.
+    :param statuses: Statuses of the server errors retried.
+
+    The retry budget is kept by the policy, give each client its own policy
+    for it to be per client.
+    """
+
+    def __init__(self, retries=3, backoff=0.5, max_backoff=30,
+                 max_retry_after=120, budget_ratio=0.2, budget_reserve=10,
+                 methods=IDEMPOTENT_METHODS, statuses=RETRY_STATUSES):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.budget_ratio = budget_ratio
+        self.budget_reserve = max(budget_reserve, 1)
+        self.methods = frozenset(m.upper() for m in methods)
+        self.statuses = frozenset(statuses)
+        self._budget = float(self.budget_reserve)
+        self._lock = threading.Lock()
+
+    def is_retryable(self, method, error):
+        """Whether a request failing with `error` may be sent again."""
+        if isinstance(error, (exceptions.OverLimit, exceptions.RateLimit)):
+            return True
+        if method.upper() not in self.methods:
+            return False
+        if isinstance(error, exceptions.ClientException):
+            return error.code in self.statuses
+        return isinstance(error, CONNECTION_ERRORS)
+
+    def request_sent(self):
+        """Add the retries a new request earns to the budget."""
+        with self._lock:
+            self._budget = min(self._budget + self.budget_ratio,
+                               self.budget_reserve)
+
+    def _spend_retry(self):
+        with self._lock:
+            if self._budget < 1:
+                return False
+            self._budget -= 1
+            return True
+
+    def next_delay(self, method, error, attempt):
+        """Return how long to wait before retry number `attempt`.
+
+        :returns: the delay in seconds, or None if the request must not be
+                  retried.
+        """
+        if attempt > self.retries or not self.is_retryable(method, error):
+            return None
+        retry_after = getattr(error, 'retry_after', 0)
+        if retry_after > self.max_retry_after:
+            return None
+        if not self._spend_retry():
+            return None
+        backoff = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return max(random.uniform(0, backoff), retry_after)
+
+    def call(self, method, send, logger=None):
+        """Call `send` until it succeeds or the request may not be retried.
+
+        :param send: callable taking the number of the attempt (0 for the
+                     first one) and returning the response.
+        """
+        self.request_sent()
+        attempt = 0
+        while True:
+            try:
+                return send(attempt)
+            except Exception as e:
+                attempt += 1
+                delay = self.next_delay(method, e, attempt)
+                if delay is None:
+                    raise
+                if logger is not None:
+                    logger.warning("Retrying %(method)s in %(delay).1fs "
+                                   "after: %(error)s",
+                                   {'method': method, 'delay': delay,
+                                    'error': e})
+            time.sleep(delay)
+
+
+def is_replayable(kwargs):
+    """Whether the body of a request can be sent again.
+
+    File-like and iterator bodies are consumed by the first attempt.
+    """
+    for name in ('body', 'data'):
+        value = kwargs.get(name)
+        if hasattr(value, 'read') or hasattr(value, '__next__') or (
+                hasattr(value, 'next')):
+            return False
+    return True
+
+
+def attempt_label(attempt):
+    """Return the extra timing label of an attempt, if any."""
+    return ('(retry %d)' % attempt,) if attempt else ()
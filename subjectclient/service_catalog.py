@@ -15,6 +15,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import calendar
+
+from oslo_utils import timeutils
 
 import subjectclient.exceptions
 
@@ -24,6 +27,8 @@ class ServiceCatalog(object):
 
     def __init__(self, resource_dict):
         self.catalog = resource_dict
+        self._index = None
+        self._cache = {}
 
     def get_token(self):
         return self.catalog['access']['token']['id']
@@ -31,13 +36,46 @@ class ServiceCatalog(object):
     def get_tenant_id(self):
         return self.catalog['access']['token']['tenant']['id']
 
-    def url_for(self, attr=None, filter_value=None,
-                service_type=None, endpoint_type='publicURL',
-                service_name=None, volume_service_name=None):
-        """Fetch the public URL from the Compute service for
-        a particular endpoint attribute. If none given, return
-        the first. See tests for sample service catalog.
+    def get_expires(self):
+        """Return when the token expires, in seconds since the epoch.
+
+        None is returned if the catalog doesn't tell.
         """
+        expires = self.catalog['access']['token'].get('expires')
+        if not expires:
+            return None
+        return calendar.timegm(
+            timeutils.normalize_time(timeutils.parse_isotime(expires))
+            .timetuple())
+
+    def _build_index(self):
+        """Index the endpoints by service type, name and region.
+
+        Every endpoint is listed under its service name and region, and
+        under None for each of them to match any name or region. The
+        endpoints are copies holding the name of their service.
+        """
+        index = {}
+        for service in self.catalog['access'].get('serviceCatalog', []):
+            service_type = service.get('type')
+            name = service.get('name')
+            for endpoint in service['endpoints']:
+                # Ignore 1.0 subject endpoints
+                if (service_type == 'subject' and
+                        endpoint.get('versionId', '2') not in ('1.1', '2')):
+                    continue
+                endpoint = dict(endpoint, serviceName=name)
+                region = endpoint.get('region')
+                region = region.lower() if region else None
+                for key in set([(service_type, name, region),
+                                (service_type, None, region),
+                                (service_type, name, None),
+                                (service_type, None, None)]):
+                    index.setdefault(key, []).append(endpoint)
+        return index
+
+    def _find_endpoints(self, attr, filter_value, service_type,
+                        service_name, volume_service_name):
         matching_endpoints = []
         if 'endpoints' in self.catalog:
             # We have a bastardized service catalog. Treat it special. :/
@@ -54,33 +92,47 @@ class ServiceCatalog(object):
         if 'serviceCatalog' not in self.catalog['access']:
             return None
 
-        # Full catalog ...
-        catalog = self.catalog['access']['serviceCatalog']
+        if self._index is None:
+            self._index = self._build_index()
 
-        for service in catalog:
-            if service.get("type") != service_type:
-                continue
+        name = None
+        if service_type == 'subject':
+            name = service_name or None
+        elif service_type == 'volume':
+            name = volume_service_name or None
 
-            if (service_name and service_type == 'subject' and
-                    service.get('name') != service_name):
-                continue
+        if not filter_value:
+            matching_endpoints.extend(
+                self._index.get((service_type, name, None), []))
+        elif attr == 'region':
+            matching_endpoints.extend(
+                self._index.get((service_type, name, filter_value.lower()),
+                                []))
+        else:
+            for endpoint in self._index.get((service_type, name, None), []):
+                if endpoint.get(attr).lower() == filter_value.lower():
+                    matching_endpoints.append(endpoint)
+        return matching_endpoints
 
-            if (volume_service_name and service_type == 'volume' and
-                    service.get('name') != volume_service_name):
-                continue
+    def url_for(self, attr=None, filter_value=None,
+                service_type=None, endpoint_type='publicURL',
+                service_name=None, volume_service_name=None):
+        """Fetch the public URL from the Compute service for
+        a particular endpoint attribute. If none given, return
+        the first. See tests for sample service catalog.
 
-            endpoints = service['endpoints']
-            for endpoint in endpoints:
-                # Ignore 1.0 subject endpoints
-                if (service.get("type") == 'subject' and
-                        endpoint.get('versionId', '2') not in ('1.1', '2')):
-                    continue
-                if (not filter_value or
-                        endpoint.get(attr).lower() == filter_value.lower()):
-                    endpoint["serviceName"] = service.get("name")
-                    matching_endpoints.append(endpoint)
+        The endpoints matching a selector are looked up once, in an index
+        built on the first call.
+        """
+        key = (attr, filter_value, service_type, service_name,
+               volume_service_name)
+        if key not in self._cache:
+            self._cache[key] = self._find_endpoints(*key)
+        matching_endpoints = self._cache[key]
 
-        if not matching_endpoints:
+        if matching_endpoints is None:
+            return None
+        elif not matching_endpoints:
             raise subjectclient.exceptions.EndpointNotFound()
         elif len(matching_endpoints) > 1:
             raise subjectclient.exceptions.AmbiguousEndpoints(
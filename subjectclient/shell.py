@@ -41,12 +41,15 @@ except ImportError:
 
 import subjectclient
 from subjectclient import api_versions
+from subjectclient import auth_cache
 import subjectclient.auth_plugin
 from subjectclient import client
 from subjectclient import exceptions as exc
 import subjectclient.extension
 from subjectclient.i18n import _
+from subjectclient import service_catalog
 from subjectclient import utils
+from subjectclient import version_cache
 
 DEFAULT_MAJOR_OS_SUBJECT_API_VERSION = "1.0"
 # The default behaviour of subject client CLI is that CLI negotiates with server
@@ -211,11 +214,13 @@ class DeprecatedAction(argparse.Action):
 
 
 class SecretsHelper(object):
-    def __init__(self, args, client):
+    def __init__(self, args, client, cache=None):
         self.args = args
         self.client = client
         self.key = None
         self._password = None
+        self._entry = None
+        self.cache = cache or auth_cache.TokenCache()
 
     def _validate_string(self, text):
         if text is None or len(text) == 0:
@@ -261,8 +266,39 @@ class SecretsHelper(object):
                 pass
         return pw
 
-    def save(self, auth_token, management_url, tenant_id):
-        if not HAS_KEYRING or not self.args.os_cache:
+    def _load(self):
+        """Return the cached authentication data, reading it only once."""
+        if self._entry is None:
+            self._entry = {}
+            if self.args.os_cache:
+                key = self._make_key()
+                if key in self.cache:
+                    self._entry = self.cache.get(key) or {}
+                else:
+                    self._entry = self._load_keyring() or {}
+        return self._entry
+
+    def _load_keyring(self):
+        # NOTE: tokens used to be cached with keyring, without their expiry
+        # nor the service catalog. They are only read until the file cache
+        # has an entry.
+        if not HAS_KEYRING:
+            return None
+        try:
+            block = keyring.get_password('subjectclient_auth',
+                                         self._make_key())
+            if block:
+                token, management_url, tenant_id = block.split('|', 2)
+                return {'auth_token': token,
+                        'management_url': management_url,
+                        'tenant_id': tenant_id}
+        except all_errors:
+            pass
+        return None
+
+    def save(self, auth_token, management_url, tenant_id, expires_at=None,
+             catalog=None):
+        if not self.args.os_cache:
             return
         if (auth_token == self.auth_token and
                 management_url == self.management_url):
@@ -271,10 +307,12 @@ class SecretsHelper(object):
         if not all([management_url, auth_token, tenant_id]):
             raise ValueError(_("Unable to save empty management url/auth "
                                "token"))
-        value = "|".join([str(auth_token),
-                          str(management_url),
-                          str(tenant_id)])
-        keyring.set_password("subjectclient_auth", self._make_key(), value)
+        self._entry = {'auth_token': str(auth_token),
+                       'management_url': str(management_url),
+                       'tenant_id': str(tenant_id),
+                       'expires_at': expires_at,
+                       'catalog': catalog}
+        self.cache.set(self._make_key(), self._entry)
 
     @property
     def password(self):
@@ -296,46 +334,23 @@ class SecretsHelper(object):
 
     @property
     def management_url(self):
-        if not HAS_KEYRING or not self.args.os_cache:
-            return None
-        management_url = None
-        try:
-            block = keyring.get_password('subjectclient_auth', self._make_key())
-            if block:
-                _token, management_url, _tenant_id = block.split('|', 2)
-        except all_errors:
-            pass
-        return management_url
+        return self._load().get('management_url')
 
     @property
     def auth_token(self):
-        # Now is where it gets complicated since we
-        # want to look into the keyring module, if it
-        # exists and see if anything was provided in that
-        # file that we can use.
-        if not HAS_KEYRING or not self.args.os_cache:
-            return None
-        token = None
-        try:
-            block = keyring.get_password('subjectclient_auth', self._make_key())
-            if block:
-                token, _management_url, _tenant_id = block.split('|', 2)
-        except all_errors:
-            pass
-        return token
+        return self._load().get('auth_token')
 
     @property
     def tenant_id(self):
-        if not HAS_KEYRING or not self.args.os_cache:
-            return None
-        tenant_id = None
-        try:
-            block = keyring.get_password('subjectclient_auth', self._make_key())
-            if block:
-                _token, _management_url, tenant_id = block.split('|', 2)
-        except all_errors:
-            pass
-        return tenant_id
+        return self._load().get('tenant_id')
+
+    @property
+    def expires_at(self):
+        return self._load().get('expires_at')
+
+    @property
+    def catalog(self):
+        return self._load().get('catalog')
 
 
 class SubjectClientArgumentParser(argparse.ArgumentParser):
@@ -440,8 +455,18 @@ class OpenStackComputeShell(object):
             default=strutils.bool_from_string(
                 utils.env('OS_CACHE', default=False), True),
             action='store_true',
-            help=_("Use the auth token cache. Defaults to False if "
-                   "env[OS_CACHE] is not set."))
+            help=_("Use the auth token, API version and extension caches. "
+                   "Defaults to False if env[OS_CACHE] is not set."))
+
+        parser.add_argument(
+            '--os-version-cache-ttl',
+            metavar='<seconds>',
+            type=int,
+            default=utils.env('OS_VERSION_CACHE_TTL',
+                              default=version_cache.DEFAULT_TTL),
+            help=_("Seconds the API versions discovered are cached for "
+                   "with --os-cache, 0 disables it. Defaults to "
+                   "env[OS_VERSION_CACHE_TTL] or 86400."))
 
         parser.add_argument(
             '--timings',
@@ -528,8 +553,14 @@ class OpenStackComputeShell(object):
         self._find_actions(subparsers, actions_module, version, do_help)
         self._find_actions(subparsers, self, version, do_help)
 
+        # NOTE: the modules of the extensions discovered lazily are only
+        # imported when one of their commands is run, or to list them all.
+        load_all = (do_help or not argv or 'bash-completion' in argv or
+                    'bash_completion' in argv)
         for extension in self.extensions:
-            self._find_actions(subparsers, extension.module, version, do_help)
+            if load_all or extension.loaded or extension.provides(argv):
+                self._find_actions(subparsers, extension.module, version,
+                                   do_help)
 
         self._add_bash_completion_subparser(subparsers)
 
@@ -625,6 +656,42 @@ class OpenStackComputeShell(object):
         self.client_logger.setLevel(logging.DEBUG)
         self.client_logger.addHandler(ch)
 
+    def _load_secrets(self, args, auth_plugin, auth_token, management_url):
+        """Give the client the token and password of the SecretsHelper.
+
+        The password and token of the command line have precedence, pieces
+        of the identifying keyring key can come from the underlying client.
+        Only used without a keystone session, whose token is cached by
+        auth_cache.load_auth_state and auth_cache.save_auth_state.
+        """
+        helper = SecretsHelper(args, self.cs.client)
+        self.cs.client.keyring_saver = helper
+        if (auth_plugin and auth_plugin.opts and
+                "os_password" not in auth_plugin.opts):
+            use_pw = False
+        else:
+            use_pw = True
+
+        tenant_id = helper.tenant_id
+        # Allow commandline to override cache
+        if not auth_token:
+            auth_token = helper.auth_token
+        if not management_url:
+            management_url = helper.management_url
+        if tenant_id and auth_token and management_url:
+            self.cs.client.tenant_id = tenant_id
+            self.cs.client.auth_token = auth_token
+            self.cs.client.management_url = management_url
+            self.cs.client.auth_expires = helper.expires_at
+            if helper.catalog:
+                self.cs.client.service_catalog = (
+                    service_catalog.ServiceCatalog(helper.catalog))
+            self.cs.client.password_func = lambda: helper.password
+        elif use_pw:
+            # We're missing something, so auth with user/pass and save
+            # the result in our helper.
+            self.cs.client.password = helper.password
+
     def main(self, argv):
         # Parse args once to find version and debug settings
         parser = self.get_base_parser(argv)
@@ -682,6 +749,11 @@ class OpenStackComputeShell(object):
         keystone_session = None
         keystone_auth = None
 
+        discovery_cache = None
+        if os_cache and args.os_version_cache_ttl > 0:
+            discovery_cache = version_cache.VersionCache(
+                args.os_version_cache_ttl, version_cache.default_path())
+
         # We may have either, both or none of these.
         # If we have both, we don't need USERNAME, PASSWORD etc.
         # Fill in the blanks from the SecretsHelper if possible.
@@ -721,7 +793,7 @@ class OpenStackComputeShell(object):
         # presence of auth_plugin means os_auth_system is present and is not
         # keystone.
         use_session = True
-        if auth_plugin or bypass_url or os_cache or volume_service_name:
+        if auth_plugin or bypass_url or volume_service_name:
             use_session = False
 
         # FIXME(usrleon): Here should be restrict for project id same as
@@ -765,6 +837,9 @@ class OpenStackComputeShell(object):
                         loading.load_session_from_argparse_arguments(args))
                     keystone_auth = (
                         loading.load_auth_from_argparse_arguments(args))
+                if os_cache:
+                    auth_cache.load_auth_state(auth_cache.TokenCache(),
+                                               keystone_auth)
             else:
                 # set password for auth plugins
                 os_password = args.os_password
@@ -783,23 +858,32 @@ class OpenStackComputeShell(object):
                 _("You must provide an auth url "
                   "via either --os-auth-url or env[OS_AUTH_URL]"))
 
-        # This client is just used to discover api version. Version API needn't
-        # microversion, so we just pass version 2 at here.
-        self.cs = client.Client(
-            api_versions.APIVersion("1.0"),
-            os_username, os_password, os_project_name,
+        client_kwargs = dict(
             tenant_id=os_project_id, user_id=os_user_id,
             auth_url=os_auth_url, insecure=insecure,
             region_name=os_region_name, endpoint_type=endpoint_type,
-            extensions=self.extensions, service_type=service_type,
             service_name=service_name, auth_system=os_auth_system,
             auth_plugin=auth_plugin, auth_token=auth_token,
             volume_service_name=volume_service_name,
             timings=args.timings, bypass_url=bypass_url,
             os_cache=os_cache, http_log_debug=args.debug,
             cacert=cacert, timeout=timeout,
-            session=keystone_session, auth=keystone_auth,
-            logger=self.client_logger)
+            version_cache=discovery_cache, logger=self.client_logger,
+            # NOTE: the bulk commands share the client between threads.
+            thread_safe=True)
+
+        # This client is used to discover api version, then upgraded in place
+        # to the discovered version. Version API needn't microversion, so we
+        # just pass version 1.0 at here.
+        self.cs = client.Client(
+            api_versions.APIVersion("1.0"),
+            os_username, os_password, os_project_name,
+            extensions=self.extensions, service_type=service_type,
+            session=keystone_session, auth=keystone_auth, **client_kwargs)
+        if must_auth and not use_session:
+            # NOTE: restore the cached token first, for the discovery to
+            # use it rather than authenticate.
+            self._load_secrets(args, auth_plugin, auth_token, management_url)
 
         if not skip_auth:
             if not api_version.is_latest():
@@ -816,7 +900,10 @@ class OpenStackComputeShell(object):
             api_version = api_versions.discover_version(self.cs, api_version)
 
         # build available subcommands based on version
-        self.extensions = client.discover_extensions(api_version)
+        manifest = subjectclient.extension.ExtensionManifest() if (
+            os_cache) else None
+        self.extensions = client.discover_extensions(api_version,
+                                                     manifest=manifest)
         self._run_extension_hooks('__pre_parse_args__')
 
         subcommand_parser = self.get_subcommand_parser(
@@ -842,55 +929,33 @@ class OpenStackComputeShell(object):
             service_type = (utils.get_service_type(args.func) or
                             DEFAULT_NOVA_SERVICE_TYPE)
 
-        if utils.isunauthenticated(args.func):
+        if utils.isunauthenticated(args.func) and keystone_session:
             # NOTE(alex_xu): We need authentication for discover microversion.
             # But the subcommands may needn't it. If the subcommand needn't,
             # we clear the session arguments.
             keystone_session = None
             keystone_auth = None
-
-        # Recreate client object with discovered version.
-        self.cs = client.Client(
-            api_version,
-            os_username, os_password, os_project_name,
-            tenant_id=os_project_id, user_id=os_user_id,
-            auth_url=os_auth_url, insecure=insecure,
-            region_name=os_region_name, endpoint_type=endpoint_type,
-            extensions=self.extensions, service_type=service_type,
-            service_name=service_name, auth_system=os_auth_system,
-            auth_plugin=auth_plugin, auth_token=auth_token,
-            volume_service_name=volume_service_name,
-            timings=args.timings, bypass_url=bypass_url,
-            os_cache=os_cache, http_log_debug=args.debug,
-            cacert=cacert, timeout=timeout,
-            session=keystone_session, auth=keystone_auth)
-
-        # Now check for the password/token of which pieces of the
-        # identifying keyring key can come from the underlying client
-        if must_auth:
-            helper = SecretsHelper(args, self.cs.client)
-            self.cs.client.keyring_saver = helper
-            if (auth_plugin and auth_plugin.opts and
-                    "os_password" not in auth_plugin.opts):
-                use_pw = False
-            else:
-                use_pw = True
-
-            tenant_id = helper.tenant_id
-            # Allow commandline to override cache
-            if not auth_token:
-                auth_token = helper.auth_token
-            if not management_url:
-                management_url = helper.management_url
-            if tenant_id and auth_token and management_url:
-                self.cs.client.tenant_id = tenant_id
-                self.cs.client.auth_token = auth_token
-                self.cs.client.management_url = management_url
-                self.cs.client.password_func = lambda: helper.password
-            elif use_pw:
-                # We're missing something, so auth with user/pass and save
-                # the result in our helper.
-                self.cs.client.password = helper.password
+            rebuild = True
+        else:
+            # NOTE: the endpoint of the discovery client is the one of its
+            # service type.
+            rebuild = service_type != self.cs.client.service_type
+
+        if rebuild:
+            # Recreate client object with discovered version.
+            self.cs = client.Client(
+                api_version,
+                os_username, os_password, os_project_name,
+                extensions=self.extensions, service_type=service_type,
+                session=keystone_session, auth=keystone_auth,
+                **client_kwargs)
+            if must_auth and not use_session:
+                self._load_secrets(args, auth_plugin, auth_token,
+                                   management_url)
+        else:
+            # Keep the session and token of the discovery client.
+            self.cs.api_version = api_version
+            self.cs.add_extensions(self.extensions)
 
         try:
             # This does a couple of bits which are useful even if we've
@@ -906,7 +971,12 @@ class OpenStackComputeShell(object):
         except exc.AuthorizationFailure:
             raise exc.CommandError(_("Unable to authorize user"))
 
-        args.func(self.cs, args)
+        try:
+            args.func(self.cs, args)
+        finally:
+            if os_cache and keystone_auth and keystone_auth.auth_ref:
+                auth_cache.save_auth_state(auth_cache.TokenCache(),
+                                           keystone_auth)
 
         if args.timings:
             self._dump_timings(self.times + self.cs.get_timings())
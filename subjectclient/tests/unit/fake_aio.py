@@ -0,0 +1,59 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Fake AsyncTransport, requires python 3.6 or later.
+"""
+
+import json
+
+from subjectclient import aio
+
+
+class FakeTransport(aio.AsyncTransport):
+    """AsyncTransport answering from a callable instead of a server.
+
+    :param handler: callable taking the method, URL, headers and body of a
+                    request and returning the status, headers and body
+                    (bytes or JSON-serializable) of its response.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self.closed = False
+
+    async def request(self, method, url, headers=None, data=None,
+                      timeout=None, verify=True, allow_redirects=True,
+                      stream=False):
+        if hasattr(data, 'read'):
+            data = data.read()
+        elif hasattr(data, '__aiter__'):
+            data = b''.join([chunk async for chunk in data])
+        self.requests.append((method, url, headers, data))
+        status, headers, body = self.handler(method, url, headers, data)
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+            headers = dict(headers, **{'Content-Type': 'application/json'})
+        if not stream:
+            return aio.AsyncResponse(method, url, status, headers,
+                                     content=body)
+
+        async def chunks(chunk_size):
+            for start in range(0, len(body), chunk_size):
+                yield body[start:start + chunk_size]
+
+        return aio.AsyncResponse(method, url, status, headers,
+                                 chunks=chunks)
+
+    async def close(self):
+        self.closed = True
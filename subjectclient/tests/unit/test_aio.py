@@ -0,0 +1,165 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import hashlib
+import io
+import sys
+
+from six.moves.urllib import parse
+import testtools
+
+from subjectclient import api_versions
+from subjectclient import exceptions
+from subjectclient import hedging
+from subjectclient import version_cache
+from subjectclient.tests.unit import utils
+
+if sys.version_info >= (3, 6):
+    import asyncio
+
+    from subjectclient import aio
+    from subjectclient.tests.unit import fake_aio
+
+
+VERSIONS = {'versions': [
+    {'id': 'v1.0', 'status': 'SUPPORTED', 'version': '', 'min_version': '',
+     'links': [{'rel': 'self', 'href': 'http://subject/'}]},
+]}
+
+SUBJECTS = [{'id': '%08x' % i, 'name': 'subject-%d' % i} for i in range(5)]
+
+
+def _list_handler(method, url, headers, data):
+    query = parse.parse_qs(parse.urlsplit(url).query)
+    ids = [s['id'] for s in SUBJECTS]
+    start = 0
+    if 'marker' in query:
+        start = ids.index(query['marker'][0]) + 1
+    limit = int(query['limit'][0])
+    return 200, {}, {'subjects': SUBJECTS[start:start + limit]}
+
+
+@testtools.skipIf(sys.version_info < (3, 6),
+                  "the asyncio client requires python 3.6 or later")
+class AsyncClientTest(utils.TestCase):
+
+    def _get_client(self, handler, bypass_url='http://subject', **kwargs):
+        self.transport = fake_aio.FakeTransport(handler)
+        return aio.Client('1', 'user', 'password', 'project',
+                          bypass_url=bypass_url, auth_token='token',
+                          transport=self.transport, **kwargs)
+
+    def _run(self, coroutine):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        return loop.run_until_complete(coroutine)
+
+    def test_list_follows_markers(self):
+        cs = self._get_client(_list_handler)
+
+        async def list_all():
+            return [s.id async for s in cs.subjects.list(page_size=2)]
+
+        self.assertEqual([s['id'] for s in SUBJECTS], self._run(list_all()))
+        # NOTE: the third page is short, the listing ends with it.
+        self.assertEqual(3, len(self.transport.requests))
+        for method, url, headers, data in self.transport.requests:
+            self.assertEqual('GET', method)
+            self.assertEqual('token', headers['X-Auth-Token'])
+
+    def test_list_limit(self):
+        cs = self._get_client(_list_handler)
+
+        async def list_some():
+            return [s.id async for s in cs.subjects.list(limit=3)]
+
+        self.assertEqual([s['id'] for s in SUBJECTS[:3]],
+                         self._run(list_some()))
+        self.assertIn('limit=3', self.transport.requests[0][1])
+
+    def test_get(self):
+        cs = self._get_client(
+            lambda method, url, headers, data: (200, {},
+                                                {'subject': SUBJECTS[1]}))
+        subject = self._run(cs.subjects.get(SUBJECTS[1]['id']))
+        self.assertEqual('subject-1', subject.name)
+        self.assertEqual('http://subject/v1/subjects/%s' % SUBJECTS[1]['id'],
+                         self.transport.requests[0][1])
+
+    def test_get_not_found(self):
+        cs = self._get_client(
+            lambda method, url, headers, data: (
+                404, {}, {'itemNotFound': {'message': 'Not found',
+                                           'code': 404}}))
+        self.assertRaises(exceptions.NotFound, self._run,
+                          cs.subjects.get('missing'))
+
+    def test_data_skips_unsupported_range(self):
+        cs = self._get_client(
+            lambda method, url, headers, data: (
+                200, {'Content-Length': '10'}, b'0123456789'))
+
+        async def download():
+            data = await cs.subjects.data('id', chunk_size=4, byte_range=3)
+            return data.length, b''.join([chunk async for chunk in data])
+
+        self.assertEqual((7, b'3456789'), self._run(download()))
+        self.assertEqual('bytes=3-', self.transport.requests[0][2]['Range'])
+
+    def test_upload(self):
+        data = b'x' * 1000
+        checksum = hashlib.md5(data).hexdigest()
+        cs = self._get_client(
+            lambda method, url, headers, body: (
+                200, {'x-subject-meta-checksum': checksum}, {}))
+        digests = self._run(cs.subjects.upload('id', io.BytesIO(data)))
+        self.assertEqual(checksum, digests['md5'])
+        method, url, headers, body = self.transport.requests[0]
+        self.assertEqual('PUT', method)
+        self.assertEqual(data, body)
+
+    def test_upload_checksum_mismatch(self):
+        cs = self._get_client(
+            lambda method, url, headers, body: (
+                200, {'x-subject-meta-checksum': 'bad'}, {}))
+        self.assertRaises(exceptions.ChecksumMismatch, self._run,
+                          cs.subjects.upload('id', io.BytesIO(b'data')))
+
+    def test_close(self):
+        cs = self._get_client(_list_handler)
+        self._run(cs.close())
+        self.assertTrue(self.transport.closed)
+
+    def test_versions_get_current(self):
+        cs = self._get_client(
+            lambda method, url, headers, data: (200, {}, VERSIONS),
+            bypass_url='http://subject/v1')
+        version = self._run(cs.versions.get_current())
+        self.assertEqual('v1.0', version.id)
+        self.assertEqual([('GET', 'http://subject/v1')],
+                         [r[:2] for r in self.transport.requests])
+
+    def test_discover_version_cached(self):
+        cache = version_cache.VersionCache()
+        for i in range(2):
+            cs = self._get_client(
+                lambda method, url, headers, data: (200, {}, VERSIONS),
+                bypass_url='http://subject/v1', version_cache=cache)
+            version = self._run(aio.discover_version(
+                cs, api_versions.APIVersion('1.0')))
+            self.assertEqual(api_versions.APIVersion('1.0'), version)
+        # The second client found the version in the cache.
+        self.assertEqual([], self.transport.requests)
+
+    def test_hedging_policy_not_supported(self):
+        self.assertRaises(TypeError, self._get_client, _list_handler,
+                          hedging_policy=hedging.HedgingPolicy())
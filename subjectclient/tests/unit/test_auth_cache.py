@@ -0,0 +1,32 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+import fixtures
+
+from subjectclient import auth_cache
+from subjectclient.tests.unit import utils
+
+
+class TokenCacheTest(utils.TestCase):
+
+    def test_margin(self):
+        cache = auth_cache.TokenCache(
+            self.useFixture(fixtures.TempDir()).path, margin=60)
+        cache.set('soon', {'expires_at': time.time() + 30})
+        cache.set('later', {'expires_at': time.time() + 120})
+        cache.set('never', {'expires_at': None})
+        self.assertIsNone(cache.get('soon'))
+        self.assertIn('soon', cache)
+        self.assertIsNotNone(cache.get('later'))
+        self.assertIsNotNone(cache.get('never'))
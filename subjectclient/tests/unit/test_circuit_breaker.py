@@ -0,0 +1,89 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import fixtures
+
+from subjectclient import circuit_breaker
+from subjectclient import exceptions
+from subjectclient.tests.unit import utils
+
+URL = 'http://subject/v1/subjects'
+
+
+class CircuitBreakerTest(utils.TestCase):
+
+    def setUp(self):
+        super(CircuitBreakerTest, self).setUp()
+        self.now = 1000.0
+        self.useFixture(fixtures.MockPatch(
+            'time.time', side_effect=lambda: self.now))
+        self.breaker = circuit_breaker.CircuitBreaker(failure_threshold=2,
+                                                      reset_timeout=30)
+
+    def _fail(self):
+        def request():
+            with self.breaker.guard(URL):
+                raise exceptions.ClientException(503)
+        self.assertRaises(exceptions.ClientException, request)
+
+    def _half_open(self):
+        self._fail()
+        self._fail()
+        self.assertEqual(circuit_breaker.OPEN,
+                         self.breaker.get_state(URL)['state'])
+        self.now += 31
+
+    def test_opens_after_threshold(self):
+        self._half_open()
+        self.now -= 31
+
+        def request():
+            with self.breaker.guard(URL):
+                pass
+        self.assertRaises(exceptions.CircuitOpen, request)
+
+    def test_probe_success_closes(self):
+        self._half_open()
+        with self.breaker.guard(URL):
+            pass
+        self.assertEqual(circuit_breaker.CLOSED,
+                         self.breaker.get_state(URL)['state'])
+
+    def test_interrupted_probe_frees_slot(self):
+        self._half_open()
+
+        def interrupted():
+            with self.breaker.guard(URL):
+                raise KeyboardInterrupt()
+        self.assertRaises(KeyboardInterrupt, interrupted)
+        # Neither a success nor a failure, the circuit is still probed.
+        state = self.breaker.get_state(URL)
+        self.assertEqual(circuit_breaker.HALF_OPEN, state['state'])
+        self.assertEqual(2, state['failures'])
+        with self.breaker.guard(URL):
+            pass
+        self.assertEqual(circuit_breaker.CLOSED,
+                         self.breaker.get_state(URL)['state'])
+
+    def test_closed_generator_frees_slot(self):
+        self._half_open()
+
+        def stream():
+            with self.breaker.guard(URL):
+                yield
+        chunks = stream()
+        next(chunks)
+        chunks.close()
+        with self.breaker.guard(URL):
+            pass
+        self.assertEqual(circuit_breaker.CLOSED,
+                         self.breaker.get_state(URL)['state'])
@@ -0,0 +1,450 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import threading
+import time
+
+import fixtures
+from requests_mock.contrib import fixture as requests_mock_fixture
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+
+from subjectclient import client
+from subjectclient.tests.unit import utils
+
+AUTH_URL = 'http://keystone/v1.0'
+SUBJECT_URL = 'http://subject'
+
+
+def _token(token_id, expires='2099-01-01T00:00:00Z', url=SUBJECT_URL):
+    return {'access': {
+        'token': {'id': token_id, 'expires': expires,
+                  'tenant': {'id': 'project'}},
+        'serviceCatalog': [{'type': 'subject', 'name': 'subject',
+                            'endpoints': [{'publicURL': url}]}],
+    }}
+
+
+class HTTPClientTest(utils.TestCase):
+
+    def setUp(self):
+        super(HTTPClientTest, self).setUp()
+        self.requests = self.useFixture(requests_mock_fixture.Fixture())
+
+    def _get_client(self, **kwargs):
+        return client.HTTPClient('user', 'password', 'project',
+                                 auth_url=AUTH_URL, auth_token='stale',
+                                 bypass_url=SUBJECT_URL,
+                                 service_type='subject',
+                                 **kwargs)
+
+    def _count(self, method, url):
+        return len([r for r in self.requests.request_history
+                    if r.method == method and r.url == url])
+
+    def test_reauthenticate_once_for_all_threads(self):
+        threads = 8
+        # NOTE: requests_mock answers one request at a time, the rejections
+        # have to come from a server answering them concurrently.
+        server = _SubjectServer(threading.Barrier(threads))
+        self.addCleanup(server.stop)
+        self.requests.real_http = True
+        self.requests.post(AUTH_URL + '/tokens', json=_token('new'))
+        cs = client.HTTPClient('user', 'password', 'project',
+                               auth_url=AUTH_URL, auth_token='stale',
+                               bypass_url=server.url, service_type='subject',
+                               thread_safe=True)
+
+        errors = []
+
+        def list_subjects():
+            try:
+                cs.get('/v1/subjects')
+            except Exception as e:
+                errors.append(e)
+
+        workers = [threading.Thread(target=list_subjects)
+                   for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual([], errors)
+        self.assertEqual(1, self._count('POST', AUTH_URL + '/tokens'))
+        self.assertEqual('new', cs.auth_token)
+        self.assertEqual(['stale'] * threads + ['new'] * threads,
+                         sorted(server.tokens, reverse=True))
+
+    def test_stale_token_kept_while_authenticating(self):
+        seen = []
+
+        def authenticate(request, context):
+            # The other requests keep sending the stale token to the same
+            # URL meanwhile.
+            seen.append((cs.auth_token, cs.management_url))
+            return _token('new')
+
+        self.requests.get(SUBJECT_URL + '/v1/subjects', [
+            {'status_code': 401, 'json': {'unauthorized': {
+                'message': 'Expired', 'code': 401}}},
+            {'json': {'subjects': []}}])
+        self.requests.post(AUTH_URL + '/tokens', json=authenticate)
+        cs = self._get_client()
+        cs.get('/v1/subjects')
+        self.assertEqual([('stale', SUBJECT_URL)], seen)
+        self.assertEqual('new', cs.auth_token)
+        body = self.requests.request_history[1].json()
+        self.assertIn('passwordCredentials', body['auth'])
+
+    def test_services_url_follow_catalog(self):
+        moved = 'http://moved'
+        self.requests.post(AUTH_URL + '/tokens', [
+            {'json': _token('old', url=SUBJECT_URL + '/')},
+            {'json': _token('new', url=moved)}])
+        cs = client.HTTPClient('user', 'password', 'project',
+                               auth_url=AUTH_URL, service_type='subject')
+        cs.authenticate()
+        self.assertEqual({'subject': SUBJECT_URL}, cs.services_url)
+        self.assertEqual(SUBJECT_URL, cs.management_url)
+        # NOTE: the URLs looked up in the previous catalog are forgotten
+        # with it.
+        cs._reauthenticate('old')
+        self.assertEqual({'subject': moved}, cs.services_url)
+        self.assertEqual(moved, cs.management_url)
+
+
+def _expires_in(seconds):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ',
+                         time.gmtime(time.time() + seconds))
+
+
+class _Later(object):
+    """Time running `offset` seconds ahead."""
+
+    def __init__(self, offset):
+        self.offset = offset
+
+    def time(self):
+        return time.time() + self.offset
+
+
+class TokenRefreshTest(utils.TestCase):
+
+    def setUp(self):
+        super(TokenRefreshTest, self).setUp()
+        self.requests = self.useFixture(requests_mock_fixture.Fixture())
+        self.requests.get(SUBJECT_URL + '/v1/subjects',
+                          json={'subjects': []})
+
+    def _get_client(self, auth_url=AUTH_URL, **kwargs):
+        return client.HTTPClient('user', 'password', 'project',
+                                 auth_url=auth_url, service_type='subject',
+                                 thread_safe=True, **kwargs)
+
+    def _wait_refresh(self, cs):
+        thread = cs._refresh_thread
+        if thread is not None:
+            thread.join(5)
+
+    def _tokens_sent(self):
+        return [r.headers['X-Auth-Token']
+                for r in self.requests.request_history
+                if r.url == SUBJECT_URL + '/v1/subjects']
+
+    def _authentications(self):
+        return [r.json() for r in self.requests.request_history
+                if r.url == AUTH_URL + '/tokens']
+
+    def test_refresh_before_expiry(self):
+        released = threading.Event()
+        # NOTE: requests_mock answers one request at a time, the refresh is
+        # held by a server answering it concurrently.
+        server = _AuthServer([_token('old', _expires_in(30)),
+                              _token('new')], released)
+        self.addCleanup(server.stop)
+        self.requests.real_http = True
+        cs = self._get_client(token_refresh_margin=60,
+                              auth_url=server.url)
+        cs.get('/v1/subjects')
+        # The request which started the refresh didn't wait for it.
+        self.assertEqual(['old'], self._tokens_sent())
+        released.set()
+        self._wait_refresh(cs)
+        cs.get('/v1/subjects')
+        self.assertEqual(['old', 'new'], self._tokens_sent())
+        self.assertEqual('new', cs.auth_token)
+        self.assertEqual(2, len(server.bodies))
+        self.assertIn('passwordCredentials', server.bodies[1]['auth'])
+
+    def test_no_refresh_outside_margin(self):
+        self.requests.post(AUTH_URL + '/tokens',
+                           json=_token('old', _expires_in(3600)))
+        cs = self._get_client(token_refresh_margin=60)
+        cs.get('/v1/subjects')
+        self.assertIsNone(cs._refresh_thread)
+        cs.get('/v1/subjects')
+        self.assertEqual(['old', 'old'], self._tokens_sent())
+        self.assertEqual(1, len(self._authentications()))
+
+    def test_no_refresh_by_default(self):
+        self.requests.post(AUTH_URL + '/tokens',
+                           json=_token('old', _expires_in(30)))
+        cs = self._get_client()
+        cs.get('/v1/subjects')
+        self.assertIsNone(cs._refresh_thread)
+        self.assertEqual(1, len(self._authentications()))
+
+    def test_no_refresh_without_credentials(self):
+        self.requests.post(AUTH_URL + '/tokens',
+                           json=_token('old', _expires_in(30)))
+        cs = client.HTTPClient('user', None, 'project', auth_url=AUTH_URL,
+                               auth_token='token', service_type='subject',
+                               token_refresh_margin=60)
+        cs.get('/v1/subjects')
+        self.assertIsNone(cs._refresh_thread)
+        self.assertEqual(1, len(self._authentications()))
+
+    def test_refresh_failure_retried_later(self):
+        self.requests.post(AUTH_URL + '/tokens', [
+            {'json': _token('old', _expires_in(30))},
+            {'status_code': 500, 'json': {}},
+            {'json': _token('new')}])
+        cs = self._get_client(token_refresh_margin=60)
+        cs.get('/v1/subjects')
+        self._wait_refresh(cs)
+        cs.get('/v1/subjects')
+        self.assertIsNone(cs._refresh_thread)
+        self.assertEqual(2, len(self._authentications()))
+
+        self.useFixture(fixtures.MonkeyPatch(
+            'subjectclient.client.time',
+            _Later(client.TOKEN_REFRESH_RETRY_DELAY)))
+        cs.get('/v1/subjects')
+        self._wait_refresh(cs)
+        cs.get('/v1/subjects')
+        self.assertEqual(['old', 'old'], self._tokens_sent()[:2])
+        self.assertEqual('new', self._tokens_sent()[-1])
+        self.assertEqual(3, len(self._authentications()))
+
+
+class ConnectionPoolTest(utils.TestCase):
+
+    def _serve(self, **kwargs):
+        server = _PoolServer(**kwargs)
+        self.addCleanup(server.stop)
+        return server
+
+    def _get_client(self, **kwargs):
+        return client.HTTPClient('user', 'password', 'project',
+                                 auth_url=AUTH_URL, auth_token='token',
+                                 service_type='subject',
+                                 connection_pool=True, thread_safe=True,
+                                 **kwargs)
+
+    def _get_concurrently(self, cs, url, threads):
+        workers = [threading.Thread(target=cs.request, args=(url, 'GET'))
+                   for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def test_connections_reused(self):
+        server = self._serve()
+        cs = self._get_client()
+        for i in range(3):
+            cs.request(server.url + '/v1/subjects', 'GET')
+        stats = cs.get_pool_stats()
+        self.assertEqual(3, stats['requests'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(2, stats['hits'])
+
+    def test_pool_maxsize(self):
+        threads = 3
+        server = self._serve(barrier=threading.Barrier(threads))
+        cs = self._get_client(pool_maxsize=threads)
+        self._get_concurrently(cs, server.url + '/v1/subjects', threads)
+        stats = cs.get_pool_stats()
+        self.assertEqual(threads, stats['misses'])
+        self.assertEqual(0, stats['discarded'])
+
+    def test_pool_full_discards(self):
+        threads = 3
+        server = self._serve(barrier=threading.Barrier(threads))
+        cs = self._get_client(pool_maxsize=1)
+        self._get_concurrently(cs, server.url + '/v1/subjects', threads)
+        stats = cs.get_pool_stats()
+        self.assertEqual(threads, stats['misses'])
+        self.assertEqual(threads - 1, stats['discarded'])
+
+    def test_pool_block_waits(self):
+        server = self._serve(delay=0.1)
+        cs = self._get_client(pool_maxsize=1, pool_block=True)
+        self._get_concurrently(cs, server.url + '/v1/subjects', 3)
+        stats = cs.get_pool_stats()
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(2, stats['waits'])
+        self.assertGreater(stats['wait_time'], 0)
+        self.assertEqual(3, len(server.paths))
+
+    def test_sessions_kept_per_host(self):
+        first = self._serve()
+        second = self._serve()
+        cs = self._get_client()
+        session = cs._get_session(first.url)
+        for url in (first.url, second.url, first.url, second.url):
+            cs.request(url + '/v1/subjects', 'GET')
+        # NOTE: switching to another host keeps the session of the first
+        # one, and its connection.
+        self.assertIs(session, cs._get_session(first.url))
+        self.assertIsNot(session, cs._get_session(second.url))
+        stats = cs.get_pool_stats()
+        self.assertEqual(2, stats['misses'])
+        self.assertEqual(2, stats['hits'])
+
+    def test_no_stats_without_pool(self):
+        cs = client.HTTPClient('user', 'password', 'project',
+                               auth_url=AUTH_URL, service_type='subject')
+        self.assertIsNone(cs.get_pool_stats())
+
+
+class _AuthServer(object):
+    """Local identity server handing out `tokens` in turn, the ones after
+    the first once `released` is set.
+    """
+
+    def __init__(self, tokens, released):
+        self.bodies = []
+        bodies = self.bodies
+        tokens = list(tokens)
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers['Content-Length'])
+                bodies.append(json.loads(self.rfile.read(length)))
+                if len(bodies) > 1:
+                    released.wait(5)
+                data = json.dumps(tokens.pop(0)).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        class Server(socketserver.ThreadingMixIn,
+                     BaseHTTPServer.HTTPServer):
+            daemon_threads = True
+
+        self._server = Server(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:%d/v1.0' % self._server.server_port
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        args=(0.01,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _PoolServer(object):
+    """Local server keeping its connections alive, answering the requests
+    once `barrier` is passed by as many of them or after `delay` seconds.
+    """
+
+    def __init__(self, barrier=None, delay=None):
+        self.paths = []
+        paths = self.paths
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                paths.append(self.path)
+                if barrier is not None:
+                    barrier.wait(5)
+                if delay:
+                    time.sleep(delay)
+                data = json.dumps({'subjects': []}).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        class Server(socketserver.ThreadingMixIn,
+                     BaseHTTPServer.HTTPServer):
+            daemon_threads = True
+
+        self._server = Server(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:%d' % self._server.server_port
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        args=(0.01,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _SubjectServer(object):
+    """Local server rejecting the stale token once `rejected` is passed by
+    all of the requests, accepting the new one.
+    """
+
+    def __init__(self, rejected):
+        self.tokens = []
+        tokens = self.tokens
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                token = self.headers['X-Auth-Token']
+                tokens.append(token)
+                if token == 'new':
+                    status, body = 200, {'subjects': []}
+                else:
+                    rejected.wait(5)
+                    status, body = 401, {'unauthorized': {
+                        'message': 'Expired', 'code': 401}}
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        class Server(socketserver.ThreadingMixIn,
+                     BaseHTTPServer.HTTPServer):
+            daemon_threads = True
+
+        self._server = Server(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:%d' % self._server.server_port
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
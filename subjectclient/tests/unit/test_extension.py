@@ -0,0 +1,208 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import sys
+
+import fixtures
+
+from subjectclient import api_versions
+from subjectclient import client
+from subjectclient import extension
+from subjectclient.tests.unit import utils as test_utils
+from subjectclient import utils
+
+try:
+    from importlib import metadata as importlib_metadata
+except ImportError:
+    import importlib_metadata
+
+GROUP = 'subjectclient.extension'
+
+EXTENSION_SOURCE = '''
+from subjectclient import base
+
+
+class FakeManager(base.Manager):
+    pass
+
+
+def do_fake_list(cs, args):
+    pass
+'''
+
+
+class ExtensionManifestTest(test_utils.TestCase):
+
+    def setUp(self):
+        super(ExtensionManifestTest, self).setUp()
+        tmp = self.useFixture(fixtures.TempDir()).path
+        self.contrib = os.path.join(tmp, 'contrib')
+        os.mkdir(self.contrib)
+        self.module = os.path.join(self.contrib, 'fake.py')
+        with open(self.module, 'w') as f:
+            f.write('')
+        self.version = api_versions.APIVersion('1.0')
+        self.infos = [{'name': 'fake', 'commands': ['fake-list'],
+                       'hooks': False, 'manager': False,
+                       'path': self.module,
+                       'mtime': os.stat(self.module).st_mtime}]
+        self.path = os.path.join(tmp, 'manifests')
+
+    def test_saved_for_next_process(self):
+        extension.ExtensionManifest(self.path).set(
+            self.version, self.infos, [self.contrib])
+        manifest = extension.ExtensionManifest(self.path)
+        self.assertEqual(self.infos,
+                         manifest.get(self.version, [self.contrib]))
+        self.assertIsNone(manifest.get(api_versions.APIVersion('1.1'),
+                                       [self.contrib]))
+
+    def test_changed_extension(self):
+        manifest = extension.ExtensionManifest(self.path)
+        manifest.set(self.version, self.infos, [self.contrib])
+        mtime = self.infos[0]['mtime']
+        os.utime(self.module, (mtime + 10, mtime + 10))
+        self.assertIsNone(manifest.get(self.version, [self.contrib]))
+
+
+def _entry_point(name, value, group=GROUP):
+    return importlib_metadata.EntryPoint(name=name, value=value, group=group)
+
+
+class EntryPointTest(test_utils.TestCase):
+
+    def _set_entry_points(self, *entry_points):
+        grouped = {}
+        for ep in entry_points:
+            grouped.setdefault(ep.group, []).append(ep)
+        self.useFixture(fixtures.MonkeyPatch(
+            'subjectclient.utils._entry_points', grouped))
+
+    def test_read_once(self):
+        self.useFixture(fixtures.MonkeyPatch(
+            'subjectclient.utils._entry_points', None))
+        read = []
+        distributions = importlib_metadata.distributions
+
+        def count():
+            read.append(True)
+            return distributions()
+
+        self.useFixture(fixtures.MonkeyPatch(
+            'subjectclient.utils.importlib_metadata.distributions', count))
+        utils.iter_entry_points(GROUP)
+        utils.iter_entry_points('subjectclient.auth_plugin')
+        self.assertEqual(1, len(read))
+
+    def test_iter_entry_points(self):
+        first = _entry_point('first', 'os.path')
+        second = _entry_point('second', 'os.path:join')
+        self._set_entry_points(first, second,
+                               _entry_point('other', 'os', group='other'))
+        self.assertEqual([first, second], utils.iter_entry_points(GROUP))
+        self.assertEqual([second],
+                         utils.iter_entry_points(GROUP, name='second'))
+        self.assertEqual([], utils.iter_entry_points('missing'))
+
+    def test_get_entry_point_target(self):
+        self.assertEqual('os.path', utils.get_entry_point_target(
+            _entry_point('path', 'os.path')))
+        self.assertEqual('os.path:join', utils.get_entry_point_target(
+            _entry_point('join', 'os.path : join')))
+
+    def test_load_entry_point_skips_broken(self):
+        self._set_entry_points(
+            _entry_point('join', 'subjectclient_missing_module:join'),
+            _entry_point('join', 'os.path:missing_attr'),
+            _entry_point('join', 'os.path:join'))
+        self.assertIs(os.path.join, utils.load_entry_point(GROUP, 'join'))
+        self.assertIsNone(utils.load_entry_point(GROUP, 'missing'))
+
+
+class DiscoverExtensionsTest(test_utils.TestCase):
+
+    def setUp(self):
+        super(DiscoverExtensionsTest, self).setUp()
+        tmp = self.useFixture(fixtures.TempDir()).path
+        self.contrib = os.path.join(tmp, 'contrib')
+        os.mkdir(self.contrib)
+        self.useFixture(fixtures.MonkeyPatch(
+            'subjectclient.client._get_contrib_path',
+            lambda version: self.contrib))
+        # NOTE: the module of the entry point is importable from `tmp`.
+        packages = os.path.join(tmp, 'packages')
+        os.mkdir(packages)
+        self._write(os.path.join(packages, 'subjectclient_fake_ep.py'))
+        self.useFixture(fixtures.MonkeyPatch('sys.path',
+                                             [packages] + sys.path))
+        self.useFixture(fixtures.MonkeyPatch(
+            'subjectclient.utils._entry_points',
+            {GROUP: [_entry_point('fake_ep', 'subjectclient_fake_ep')]}))
+        for name in ('subjectclient_fake_ep', 'fake_contrib'):
+            self.addCleanup(sys.modules.pop, name, None)
+        self.version = api_versions.APIVersion('1.0')
+
+    def _write(self, path, source=EXTENSION_SOURCE):
+        with open(path, 'w') as f:
+            f.write(source)
+
+    def _by_name(self, extensions):
+        return dict((e.name, e) for e in extensions)
+
+    def test_entry_point(self):
+        extensions = self._by_name(client.discover_extensions(self.version))
+        fake = extensions['fake_ep']
+        self.assertIs(sys.modules['subjectclient_fake_ep'], fake.module)
+        self.assertEqual('FakeManager', fake.manager_class.__name__)
+        self.assertEqual(['fake-list'], fake.commands)
+
+    def test_contrib(self):
+        self._write(os.path.join(self.contrib, 'fake_contrib.py'))
+        self._write(os.path.join(self.contrib, '__init__.py'), '')
+        extensions = self._by_name(
+            client.discover_extensions(self.version, only_contrib=True))
+        self.assertEqual(['fake_contrib'], list(extensions))
+        fake = extensions['fake_contrib']
+        # Loaded from its source file like an imported module.
+        self.assertIs(sys.modules['fake_contrib'], fake.module)
+        self.assertEqual(os.path.join(self.contrib, 'fake_contrib.py'),
+                         fake.module.__file__)
+        self.assertEqual('FakeManager', fake.manager_class.__name__)
+
+    def test_contrib_broken(self):
+        self._write(os.path.join(self.contrib, 'fake_contrib.py'),
+                    'raise ImportError("broken")')
+        self.assertRaises(ImportError, client.discover_extensions,
+                          self.version, only_contrib=True)
+        self.assertNotIn('fake_contrib', sys.modules)
+
+    def test_manifest_loads_lazily(self):
+        self._write(os.path.join(self.contrib, 'fake_contrib.py'))
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'manifests')
+        client.discover_extensions(self.version,
+                                   manifest=extension.ExtensionManifest(path))
+        for name in ('subjectclient_fake_ep', 'fake_contrib'):
+            del sys.modules[name]
+
+        extensions = self._by_name(client.discover_extensions(
+            self.version, manifest=extension.ExtensionManifest(path)))
+        for name, module in (('fake_ep', 'subjectclient_fake_ep'),
+                             ('fake_contrib', 'fake_contrib')):
+            self.assertFalse(extensions[name].loaded)
+            self.assertEqual(['fake-list'], extensions[name].commands)
+            self.assertNotIn(module, sys.modules)
+            # NOTE: the module is imported for its manager.
+            self.assertEqual('FakeManager',
+                             extensions[name].manager_class.__name__)
+            self.assertIs(sys.modules[module], extensions[name].module)
@@ -0,0 +1,198 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import logging
+import threading
+
+from concurrent import futures
+import fixtures
+from keystoneauth1 import session
+from keystoneauth1 import token_endpoint
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+
+from subjectclient import client
+from subjectclient import hedging
+from subjectclient.tests.unit import utils
+
+URL = 'http://primary/v1/subjects'
+
+
+class HedgingPolicyTest(utils.TestCase):
+
+    def _get_policy(self):
+        policy = hedging.HedgingPolicy(min_samples=2,
+                                       alternate_urls=['http://alternate'])
+        for i in range(2):
+            policy.latencies.append(('GET', 0.0, 0.01))
+        return policy
+
+    def _send(self, url):
+        if url.startswith('http://primary'):
+            # NOTE: the original request only answers once the test is
+            # over, not to keep a thread busy.
+            self.released.wait(5)
+            return 'primary'
+        return 'alternate'
+
+    def setUp(self):
+        super(HedgingPolicyTest, self).setUp()
+        self.released = threading.Event()
+        self.addCleanup(self.released.set)
+
+    def test_not_hedged_without_samples(self):
+        policy = hedging.HedgingPolicy(min_samples=2)
+        self.assertEqual('primary', policy.call(lambda url: 'primary', URL))
+        self.assertEqual({'requests': 1, 'hedged': 0, 'hedge_wins': 0},
+                         policy.get_stats())
+
+    def test_slow_request_hedged(self):
+        policy = self._get_policy()
+        self.assertEqual('alternate', policy.call(self._send, URL))
+        self.assertEqual({'requests': 1, 'hedged': 1, 'hedge_wins': 1},
+                         policy.get_stats())
+
+    def test_policies_share_threads(self):
+        for i in range(3):
+            self.assertEqual('alternate',
+                             self._get_policy().call(self._send, URL))
+        self.assertIs(hedging._get_executor(), hedging._get_executor())
+        self.assertFalse(hasattr(self._get_policy(), '_executor'))
+
+    def test_loser_response_closed(self):
+        closed = threading.Event()
+
+        class Response(object):
+            def close(self):
+                closed.set()
+
+        def send(url):
+            if url.startswith('http://primary'):
+                self.released.wait(5)
+                return Response(), None
+            return 'alternate', None
+
+        policy = self._get_policy()
+        self.assertEqual(('alternate', None), policy.call(send, URL))
+        self.assertFalse(closed.is_set())
+        self.released.set()
+        self.assertTrue(closed.wait(5))
+
+    def test_delay_runs_from_request_start(self):
+        # NOTE: a single thread, busy for a while with another request.
+        executor = futures.ThreadPoolExecutor(1)
+        self.addCleanup(executor.shutdown)
+        self.useFixture(fixtures.MonkeyPatch(
+            'subjectclient.hedging._executor', executor))
+        busy = threading.Event()
+        executor.submit(busy.wait, 5)
+        timer = threading.Timer(0.2, busy.set)
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        policy = self._get_policy()
+        self.assertEqual('primary', policy.call(lambda url: 'primary', URL))
+        self.assertEqual({'requests': 1, 'hedged': 0, 'hedge_wins': 0},
+                         policy.get_stats())
+
+
+class _Server(object):
+    """Local server answering with `request_id`, once `released` is set."""
+
+    def __init__(self, request_id, released=None):
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if released is not None:
+                    released.wait(5)
+                data = json.dumps({'subjects': []}).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.send_header('X-OpenStack-Request-ID', request_id)
+                self.end_headers()
+                self.wfile.write(data)
+
+        class Server(socketserver.ThreadingMixIn,
+                     BaseHTTPServer.HTTPServer):
+            daemon_threads = True
+
+        self._server = Server(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:%d' % self._server.server_port
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        args=(0.01,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class HedgedClientTest(utils.TestCase):
+    """The client only records the request id and the timing of the
+    response used.
+    """
+
+    def setUp(self):
+        super(HedgedClientTest, self).setUp()
+        released = threading.Event()
+        self.addCleanup(released.set)
+        self.primary = _Server('req-primary', released)
+        self.addCleanup(self.primary.stop)
+        self.alternate = _Server('req-alternate')
+        self.addCleanup(self.alternate.stop)
+        self.policy = hedging.HedgingPolicy(
+            min_samples=2, alternate_urls=[self.alternate.url])
+        for i in range(2):
+            self.policy.latencies.append(('GET', 0.0, 0.01))
+
+        self.executor = futures.ThreadPoolExecutor(4)
+        self.useFixture(fixtures.MonkeyPatch(
+            'subjectclient.hedging._executor', self.executor))
+
+        def finish():
+            # NOTE: let the original request complete, as if it had been
+            # slow, before looking at the client.
+            released.set()
+            self.executor.shutdown(wait=True)
+
+        self.finish = finish
+
+    def test_http_client(self):
+        cs = client.HTTPClient('user', 'password', 'project',
+                               auth_url='http://keystone/v1.0',
+                               auth_token='token',
+                               bypass_url=self.primary.url,
+                               service_type='subject', timings=True,
+                               hedging_policy=self.policy)
+        cs.get('/v1/subjects')
+        self.finish()
+        self.assertEqual('req-alternate', cs.last_request_id)
+        self.assertEqual(1, len(cs.get_timings()))
+        self.assertEqual(1, self.policy.get_stats()['hedge_wins'])
+
+    def test_session_client(self):
+        sess = session.Session(auth=token_endpoint.Token(self.primary.url,
+                                                         'token'))
+        cs = client.SessionClient(session=sess, service_type='subject',
+                                  timings=True, hedging_policy=self.policy,
+                                  logger=logging.getLogger(__name__))
+        cs.get('/v1/subjects')
+        self.finish()
+        self.assertEqual(1, len(cs.get_timings()))
+        self.assertEqual(1, self.policy.get_stats()['hedge_wins'])
@@ -0,0 +1,229 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+import json
+import os
+import socket
+import ssl
+import threading
+
+import requests
+import testtools
+
+from subjectclient import http2
+from subjectclient.tests.unit import utils
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import httpx
+except ImportError:
+    httpx = None
+
+# NOTE: self-signed certificate of localhost and 127.0.0.1.
+VAR_DIR = os.path.join(os.path.dirname(__file__), 'var')
+CERT_FILE = os.path.join(VAR_DIR, 'certificate.crt')
+KEY_FILE = os.path.join(VAR_DIR, 'privatekey.key')
+
+
+@testtools.skipIf(httpx is None, "httpx is required by the HTTP/2 transport")
+class HTTP2AdapterTest(utils.TestCase):
+
+    def _get_session(self, handler):
+        self.requests = []
+
+        def record(request):
+            self.requests.append((request.method, str(request.url),
+                                  request.read()))
+            return handler(request)
+
+        adapter = http2.HTTP2Adapter(transport=httpx.MockTransport(record))
+        self.addCleanup(adapter.close)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        return session
+
+    def test_get(self):
+        session = self._get_session(
+            lambda request: httpx.Response(200, json={'subjects': []}))
+        resp = session.get('http://subject/v1/subjects')
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual({'subjects': []}, resp.json())
+        self.assertEqual('application/json', resp.headers['content-type'])
+
+    def test_streamed_upload_and_download(self):
+        session = self._get_session(
+            lambda request: httpx.Response(200, content=request.read()))
+        data = b'x' * 100000
+
+        def chunks():
+            view = memoryview(data)
+            for start in range(0, len(data), 4096):
+                yield view[start:start + 4096]
+
+        resp = session.put('http://subject/v1/images/id/file',
+                           data=chunks(), stream=True)
+        self.assertEqual(data, b''.join(resp.iter_content(1024)))
+        self.assertEqual(data, self.requests[0][2])
+
+    def test_file_upload(self):
+        session = self._get_session(lambda request: httpx.Response(204))
+        session.put('http://subject/v1/images/id/file',
+                    data=io.BytesIO(b'data'))
+        self.assertEqual(b'data', self.requests[0][2])
+
+    def test_connection_error(self):
+        def refuse(request):
+            raise httpx.ConnectError('refused', request=request)
+
+        session = self._get_session(refuse)
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          session.get, 'http://subject/v1/subjects')
+
+    def test_timeout(self):
+        def time_out(request):
+            raise httpx.ReadTimeout('timed out', request=request)
+
+        session = self._get_session(time_out)
+        self.assertRaises(requests.exceptions.Timeout,
+                          session.get, 'http://subject/v1/subjects')
+
+
+class _TLSServer(object):
+    """Local TLS server offering the `protocols` during ALPN negotiation.
+
+    Requests are answered with the JSON of the path and of the protocol
+    they were received with, over HTTP/2 or HTTP/1.1.
+    """
+
+    def __init__(self, protocols):
+        self.protocols = []
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(CERT_FILE, KEY_FILE)
+        context.set_alpn_protocols(protocols)
+        self._context = context
+        self._sock = socket.socket()
+        self._sock.bind(('127.0.0.1', 0))
+        self._sock.listen(5)
+        self.url = 'https://127.0.0.1:%d' % self._sock.getsockname()[1]
+        thread = threading.Thread(target=self._serve)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self._sock.close()
+
+    def _serve(self):
+        while True:
+            try:
+                sock, addr = self._sock.accept()
+            except OSError:
+                return
+            thread = threading.Thread(target=self._handle, args=(sock,))
+            thread.daemon = True
+            thread.start()
+
+    def _handle(self, sock):
+        try:
+            sock = self._context.wrap_socket(sock, server_side=True)
+            protocol = sock.selected_alpn_protocol()
+            self.protocols.append(protocol)
+            if protocol == 'h2':
+                self._handle_h2(sock)
+            else:
+                self._handle_http1(sock)
+        except (OSError, ssl.SSLError):
+            pass
+        finally:
+            sock.close()
+
+    def _handle_h2(self, sock):
+        conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        sock.sendall(conn.data_to_send())
+        paths = {}
+        while True:
+            data = sock.recv(65535)
+            if not data:
+                return
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    paths[event.stream_id] = dict(event.headers)[b':path']
+                elif isinstance(event, h2.events.StreamEnded):
+                    body = self._body(paths.pop(event.stream_id), 'h2')
+                    conn.send_headers(event.stream_id, [
+                        (':status', '200'),
+                        ('content-type', 'application/json'),
+                        ('content-length', str(len(body)))])
+                    conn.send_data(event.stream_id, body, end_stream=True)
+            sock.sendall(conn.data_to_send())
+
+    def _handle_http1(self, sock):
+        request = b''
+        while b'\r\n\r\n' not in request:
+            data = sock.recv(65535)
+            if not data:
+                return
+            request += data
+        path = request.split(b' ')[1]
+        body = self._body(path, 'http/1.1')
+        sock.sendall(b'HTTP/1.1 200 OK\r\n'
+                     b'Content-Type: application/json\r\n'
+                     b'Content-Length: %d\r\n'
+                     b'Connection: close\r\n\r\n%s' % (len(body), body))
+
+    @staticmethod
+    def _body(path, protocol):
+        return json.dumps({'path': path.decode('ascii'),
+                           'protocol': protocol}).encode('utf-8')
+
+
+@testtools.skipIf(httpx is None, "httpx is required by the HTTP/2 transport")
+class HTTP2NegotiationTest(utils.TestCase):
+    """HTTP/2 negotiated with ALPN during the TLS handshake."""
+
+    def _get_session(self, server):
+        self.addCleanup(server.stop)
+        adapter = http2.HTTP2Adapter()
+        self.addCleanup(adapter.close)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        return session
+
+    def test_h2_negotiated(self):
+        server = _TLSServer(['h2', 'http/1.1'])
+        session = self._get_session(server)
+        for i in range(3):
+            resp = session.get(server.url + '/v1/subjects', verify=CERT_FILE)
+            self.assertEqual(200, resp.status_code)
+            self.assertEqual({'path': '/v1/subjects', 'protocol': 'h2'},
+                             resp.json())
+        # NOTE: the requests share a single connection.
+        self.assertEqual(['h2'], server.protocols)
+
+    def test_http1_fallback(self):
+        server = _TLSServer(['http/1.1'])
+        session = self._get_session(server)
+        resp = session.get(server.url + '/v1/subjects', verify=CERT_FILE)
+        self.assertEqual({'path': '/v1/subjects', 'protocol': 'http/1.1'},
+                         resp.json())
+        self.assertEqual(['http/1.1'], server.protocols)
+
+    def test_untrusted_certificate(self):
+        server = _TLSServer(['h2', 'http/1.1'])
+        session = self._get_session(server)
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          session.get, server.url + '/v1/subjects',
+                          verify=True)
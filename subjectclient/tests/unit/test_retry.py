@@ -0,0 +1,184 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+
+import fixtures
+import requests
+from requests_mock.contrib import fixture as requests_mock_fixture
+
+from subjectclient import client
+from subjectclient import exceptions
+from subjectclient import retry
+from subjectclient.tests.unit import utils
+
+SUBJECTS_URL = 'http://subject/v1/images'
+
+
+class FakeTime(object):
+    """Record the sleeps instead of sleeping."""
+
+    def __init__(self):
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+
+class RetryPolicyTest(utils.TestCase):
+
+    def setUp(self):
+        super(RetryPolicyTest, self).setUp()
+        # NOTE: take the longest backoff for the delays to be known.
+        self.useFixture(fixtures.MonkeyPatch('random.uniform',
+                                             lambda low, high: high))
+
+    def test_exponential_backoff(self):
+        policy = retry.RetryPolicy(retries=6, backoff=0.5, max_backoff=4)
+        error = exceptions.ClientException(500)
+        self.assertEqual([0.5, 1, 2, 4, 4, 4],
+                         [policy.next_delay('GET', error, attempt)
+                          for attempt in range(1, 7)])
+
+    def test_retries_exhausted(self):
+        policy = retry.RetryPolicy(retries=2)
+        error = exceptions.ClientException(503)
+        self.assertIsNotNone(policy.next_delay('GET', error, 2))
+        self.assertIsNone(policy.next_delay('GET', error, 3))
+
+    def test_retryable_errors(self):
+        policy = retry.RetryPolicy()
+        self.assertIsNotNone(policy.next_delay(
+            'GET', requests.exceptions.ConnectionError(), 1))
+        self.assertIsNotNone(policy.next_delay(
+            'DELETE', exceptions.ClientException(502), 1))
+        self.assertIsNone(policy.next_delay(
+            'GET', exceptions.NotFound(404), 1))
+        self.assertIsNone(policy.next_delay('GET', ValueError(), 1))
+
+    def test_non_idempotent_only_retried_when_rejected(self):
+        policy = retry.RetryPolicy()
+        self.assertIsNone(policy.next_delay(
+            'POST', exceptions.ClientException(503), 1))
+        self.assertIsNone(policy.next_delay(
+            'POST', requests.exceptions.ConnectionError(), 1))
+        self.assertIsNotNone(policy.next_delay(
+            'POST', exceptions.RateLimit(429), 1))
+        self.assertIsNotNone(policy.next_delay(
+            'POST', exceptions.OverLimit(413), 1))
+
+    def test_retry_after(self):
+        policy = retry.RetryPolicy(retries=5, backoff=0.5,
+                                   max_retry_after=10)
+        error = exceptions.ServiceUnavailable(503, retry_after='5')
+        self.assertEqual(5, policy.next_delay('GET', error, 1))
+        # NOTE: the backoff is kept when longer than the Retry-After.
+        self.assertEqual(8, policy.next_delay('GET', error, 5))
+
+    def test_retry_after_too_long(self):
+        policy = retry.RetryPolicy(max_retry_after=10, budget_reserve=1)
+        error = exceptions.RateLimit(429, retry_after='11')
+        self.assertIsNone(policy.next_delay('GET', error, 1))
+        # The refused retry didn't spend the budget.
+        self.assertIsNotNone(policy.next_delay(
+            'GET', exceptions.ClientException(500), 1))
+
+    def test_budget(self):
+        policy = retry.RetryPolicy(budget_ratio=0.5, budget_reserve=2)
+        error = exceptions.ClientException(500)
+        self.assertIsNotNone(policy.next_delay('GET', error, 1))
+        self.assertIsNotNone(policy.next_delay('GET', error, 1))
+        self.assertIsNone(policy.next_delay('GET', error, 1))
+        # NOTE: two requests earn one retry.
+        policy.request_sent()
+        self.assertIsNone(policy.next_delay('GET', error, 1))
+        policy.request_sent()
+        self.assertIsNotNone(policy.next_delay('GET', error, 1))
+        self.assertIsNone(policy.next_delay('GET', error, 1))
+
+    def test_budget_reserve_capped(self):
+        policy = retry.RetryPolicy(budget_ratio=1, budget_reserve=2)
+        for i in range(10):
+            policy.request_sent()
+        error = exceptions.ClientException(500)
+        delays = [policy.next_delay('GET', error, 1) for i in range(4)]
+        self.assertEqual([1, 1, None, None], [d and 1 for d in delays])
+
+    def test_is_replayable(self):
+        self.assertTrue(retry.is_replayable({'body': {'subject': {}}}))
+        self.assertFalse(retry.is_replayable({'data': io.BytesIO(b'x')}))
+        self.assertFalse(retry.is_replayable({'data': iter([b'x'])}))
+
+
+class ClientRetryTest(utils.TestCase):
+
+    def setUp(self):
+        super(ClientRetryTest, self).setUp()
+        self.requests = self.useFixture(requests_mock_fixture.Fixture())
+        self.time = FakeTime()
+        self.useFixture(fixtures.MonkeyPatch('subjectclient.retry.time',
+                                             self.time))
+        self.useFixture(fixtures.MonkeyPatch('random.uniform',
+                                             lambda low, high: high))
+
+    def _get_client(self, **kwargs):
+        return client.Client('1', 'user', 'password', 'project',
+                             bypass_url='http://subject', auth_token='token',
+                             retry_policy=retry.RetryPolicy(**kwargs))
+
+    def test_retried_until_success(self):
+        self.requests.get(SUBJECTS_URL, [
+            {'status_code': 503, 'json': {}},
+            {'status_code': 500, 'json': {}},
+            {'json': {'subjects': []}}])
+        cs = self._get_client(backoff=1)
+        self.assertEqual([], list(cs.subjects.list()))
+        self.assertEqual(3, self.requests.call_count)
+        self.assertEqual([1, 2], self.time.sleeps)
+
+    def test_retry_after_header(self):
+        self.requests.get(SUBJECTS_URL, [
+            {'status_code': 429, 'json': {},
+             'headers': {'Retry-After': '7'}},
+            {'json': {'subjects': []}}])
+        cs = self._get_client(backoff=1)
+        self.assertEqual([], list(cs.subjects.list()))
+        self.assertEqual([7], self.time.sleeps)
+
+    def test_gives_up_after_retries(self):
+        self.requests.get(SUBJECTS_URL, status_code=503, json={})
+        cs = self._get_client(retries=2)
+        self.assertRaises(exceptions.ClientException, list,
+                          cs.subjects.list())
+        self.assertEqual(3, self.requests.call_count)
+        self.assertEqual(2, len(self.time.sleeps))
+
+    def test_budget_shared_by_requests(self):
+        self.requests.get(SUBJECTS_URL, status_code=503, json={})
+        cs = self._get_client(retries=5, budget_ratio=0, budget_reserve=3)
+        self.assertRaises(exceptions.ClientException, list,
+                          cs.subjects.list())
+        self.assertEqual(4, self.requests.call_count)
+        # NOTE: the budget spent, the next request isn't retried.
+        self.assertRaises(exceptions.ClientException, list,
+                          cs.subjects.list())
+        self.assertEqual(5, self.requests.call_count)
+        self.assertEqual(3, len(self.time.sleeps))
+
+    def test_post_not_retried(self):
+        self.requests.post('http://subject/v1/subjects', status_code=503,
+                           json={})
+        cs = self._get_client()
+        self.assertRaises(exceptions.ClientException, cs.subjects.create,
+                          name='subject')
+        self.assertEqual(1, self.requests.call_count)
+        self.assertEqual([], self.time.sleeps)
@@ -0,0 +1,137 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import copy
+
+from subjectclient import exceptions
+from subjectclient import service_catalog
+from subjectclient.tests.unit import utils
+
+
+SERVICE_CATALOG = {
+    'access': {
+        'token': {'id': 'token', 'tenant': {'id': 'project'},
+                  'expires': '2099-01-01T00:00:00Z'},
+        'serviceCatalog': [
+            {'type': 'subject', 'name': 'subject',
+             'endpoints': [
+                 {'region': 'RegionOne',
+                  'publicURL': 'http://one/v1',
+                  'adminURL': 'http://admin.one/v1'},
+                 {'region': 'RegionTwo',
+                  'publicURL': 'http://two/v1',
+                  'adminURL': 'http://admin.two/v1'},
+                 {'region': 'RegionTwo', 'versionId': '1.0',
+                  'publicURL': 'http://two/v1.0'},
+             ]},
+            {'type': 'subject', 'name': 'subject-legacy',
+             'endpoints': [
+                 {'region': 'RegionOne',
+                  'publicURL': 'http://legacy.one/v1'},
+             ]},
+            {'type': 'volume', 'name': 'cinder',
+             'endpoints': [
+                 {'region': 'RegionOne',
+                  'publicURL': 'http://volume.one/v1'},
+             ]},
+        ],
+    },
+}
+
+
+class ServiceCatalogTest(utils.TestCase):
+
+    def setUp(self):
+        super(ServiceCatalogTest, self).setUp()
+        self.catalog = copy.deepcopy(SERVICE_CATALOG)
+        self.sc = service_catalog.ServiceCatalog(self.catalog)
+
+    def _url_for(self, region=None, **kwargs):
+        kwargs.setdefault('service_type', 'subject')
+        kwargs.setdefault('service_name', 'subject')
+        return self.sc.url_for(attr='region', filter_value=region, **kwargs)
+
+    def test_region(self):
+        self.assertEqual('http://one/v1', self._url_for('RegionOne'))
+        # NOTE: the 1.0 endpoint of RegionTwo is left out.
+        self.assertEqual('http://two/v1', self._url_for('RegionTwo'))
+
+    def test_region_case_insensitive(self):
+        self.assertEqual('http://two/v1', self._url_for('regiontwo'))
+
+    def test_endpoint_type(self):
+        self.assertEqual('http://admin.one/v1',
+                         self._url_for('RegionOne', endpoint_type='adminURL'))
+
+    def test_service_name(self):
+        self.assertEqual('http://legacy.one/v1',
+                         self._url_for('RegionOne',
+                                       service_name='subject-legacy'))
+
+    def test_volume_service_name(self):
+        self.assertEqual('http://volume.one/v1',
+                         self._url_for('RegionOne', service_type='volume',
+                                       volume_service_name='cinder'))
+
+    def test_ambiguous(self):
+        self.assertRaises(exceptions.AmbiguousEndpoints, self._url_for)
+        # Every subject service has an endpoint in RegionOne.
+        self.assertRaises(exceptions.AmbiguousEndpoints, self._url_for,
+                          'RegionOne', service_name=None)
+
+    def test_not_found(self):
+        self.assertRaises(exceptions.EndpointNotFound, self._url_for,
+                          'RegionThree')
+        self.assertRaises(exceptions.EndpointNotFound, self._url_for,
+                          'RegionOne', service_type='image')
+
+    def test_filter_other_attribute(self):
+        self.assertEqual('http://two/v1',
+                         self.sc.url_for(attr='publicURL',
+                                         filter_value='HTTP://TWO/V1',
+                                         service_type='subject',
+                                         service_name='subject'))
+
+    def test_no_service_catalog(self):
+        del self.catalog['access']['serviceCatalog']
+        self.assertIsNone(self._url_for('RegionOne'))
+
+    def test_lookups_cached(self):
+        found = []
+        find_endpoints = self.sc._find_endpoints
+
+        def count(*args):
+            found.append(args)
+            return find_endpoints(*args)
+
+        self.sc._find_endpoints = count
+        for i in range(3):
+            self._url_for('RegionOne')
+            self._url_for('RegionOne', endpoint_type='adminURL')
+        self._url_for('RegionTwo')
+        self.assertEqual(2, len(found))
+
+    def test_index_built_once(self):
+        self._url_for('RegionOne')
+        index = self.sc._index
+        self._url_for('RegionTwo', endpoint_type='adminURL')
+        self.assertIs(index, self.sc._index)
+
+    def test_catalog_unchanged(self):
+        self._url_for('RegionOne')
+        self._url_for('RegionTwo')
+        self.assertEqual(SERVICE_CATALOG, self.catalog)
+
+    def test_get_expires(self):
+        self.assertEqual(4070908800, self.sc.get_expires())
+        del self.catalog['access']['token']['expires']
+        self.assertIsNone(self.sc.get_expires())
@@ -0,0 +1,218 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import hashlib
+import io
+import os
+
+import fixtures
+import requests
+from requests_mock.contrib import fixture as requests_mock_fixture
+from urllib3 import exceptions as urllib3_exceptions
+
+from subjectclient import client
+from subjectclient import exceptions
+from subjectclient import shell
+from subjectclient.tests.unit import utils
+
+AUTH_URL = 'http://keystone/v3'
+SUBJECT_URL = 'http://subject'
+SUBJECT_ID = '11111111-1111-1111-1111-111111111111'
+DELETE_URL = '%s/v1/subjects/%s' % (SUBJECT_URL, SUBJECT_ID)
+DATA_URL = '%s/v1/images/%s/file' % (SUBJECT_URL, SUBJECT_ID)
+DATA = b''.join(b'%06d' % i for i in range(100000))
+
+TOKEN = {
+    'token': {
+        'methods': ['password'],
+        'expires_at': '2099-01-01T00:00:00.000000Z',
+        'project': {'id': 'project', 'name': 'project',
+                    'domain': {'id': 'default', 'name': 'Default'}},
+        'user': {'id': 'user', 'name': 'user',
+                 'domain': {'id': 'default', 'name': 'Default'}},
+        'roles': [],
+        'catalog': [{
+            'type': 'subject', 'name': 'subject', 'id': 'subject',
+            'endpoints': [{'id': interface, 'interface': interface,
+                           'region': 'RegionOne', 'url': SUBJECT_URL}
+                          for interface in ('public', 'internal', 'admin')],
+        }],
+    },
+}
+
+# NOTE: the endpoint of the session client describes its own version.
+VERSION = {'versions': {'id': 'v1.0', 'status': 'CURRENT', 'version': '',
+                        'min_version': '',
+                        'links': [{'rel': 'self', 'href': SUBJECT_URL}]}}
+
+
+class DroppedBody(io.RawIOBase):
+    """Response body whose connection drops after `size` bytes."""
+
+    def __init__(self, data, size):
+        self.data = data[:size]
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if not self.data:
+            raise urllib3_exceptions.ProtocolError('Connection broken')
+        n = min(len(b), len(self.data))
+        b[:n] = self.data[:n]
+        self.data = self.data[n:]
+        return n
+
+
+class ShellTest(utils.TestCase):
+
+    def setUp(self):
+        super(ShellTest, self).setUp()
+        for name in ('OS_USERNAME', 'OS_PASSWORD', 'OS_PROJECT_NAME',
+                     'OS_TENANT_NAME', 'OS_AUTH_URL', 'OS_AUTH_SYSTEM',
+                     'OS_SUBJECT_BYPASS_URL', 'OS_VOLUME_SERVICE_NAME'):
+            self.useFixture(fixtures.EnvironmentVariable(name))
+        self.requests = self.useFixture(requests_mock_fixture.Fixture())
+        self.requests.get(AUTH_URL, json={
+            'version': {'id': 'v3.0', 'status': 'stable',
+                        'links': [{'rel': 'self', 'href': AUTH_URL}]}})
+        self.requests.post(AUTH_URL + '/auth/tokens', json=TOKEN,
+                           headers={'X-Subject-Token': 'token'})
+        self.requests.get(SUBJECT_URL, json=VERSION)
+        self.requests.delete(DELETE_URL, status_code=204)
+
+    def _run(self, *argv):
+        shell.OpenStackComputeShell().main(
+            ['--os-username', 'user', '--os-password', 'password',
+             '--os-project-name', 'project', '--os-auth-url', AUTH_URL] +
+            list(argv))
+
+    def _count(self, method, url):
+        return len([r for r in self.requests.request_history
+                    if r.method == method and r.url == url])
+
+    def test_os_cache_with_session(self):
+        self._run('--os-cache', 'subject-delete', SUBJECT_ID)
+        self.assertEqual(1, self._count('DELETE', DELETE_URL))
+        self.assertEqual(1, self._count('POST', AUTH_URL + '/auth/tokens'))
+
+        # The token saved by the first run is used by the second one.
+        self._run('--os-cache', 'subject-delete', SUBJECT_ID)
+        self.assertEqual(2, self._count('DELETE', DELETE_URL))
+        self.assertEqual(1, self._count('POST', AUTH_URL + '/auth/tokens'))
+
+    def _count_clients(self):
+        clients = []
+        build = client.Client
+
+        def count(*args, **kwargs):
+            clients.append(build(*args, **kwargs))
+            return clients[-1]
+
+        self.useFixture(fixtures.MonkeyPatch('subjectclient.client.Client',
+                                             count))
+        return clients
+
+    def test_client_built_once(self):
+        clients = self._count_clients()
+        self._run('subject-delete', SUBJECT_ID)
+        # NOTE: the client which discovered the version sent the request.
+        self.assertEqual(1, len(clients))
+        self.assertEqual(1, self._count('GET', SUBJECT_URL + '/'))
+        self.assertEqual(1, self._count('POST', AUTH_URL + '/auth/tokens'))
+        self.assertEqual(1, self._count('DELETE', DELETE_URL))
+
+    def test_client_built_once_without_session(self):
+        auth_url = 'http://keystone/v1.0'
+        self.requests.post(auth_url + '/tokens', json={'access': {
+            'token': {'id': 'token', 'tenant': {'id': 'project'}},
+            'serviceCatalog': [{'type': 'subject', 'name': 'subject',
+                                'endpoints': [{'publicURL': SUBJECT_URL}]}],
+        }})
+        # NOTE: HTTPClient lists the versions of its endpoint.
+        self.requests.get(SUBJECT_URL, json={
+            'versions': [VERSION['versions']]})
+        clients = self._count_clients()
+        self._run('--os-auth-url', auth_url, '--bypass-url', SUBJECT_URL,
+                  'subject-delete', SUBJECT_ID)
+        self.assertEqual(1, len(clients))
+        self.assertEqual(1, self._count('POST', auth_url + '/tokens'))
+        self.assertEqual(1, self._count('DELETE', DELETE_URL))
+        self.assertEqual('token', self.requests.last_request.headers[
+            'X-Auth-Token'])
+
+    def _serve_data(self, request, context):
+        # NOTE: the content type of subject data isn't always octet-stream.
+        context.headers['Content-Type'] = 'application/x-tar'
+        byte_range = request.headers.get('Range')
+        if byte_range is None:
+            context.headers['Content-Length'] = str(len(DATA))
+            return DroppedBody(DATA, 400000)
+        start = int(byte_range[len('bytes='):-1])
+        context.status_code = 206
+        context.headers['Content-Length'] = str(len(DATA) - start)
+        return io.BytesIO(DATA[start:])
+
+    def test_subject_download_resume(self):
+        self.requests.get(DATA_URL, body=self._serve_data)
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path, 'data')
+
+        self.assertRaises(requests.exceptions.ChunkedEncodingError,
+                          self._run, 'subject-download', '--file', path,
+                          SUBJECT_ID)
+        saved = os.path.getsize(path)
+        self.assertLess(0, saved)
+        self.assertLess(saved, len(DATA))
+
+        self._run('subject-download', '--file', path, '--resume',
+                  SUBJECT_ID)
+        with open(path, 'rb') as f:
+            self.assertEqual(DATA, f.read())
+        self.assertEqual('bytes=%d-' % saved,
+                         self.requests.last_request.headers['Range'])
+
+    def test_subject_upload_parallel_checksum_refused(self):
+        self.assertRaises(exceptions.CommandError, self._run,
+                          'subject-upload', '--file', __file__,
+                          '--parallel', '4', '--checksum', 'abc',
+                          SUBJECT_ID)
+        self.assertEqual(0, self._count('PUT', DATA_URL))
+
+    def _upload(self, *args):
+        uploaded = []
+
+        def upload(request, context):
+            # NOTE: reading the streamed body verifies the checksum.
+            uploaded.append(b''.join(bytes(c) for c in request.body))
+            context.status_code = 204
+
+        self.requests.put(DATA_URL, text=upload)
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path, 'data')
+        with open(path, 'wb') as f:
+            f.write(DATA)
+        self._run('subject-upload', '--file', path, SUBJECT_ID, *args)
+        return uploaded
+
+    def test_subject_upload_sha256_checksum(self):
+        uploaded = self._upload('--checksum-algorithm', 'sha256',
+                                '--checksum',
+                                hashlib.sha256(DATA).hexdigest())
+        self.assertEqual([DATA], uploaded)
+
+    def test_subject_upload_checksum_mismatch(self):
+        # NOTE: --checksum is an md5 checksum by default.
+        self.assertRaises(exceptions.ChecksumMismatch, self._upload,
+                          '--checksum', hashlib.sha256(DATA).hexdigest())
+        e = self.assertRaises(exceptions.ChecksumMismatch, self._upload,
+                              '--checksum-algorithm', 'sha256',
+                              '--checksum', hashlib.md5(DATA).hexdigest())
+        self.assertEqual('sha256', e.algorithm)
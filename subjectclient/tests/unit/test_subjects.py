@@ -0,0 +1,696 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import glob
+import hashlib
+import io
+import itertools
+import json
+import os
+import re
+import threading
+import time
+
+import fixtures
+from requests_mock.contrib import fixture as requests_mock_fixture
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+from six.moves.urllib import parse
+
+from subjectclient import client
+from subjectclient import exceptions
+from subjectclient import retry
+from subjectclient.tests.unit import utils
+
+
+SUBJECTS = [{'id': '%08x' % i, 'name': 'subject-%d' % i} for i in range(100)]
+
+
+class FakeServer(object):
+    """Subject listing of a server which returns at most `cap` subjects per
+    page, without a `next` link.
+    """
+
+    def __init__(self, cap=None):
+        self.cap = cap
+        self.limits = []
+        self.markers = []
+
+    def __call__(self, request, context):
+        query = parse.parse_qs(parse.urlsplit(request.url).query)
+        ids = [s['id'] for s in SUBJECTS]
+        start = 0
+        marker = query.get('marker', [None])[0]
+        self.markers.append(marker)
+        if marker:
+            start = ids.index(marker) + 1
+        limit = int(query['limit'][0])
+        self.limits.append(limit)
+        if self.cap:
+            limit = min(limit, self.cap)
+        return {'subjects': SUBJECTS[start:start + limit]}
+
+
+class SubjectListTest(utils.TestCase):
+
+    def setUp(self):
+        super(SubjectListTest, self).setUp()
+        self.requests = self.useFixture(requests_mock_fixture.Fixture())
+        self.cs = client.Client('1', 'user', 'password', 'project',
+                                bypass_url='http://subject',
+                                auth_token='token')
+
+    def _serve(self, server):
+        self.requests.get('http://subject/v1/images', json=server)
+        return server
+
+    def test_list_short_page_ends_listing(self):
+        server = self._serve(FakeServer())
+        subjects = list(self.cs.subjects.list(page_size=40))
+        self.assertEqual(SUBJECTS, [s._info for s in subjects])
+        self.assertEqual([40, 40, 40], server.limits)
+
+    def test_list_adaptive_capped_server(self):
+        server = self._serve(FakeServer(cap=50))
+        subjects = list(self.cs.subjects.list(page_size=40,
+                                              adaptive_page_size=True))
+        self.assertEqual(SUBJECTS, [s._info for s in subjects])
+        # NOTE: the size is clamped to the cap once a page is cut by it.
+        self.assertEqual([40, 80, 50], server.limits[:3])
+
+    def test_list_adaptive_short_page_ends_listing(self):
+        server = self._serve(FakeServer())
+        subjects = list(self.cs.subjects.list(page_size=40,
+                                              adaptive_page_size=True))
+        self.assertEqual(SUBJECTS, [s._info for s in subjects])
+        # NOTE: the last 60 subjects could have been cut by a cap of 60,
+        # the empty page which follows ends the listing.
+        self.assertEqual([40, 80, 60], server.limits)
+
+    def test_list_limit_zero_not_limited(self):
+        self._serve(FakeServer())
+        subjects = list(self.cs.subjects.list(page_size=40, limit=0))
+        self.assertEqual(SUBJECTS, [s._info for s in subjects])
+
+    def _resume(self, state, **kwargs):
+        # NOTE: the state is made to be saved as JSON.
+        state = json.loads(json.dumps(state))
+        return self.cs.subjects.cursor(state=state, **kwargs)
+
+    def test_cursor_resume(self):
+        server = self._serve(FakeServer())
+        cursor = self.cs.subjects.cursor(page_size=10)
+        first = [s._info for s in itertools.islice(cursor, 15)]
+        resumed = list(self._resume(cursor.state))
+        self.assertEqual(SUBJECTS, first + [s._info for s in resumed])
+        # NOTE: the listing resumes after the last subject handed out, in
+        # the middle of the second page.
+        self.assertEqual(SUBJECTS[14]['id'], server.markers[2])
+        self.assertEqual([10, 10, 10], server.limits[:3])
+
+    def test_cursor_resume_limit(self):
+        self._serve(FakeServer())
+        cursor = self.cs.subjects.cursor(page_size=10, limit=30)
+        first = [s._info for s in itertools.islice(cursor, 12)]
+        resumed = self._resume(cursor.state, limit=5)
+        # NOTE: the arguments of the resumed cursor are the saved ones.
+        self.assertEqual(SUBJECTS[:30],
+                         first + [s._info for s in resumed])
+
+    def test_cursor_resume_exhausted(self):
+        server = self._serve(FakeServer())
+        cursor = self.cs.subjects.cursor(page_size=10, limit=5)
+        self.assertEqual(SUBJECTS[:5], [s._info for s in cursor])
+        self.assertEqual([], list(self._resume(cursor.state)))
+        self.assertEqual([5], server.limits)
+
+    def test_list_prefetch_order(self):
+        server = self._serve(FakeServer())
+        subjects = list(self.cs.subjects.list(page_size=10, prefetch=3))
+        self.assertEqual(SUBJECTS, [s._info for s in subjects])
+        self.assertEqual([None] + [SUBJECTS[i]['id']
+                                   for i in range(9, 100, 10)],
+                         server.markers)
+
+    def test_list_prefetch_limit(self):
+        server = self._serve(FakeServer())
+        subjects = list(self.cs.subjects.list(page_size=10, prefetch=3,
+                                              limit=25))
+        self.assertEqual(SUBJECTS[:25], [s._info for s in subjects])
+        # NOTE: no page is fetched ahead past the limit.
+        self.assertEqual([10, 10, 5], server.limits)
+
+    def test_list_prefetch_depth(self):
+        server = self._serve(FakeServer())
+        subjects = self.cs.subjects.list(page_size=10, prefetch=2)
+        self.assertEqual(SUBJECTS[0], next(subjects)._info)
+        time.sleep(0.2)
+        # NOTE: the page being consumed, the 2 pages fetched ahead and the
+        # one waiting for room.
+        self.assertEqual(4, len(server.limits))
+        subjects.close()
+        time.sleep(0.1)
+        self.assertEqual(4, len(server.limits))
+
+    def test_list_prefetch_error_raised_in_order(self):
+        server = FakeServer()
+
+        def fail_third_page(request, context):
+            if len(server.limits) == 2:
+                context.status_code = 500
+                return {'computeFault': {'message': 'Failed'}}
+            return server(request, context)
+
+        self.requests.get('http://subject/v1/images', json=fail_third_page)
+        subjects = self.cs.subjects.list(page_size=10, prefetch=3)
+        received = []
+        e = self.assertRaises(exceptions.ClientException, list,
+                              _consume(subjects, received))
+        self.assertEqual(500, e.code)
+        self.assertEqual(SUBJECTS[:20], [s._info for s in received])
+
+    def test_list_parallel_server_ignoring_ranges(self):
+        # NOTE: the fake server ignores the id_gt and id_lte filters and
+        # returns every subject to every range.
+        server = self._serve(FakeServer())
+        boundaries = ['%08x' % i for i in (25, 50, 75)]
+        subjects = list(self.cs.subjects.list_parallel(
+            boundaries=boundaries, page_size=10))
+        self.assertEqual(sorted(s['id'] for s in SUBJECTS),
+                         sorted(s.id for s in subjects))
+        # The first range stops at the page going past its upper bound.
+        self.assertLess(len(server.limits), 4 * 11)
+
+    def test_list_parallel_ordered_limit(self):
+        self._serve(FakeServer())
+        boundaries = ['%08x' % i for i in (25, 50, 75)]
+        subjects = list(self.cs.subjects.list_parallel(
+            boundaries=boundaries, ordered=True, limit=30))
+        self.assertEqual(SUBJECTS[:30], [s._info for s in subjects])
+
+
+class FakeClock(object):
+    """Time which only goes by when slept, shared by the threads."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+        self._lock = threading.Lock()
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+
+def _consume(subjects, received):
+    for subject in subjects:
+        received.append(subject)
+        yield subject
+
+
+class SubjectCreateManyTest(utils.TestCase):
+
+    def setUp(self):
+        super(SubjectCreateManyTest, self).setUp()
+        self.requests = self.useFixture(requests_mock_fixture.Fixture())
+        self.requests.post('http://subject/v1/subjects', json=self._create)
+        self.cs = client.Client('1', 'user', 'password', 'project',
+                                bypass_url='http://subject',
+                                auth_token='token', thread_safe=True)
+
+    def _create(self, request, context):
+        name = json.loads(request.body)['subject']['name']
+        if name == 'bad':
+            context.status_code = 400
+            return {'badRequest': {'message': 'Bad name'}}
+        return {'subject': {'id': 'id-%s' % name, 'name': name}}
+
+    def _cached_uuids(self):
+        paths = glob.glob(os.path.join(
+            os.environ['NOVACLIENT_UUID_CACHE_DIR'], '*',
+            'subject-uuid-cache'))
+        if not paths:
+            return []
+        with open(paths[0]) as f:
+            return f.read().split()
+
+    def test_create_many(self):
+        specs = [{'name': 's%d' % i} for i in range(20)]
+        results = list(self.cs.subjects.create_many(specs, concurrency=4))
+        self.assertEqual(list(range(20)), [r.index for r in results])
+        self.assertEqual(['id-s%d' % i for i in range(20)],
+                         [r.result.id for r in results])
+        self.assertEqual(['id-s%d' % i for i in range(20)],
+                         self._cached_uuids())
+
+    def test_create_many_reports_failures(self):
+        specs = [{'name': 'a'}, {'name': 'bad'}, {'name': 'b'}]
+        results = list(self.cs.subjects.create_many(specs, concurrency=2))
+        self.assertIsNone(results[1].result)
+        self.assertIsInstance(results[1].error, exceptions.BadRequest)
+        self.assertEqual(['id-a', 'id-b'],
+                         [results[0].result.id, results[2].result.id])
+        # NOTE: only the created subjects are cached.
+        self.assertEqual(['id-a', 'id-b'], self._cached_uuids())
+
+    def test_create_many_closed_caches_created(self):
+        specs = [{'name': 's%d' % i} for i in range(10)]
+        results = self.cs.subjects.create_many(specs, concurrency=1)
+        self.assertEqual('id-s0', next(results).result.id)
+        self.assertEqual('id-s1', next(results).result.id)
+        results.close()
+        self.assertEqual(['id-s0', 'id-s1'], self._cached_uuids())
+
+    def test_create_many_refuses_thread_unsafe_client(self):
+        cs = client.Client('1', 'user', 'password', 'project',
+                           bypass_url='http://subject', auth_token='token')
+        results = cs.subjects.create_many([{'name': 'a'}], concurrency=2)
+        self.assertRaises(exceptions.InvalidUsage, next, results)
+        self.assertFalse(self.requests.called)
+
+    def test_create_many_sequential_thread_unsafe_client(self):
+        cs = client.Client('1', 'user', 'password', 'project',
+                           bypass_url='http://subject', auth_token='token')
+        results = list(cs.subjects.create_many([{'name': 'a'}],
+                                               concurrency=1))
+        self.assertEqual('id-a', results[0].result.id)
+
+
+class SubjectDeleteManyTest(utils.TestCase):
+
+    def setUp(self):
+        super(SubjectDeleteManyTest, self).setUp()
+        self.requests = self.useFixture(requests_mock_fixture.Fixture())
+        self.requests.delete(re.compile('http://subject/v1/subjects/'),
+                             text=self._delete)
+        self.cs = client.Client('1', 'user', 'password', 'project',
+                                bypass_url='http://subject',
+                                auth_token='token', thread_safe=True)
+        self.clock = FakeClock()
+        for module in ('subjectclient.utils', 'subjectclient.v1.subjects'):
+            self.useFixture(fixtures.MonkeyPatch(module + '.time',
+                                                 self.clock))
+        self.deleted = []
+        self.responses = {}
+
+    def _delete(self, request, context):
+        subject_id = request.path.rsplit('/', 1)[-1]
+        responses = self.responses.get(subject_id)
+        if responses:
+            context.status_code, context.headers = responses.pop(0)
+            return ''
+        self.deleted.append((subject_id, self.clock.now))
+        context.status_code = 204
+        return ''
+
+    def _rate_limit(self, subject_id, times, retry_after='3'):
+        self.responses[subject_id] = [(429, {'Retry-After': retry_after})
+                                      for i in range(times)]
+
+    def test_delete_many_paced(self):
+        ids = ['s%d' % i for i in range(6)]
+        results = list(self.cs.subjects.delete_many(ids, concurrency=1,
+                                                    rate=2))
+        self.assertEqual([None] * 6, [r.error for r in results])
+        # NOTE: one second worth of deletes is sent in a burst, the others
+        # are paced at the rate.
+        self.assertEqual([(i, 1000.0 + max(0, n - 1) * 0.5)
+                          for n, i in enumerate(ids)], self.deleted)
+
+    def test_delete_many_retry_after(self):
+        self._rate_limit('s1', 1)
+        results = list(self.cs.subjects.delete_many(['s0', 's1', 's2'],
+                                                    concurrency=1))
+        self.assertEqual([None] * 3, [r.error for r in results])
+        self.assertEqual([3], self.clock.sleeps)
+        self.assertEqual([('s0', 1000.0), ('s1', 1003.0), ('s2', 1003.0)],
+                         self.deleted)
+
+    def test_delete_many_retry_after_pauses_bucket(self):
+        self._rate_limit('s0', 1)
+        results = list(self.cs.subjects.delete_many(['s0', 's1'],
+                                                    concurrency=1, rate=10))
+        self.assertEqual([None] * 2, [r.error for r in results])
+        # NOTE: the other deletes wait for the Retry-After too.
+        self.assertEqual([('s0', 1003.0), ('s1', 1003.0)], self.deleted)
+
+    def test_delete_many_retries_exhausted(self):
+        self._rate_limit('s0', 3, retry_after='1')
+        results = list(self.cs.subjects.delete_many(['s0', 's1'],
+                                                    concurrency=1,
+                                                    retries=2))
+        self.assertIsInstance(results[0].error, exceptions.RateLimit)
+        self.assertIsNone(results[1].error)
+        self.assertEqual([1, 1], self.clock.sleeps)
+
+    def test_delete_many_reports_not_found(self):
+        self.responses['s1'] = [(404, {})]
+        results = list(self.cs.subjects.delete_many(['s0', 's1', 's2'],
+                                                    concurrency=3))
+        self.assertEqual(['s0', 's1', 's2'], [r.item for r in results])
+        self.assertIsNone(results[0].error)
+        self.assertIsInstance(results[1].error, exceptions.NotFound)
+        self.assertIsNone(results[2].error)
+        self.assertEqual(['s0', 's2'], sorted(i for i, t in self.deleted))
+
+    def test_delete_many_refuses_thread_unsafe_client(self):
+        cs = client.Client('1', 'user', 'password', 'project',
+                           bypass_url='http://subject', auth_token='token')
+        results = cs.subjects.delete_many(['s0'], concurrency=2)
+        self.assertRaises(exceptions.InvalidUsage, next, results)
+        self.assertFalse(self.requests.called)
+
+
+class SubjectDataTest(utils.TestCase):
+
+    url = 'http://subject/v1/images/s0/file'
+    content = b''.join(b'%06d' % i for i in range(50000))
+
+    def setUp(self):
+        super(SubjectDataTest, self).setUp()
+        self.requests = self.useFixture(requests_mock_fixture.Fixture())
+        self.cs = client.Client('1', 'user', 'password', 'project',
+                                bypass_url='http://subject',
+                                auth_token='token')
+
+    def _serve(self, body, content_type='application/x-tar', **kwargs):
+        self.requests.get(self.url, body=body,
+                          headers={'Content-Type': content_type,
+                                   'Content-Length': str(len(
+                                       body.getvalue()))},
+                          **kwargs)
+
+    def test_data_streamed_whatever_the_content_type(self):
+        for content_type in ('application/x-tar', 'application/json',
+                             'application/octet-stream'):
+            body = io.BytesIO(self.content)
+            self._serve(body, content_type)
+            data = self.cs.subjects.data('s0', chunk_size=1024)
+            # NOTE: nothing is read until the data is iterated over.
+            self.assertEqual(0, body.tell())
+            self.assertEqual(len(self.content), data.length)
+            chunks = list(data)
+            self.assertEqual(1024, len(chunks[0]))
+            self.assertEqual(self.content, b''.join(chunks))
+
+    def test_data_range(self):
+        self._serve(io.BytesIO(self.content[1000:]), status_code=206)
+        data = self.cs.subjects.data('s0', byte_range=1000)
+        self.assertEqual('bytes=1000-',
+                         self.requests.last_request.headers['Range'])
+        self.assertEqual(len(self.content) - 1000, data.length)
+        self.assertEqual(self.content[1000:], b''.join(data))
+
+    def test_data_range_ignored_by_server(self):
+        self._serve(io.BytesIO(self.content))
+        data = self.cs.subjects.data('s0', byte_range=1000)
+        self.assertEqual(len(self.content) - 1000, data.length)
+        self.assertEqual(self.content[1000:], b''.join(data))
+
+    def test_data_error_read(self):
+        self.requests.get(self.url, status_code=404,
+                          json={'itemNotFound': {'message': 'No data'}})
+        e = self.assertRaises(exceptions.NotFound, self.cs.subjects.data,
+                              's0')
+        self.assertEqual('No data', e.message)
+
+
+class UploadServer(object):
+    """Local server of the PUTs of subject data, whole or in ranged parts,
+    and of the commit of a parallel upload.
+
+    The first `failures` attempts of the part at each offset of `failing`
+    are answered with a 503.
+    """
+
+    def __init__(self, failing=(), failures=1):
+        self.uploads = []
+        self.parts = {}
+        self.commits = []
+        self.attempts = {}
+        server = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _read_body(self):
+                if self.headers.get('Transfer-Encoding') != 'chunked':
+                    return self.rfile.read(
+                        int(self.headers.get('Content-Length', 0)))
+                data = b''
+                while True:
+                    size = int(self.rfile.readline().strip(), 16)
+                    data += self.rfile.read(size)
+                    self.rfile.readline()
+                    if not size:
+                        return data
+
+            def _reply(self, status, body=None):
+                data = json.dumps(body).encode('utf-8') if body else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_PUT(self):
+                data = self._read_body()
+                server.uploads.append((self.headers, data))
+                content_range = self.headers.get('Content-Range')
+                offset = 0
+                if content_range:
+                    offset = int(content_range.split()[1].split('-')[0])
+                with server.lock:
+                    attempt = server.attempts.get(offset, 0)
+                    server.attempts[offset] = attempt + 1
+                if offset in failing and attempt < failures:
+                    return self._reply(503, {'error': {
+                        'message': 'Try again', 'code': 503}})
+                server.parts[offset] = (content_range, data)
+                self._reply(204)
+
+            def do_POST(self):
+                server.commits.append(json.loads(self._read_body()))
+                data = server.data()
+                self._reply(200, {'subject': {
+                    'size': len(data),
+                    'checksum': hashlib.md5(data).hexdigest()}})
+
+        class Server(socketserver.ThreadingMixIn,
+                     BaseHTTPServer.HTTPServer):
+            daemon_threads = True
+
+        self.lock = threading.Lock()
+        self._server = Server(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:%d' % self._server.server_port
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        args=(0.01,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def data(self):
+        return b''.join(self.parts[offset][1]
+                        for offset in sorted(self.parts))
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class SubjectUploadPartsTest(utils.TestCase):
+
+    content = b''.join(b'%06d' % i for i in range(50000))
+    part_size = 64 * 1024
+
+    def setUp(self):
+        super(SubjectUploadPartsTest, self).setUp()
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path, 'data')
+        with open(path, 'wb') as f:
+            f.write(self.content)
+        self.data = open(path, 'rb')
+        self.addCleanup(self.data.close)
+        self.clock = FakeClock()
+        self.useFixture(fixtures.MonkeyPatch('subjectclient.retry.time',
+                                             self.clock))
+
+    def _get_client(self, server, **kwargs):
+        self.addCleanup(server.stop)
+        return client.Client('1', 'user', 'password', 'project',
+                             bypass_url=server.url, auth_token='token',
+                             thread_safe=True, **kwargs)
+
+    def _upload(self, cs, **kwargs):
+        return cs.subjects.upload('s0', self.data, concurrency=3,
+                                  part_size=self.part_size, **kwargs)
+
+    def test_upload_parts(self):
+        server = UploadServer()
+        cs = self._get_client(server)
+        checksum = hashlib.md5(self.content).hexdigest()
+        result = self._upload(cs, checksum=checksum)
+
+        self.assertEqual(self.content, server.data())
+        size = len(self.content)
+        offsets = list(range(0, size, self.part_size))
+        self.assertEqual(['bytes %d-%d/%d' % (
+            offset, min(offset + self.part_size, size) - 1, size)
+            for offset in offsets],
+            [server.parts[offset][0] for offset in offsets])
+        self.assertEqual([{'size': size, 'parts': len(offsets),
+                           'checksum': checksum}], server.commits)
+        # NOTE: the result is the body of the commit response.
+        self.assertEqual({'subject': {'size': size, 'checksum': checksum}},
+                         result)
+
+    def test_upload_parts_retried_with_backoff(self):
+        server = UploadServer(failing=(self.part_size,), failures=2)
+        cs = self._get_client(server)
+        self._upload(cs)
+        self.assertEqual(self.content, server.data())
+        self.assertEqual(3, server.attempts[self.part_size])
+        self.assertEqual(2, len(self.clock.sleeps))
+        self.assertTrue(all(0 <= delay <= 1 for delay in self.clock.sleeps))
+
+    def test_upload_parts_client_retry_policy(self):
+        server = UploadServer(failing=(self.part_size,), failures=2)
+        cs = self._get_client(server, retry_policy=retry.RetryPolicy(
+            retries=1, backoff=0))
+        # NOTE: the retries of the policy of the client replace the part
+        # retries, they don't add up.
+        e = self.assertRaises(exceptions.ClientException, self._upload, cs,
+                              part_retries=5)
+        self.assertEqual(503, e.code)
+        self.assertEqual(2, server.attempts[self.part_size])
+        self.assertEqual([], server.commits)
+
+    def test_upload_parts_thread_unsafe_client(self):
+        server = UploadServer()
+        self.addCleanup(server.stop)
+        cs = client.Client('1', 'user', 'password', 'project',
+                           bypass_url=server.url, auth_token='token')
+        self.assertRaises(exceptions.InvalidUsage, self._upload, cs)
+        self.assertEqual({}, server.attempts)
+
+
+class SubjectUploadTest(utils.TestCase):
+
+    content = b''.join(b'%06d' % i for i in range(50000))
+
+    def setUp(self):
+        super(SubjectUploadTest, self).setUp()
+        self.server = UploadServer()
+        self.addCleanup(self.server.stop)
+        self.cs = client.Client('1', 'user', 'password', 'project',
+                                bypass_url=self.server.url,
+                                auth_token='token')
+
+    def _upload(self, data, **kwargs):
+        result = self.cs.subjects.upload('s0', data, **kwargs)
+        [(headers, body)] = self.server.uploads
+        return result, headers, body
+
+    def _file(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path, 'data')
+        with open(path, 'wb') as f:
+            f.write(self.content)
+        data = open(path, 'rb')
+        self.addCleanup(data.close)
+        return data
+
+    def test_upload_file_with_content_length(self):
+        result, headers, body = self._upload(self._file())
+        self.assertEqual(str(len(self.content)), headers['Content-Length'])
+        self.assertIsNone(headers.get('Transfer-Encoding'))
+        self.assertEqual(self.content, body)
+        self.assertEqual(hashlib.md5(self.content).hexdigest(),
+                         result['md5'])
+
+    def test_upload_rest_of_file(self):
+        data = self._file()
+        data.seek(1000)
+        result, headers, body = self._upload(data)
+        self.assertEqual(str(len(self.content) - 1000),
+                         headers['Content-Length'])
+        self.assertEqual(self.content[1000:], body)
+
+    def test_upload_in_memory_with_content_length(self):
+        result, headers, body = self._upload(io.BytesIO(self.content))
+        self.assertEqual(str(len(self.content)), headers['Content-Length'])
+        self.assertEqual(self.content, body)
+
+    def test_upload_pipe_chunked(self):
+        read_fd, write_fd = os.pipe()
+        data = os.fdopen(read_fd, 'rb')
+        self.addCleanup(data.close)
+
+        def write():
+            with os.fdopen(write_fd, 'wb') as f:
+                f.write(self.content)
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        self.addCleanup(writer.join)
+        # NOTE: the size of a pipe is unknown, its data is sent in chunks.
+        result, headers, body = self._upload(data)
+        self.assertEqual('chunked', headers['Transfer-Encoding'])
+        self.assertIsNone(headers.get('Content-Length'))
+        self.assertEqual(self.content, body)
+        self.assertEqual(hashlib.md5(self.content).hexdigest(),
+                         result['md5'])
+
+    def test_upload_checksums(self):
+        result, headers, body = self._upload(
+            self._file(), checksum=hashlib.md5(self.content).hexdigest(),
+            sha256=hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(self.content, body)
+        self.assertEqual({'md5': hashlib.md5(self.content).hexdigest(),
+                          'sha256': hashlib.sha256(self.content).hexdigest()},
+                         result)
+
+    def _assert_aborted(self, **kwargs):
+        e = self.assertRaises(exceptions.ChecksumMismatch,
+                              self.cs.subjects.upload, 's0', self._file(),
+                              **kwargs)
+        # NOTE: the mismatch is found before the last chunk is sent, the
+        # server never gets the whole data.
+        for headers, body in self.server.uploads:
+            self.assertLess(len(body), len(self.content))
+        return e
+
+    def test_upload_md5_mismatch(self):
+        e = self._assert_aborted(checksum='0' * 32)
+        self.assertEqual('md5', e.algorithm)
+        self.assertEqual(hashlib.md5(self.content).hexdigest(), e.actual)
+
+    def test_upload_sha256_mismatch(self):
+        e = self._assert_aborted(
+            checksum=hashlib.md5(self.content).hexdigest(),
+            sha256='0' * 64)
+        self.assertEqual('sha256', e.algorithm)
+        self.assertEqual('0' * 64, e.expected)
+
+    def test_upload_server_checksum_mismatch(self):
+        requests = self.useFixture(requests_mock_fixture.Fixture())
+        requests.put('%s/v1/images/s0/file' % self.server.url,
+                     status_code=204,
+                     headers={'x-subject-meta-checksum': '0' * 32})
+        e = self.assertRaises(exceptions.ChecksumMismatch,
+                              self.cs.subjects.upload, 's0',
+                              io.BytesIO(self.content))
+        self.assertEqual('0' * 32, e.expected)
@@ -0,0 +1,108 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mmap
+import os
+import stat
+import tempfile
+
+import fixtures
+import six
+import testtools
+
+from subjectclient.tests.unit import utils as test_utils
+from subjectclient import utils
+
+
+@testtools.skipIf(six.PY2, "python 2 mmap objects don't support memoryview")
+class IterMmapTest(test_utils.TestCase):
+
+    def setUp(self):
+        super(IterMmapTest, self).setUp()
+        size = 2 * mmap.ALLOCATIONGRANULARITY + 100
+        self.data = bytes(bytearray(i % 251 for i in range(size)))
+        self.file_obj = tempfile.TemporaryFile()
+        self.addCleanup(self.file_obj.close)
+        self.file_obj.write(self.data)
+        self.file_obj.flush()
+        self.mappings = []
+        real_mmap = mmap.mmap
+
+        def record(*args, **kwargs):
+            mapped = real_mmap(*args, **kwargs)
+            self.mappings.append(mapped)
+            return mapped
+
+        self.useFixture(fixtures.MockPatch('mmap.mmap', side_effect=record))
+
+    def test_chunks(self):
+        offset = mmap.ALLOCATIONGRANULARITY + 7
+        length = len(self.data) - offset - 3
+        chunks = [bytes(c) for c in
+                  utils.iter_mmap(self.file_obj, 4000, offset, length)]
+        self.assertEqual([4000] * (length // 4000) + [length % 4000],
+                         [len(c) for c in chunks])
+        self.assertEqual(self.data[offset:offset + length], b''.join(chunks))
+
+    def test_mapping_closed_when_exhausted(self):
+        for chunk in utils.iter_mmap(self.file_obj, 4096, 0, len(self.data)):
+            pass
+        self.assertEqual(1, len(self.mappings))
+        self.assertTrue(self.mappings[0].closed)
+
+    def test_mapping_closed_when_abandoned(self):
+        chunks = utils.iter_mmap(self.file_obj, 4096, 0, len(self.data))
+        chunk = next(chunks)
+        chunks.close()
+        self.assertTrue(self.mappings[0].closed)
+        # The chunks are only valid until the next one is requested.
+        self.assertRaises(ValueError, bytes, chunk)
+
+
+class JsonFileCacheTest(test_utils.TestCase):
+
+    def setUp(self):
+        super(JsonFileCacheTest, self).setUp()
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'cache')
+        self.cache = utils.JsonFileCache(self.path)
+
+    def test_set_get(self):
+        self.assertIsNone(self.cache.get('key'))
+        self.assertNotIn('key', self.cache)
+        self.cache.set('key', {'value': 1})
+        self.assertIn('key', self.cache)
+        self.assertEqual({'value': 1}, self.cache.get('key'))
+        self.cache.set('key', {'value': 2})
+        self.assertEqual({'value': 2}, self.cache.get('key'))
+        self.assertEqual(1, len(os.listdir(self.path)))
+
+    def test_owner_only(self):
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(0o700, stat.S_IMODE(os.stat(self.path).st_mode))
+        name, = os.listdir(self.path)
+        mode = os.stat(os.path.join(self.path, name)).st_mode
+        self.assertEqual(0o600, stat.S_IMODE(mode))
+
+    def test_unreadable_entry(self):
+        self.cache.set('key', {'value': 1})
+        name, = os.listdir(self.path)
+        with open(os.path.join(self.path, name), 'w') as f:
+            f.write('{')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_delete(self):
+        self.cache.set('key', {'value': 1})
+        self.cache.delete('key')
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual([], os.listdir(self.path))
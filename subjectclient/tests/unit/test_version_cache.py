@@ -0,0 +1,48 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import fixtures
+
+from subjectclient.tests.unit import utils
+from subjectclient import version_cache
+
+ENDPOINT = 'http://subject'
+VERSION = {'id': 'v1.0', 'version': '', 'min_version': ''}
+
+
+class VersionCacheTest(utils.TestCase):
+
+    def setUp(self):
+        super(VersionCacheTest, self).setUp()
+        self.path = self.useFixture(fixtures.TempDir()).path
+
+    def test_shared_by_processes(self):
+        version_cache.VersionCache(path=self.path).set(ENDPOINT, VERSION)
+        cache = version_cache.VersionCache(path=self.path)
+        self.assertEqual(VERSION, cache.get(ENDPOINT))
+        self.assertTrue(cache.invalidate(ENDPOINT))
+        self.assertIsNone(
+            version_cache.VersionCache(path=self.path).get(ENDPOINT))
+
+    def test_expired(self):
+        cache = version_cache.VersionCache(ttl=-1, path=self.path)
+        cache.set(ENDPOINT, VERSION)
+        self.assertIsNone(cache.get(ENDPOINT))
+        self.assertIsNone(
+            version_cache.VersionCache(path=self.path).get(ENDPOINT))
+
+    def test_memory_only(self):
+        cache = version_cache.VersionCache()
+        cache.set(ENDPOINT, VERSION)
+        self.assertEqual(VERSION, cache.get(ENDPOINT))
+        self.assertTrue(cache.invalidate(ENDPOINT))
+        self.assertFalse(cache.invalidate(ENDPOINT))
@@ -11,21 +11,28 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import contextlib
 import errno
+import hashlib
 import json
+import mmap
 import os
 import re
+import stat
+import tempfile
 import textwrap
+import threading
 import time
 import uuid
 import sys
 
+from concurrent import futures
 from oslo_serialization import jsonutils
 from oslo_utils import encodeutils
-import pkg_resources
 import prettytable
 import six
+from six.moves import queue
 from six.moves.urllib import parse
 
 if os.name == 'nt':
@@ -33,6 +40,11 @@ if os.name == 'nt':
 else:
     msvcrt = None
 
+try:
+    from importlib import metadata as importlib_metadata
+except ImportError:
+    import importlib_metadata
+
 from subjectclient import exceptions
 from subjectclient.i18n import _
 
@@ -420,19 +432,191 @@ def do_action_on_many(action, resources, success_msg, error_msg):
         raise exceptions.CommandError(error_msg)
 
 
+class TokenBucket(object):
+    """Thread-safe token bucket limiting the rate of an operation.
+
+    :param rate: number of tokens made available per second.
+    :param capacity: number of tokens which can be saved up for bursts,
+                     defaults to one second worth of tokens.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = max(capacity or self.rate, 1)
+        self._tokens = self.capacity
+        self._last = time.time()
+        self._not_before = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, waiting until one is available."""
+        while True:
+            with self._lock:
+                now = time.time()
+                self._tokens = min(self.capacity, self._tokens +
+                                   (now - self._last) * self.rate)
+                self._last = now
+                wait = self._not_before - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hand out no token for `seconds`, e.g. after being rate limited."""
+        with self._lock:
+            self._not_before = max(self._not_before, time.time() + seconds)
+
+
+class JsonFileCache(object):
+    """File store of JSON entries, one file per key.
+
+    The files are only readable by their owner. An entry is replaced
+    atomically, the processes and threads sharing the directory never read
+    a partly written one.
+
+    :param path: Directory of the files.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+
+    def _file(self, key):
+        return os.path.join(self.path,
+                            hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def __contains__(self, key):
+        """Whether an entry was saved for `key`."""
+        return os.path.exists(self._file(key))
+
+    def get(self, key):
+        """Return the entry saved for `key`, or None if it can't be read."""
+        try:
+            with open(self._file(key)) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def set(self, key, entry):
+        """Save the entry of `key`, replacing the previous one atomically."""
+        try:
+            os.makedirs(self.path, 0o700)
+        except OSError:
+            # NOTE: the directory most likely exists already, writing the
+            # file below fails otherwise.
+            pass
+        # NOTE: mkstemp creates the file readable by its owner only.
+        fd, tmp_path = tempfile.mkstemp(dir=self.path)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.rename(tmp_path, self._file(key))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def delete(self, key):
+        try:
+            os.unlink(self._file(key))
+        except OSError:
+            pass
+
+
+def map_concurrently(func, items, workers, ordered=True, window=None):
+    """Call `func` on every item from a pool of `workers` threads.
+
+    Items are only taken from `items` as results are consumed, at most
+    `window` (twice the number of workers by default) at a time, so it can
+    be a long lazy iterable.
+
+    :param ordered: yield the results in the order of `items`, or as soon as
+                    they are available.
+    :returns: generator of (index, item, result, exception) tuples, where
+              exception is the one raised by `func` (result is then None).
+              Failures don't stop the other calls.
+    """
+    window = window or 2 * workers
+    items = enumerate(items)
+
+    def call(item):
+        try:
+            return func(item), None
+        except Exception as e:
+            return None, e
+
+    with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = collections.OrderedDict()
+        try:
+            while True:
+                for index, item in items:
+                    pending[executor.submit(call, item)] = (index, item)
+                    if len(pending) >= window:
+                        break
+                if not pending:
+                    return
+                if ordered:
+                    done = next(iter(pending))
+                else:
+                    done = next(futures.as_completed(pending))
+                index, item = pending.pop(done)
+                result, error = done.result()
+                yield index, item, result, error
+        finally:
+            # NOTE: don't start the calls left if the consumer gave up.
+            for future in pending:
+                future.cancel()
+
+
+_entry_points = None
+_entry_points_lock = threading.Lock()
+
+
+def _get_entry_points():
+    global _entry_points
+    with _entry_points_lock:
+        if _entry_points is None:
+            entry_points = {}
+            seen = set()
+            for dist in importlib_metadata.distributions():
+                # NOTE: a distribution found in several directories of
+                # sys.path is only used from the first one, as when
+                # importing it.
+                name = dist.metadata['Name']
+                if name in seen:
+                    continue
+                seen.add(name)
+                for ep in dist.entry_points:
+                    entry_points.setdefault(ep.group, []).append(ep)
+            _entry_points = entry_points
+        return _entry_points
+
+
+def iter_entry_points(group, name=None):
+    """Return the entry points of `group`, only those named `name` if given.
+
+    The entry points of the installed distributions are read once per
+    process, and shared by the loaders of extensions and auth plugins.
+    """
+    return [ep for ep in _get_entry_points().get(group, ())
+            if name is None or ep.name == name]
+
+
+def get_entry_point_target(ep):
+    """Return the 'module' or 'module:attr' an entry point refers to."""
+    match = ep.pattern.match(ep.value)
+    if match.group('attr'):
+        return '%s:%s' % (match.group('module'), match.group('attr'))
+    return match.group('module')
+
+
 def load_entry_point(ep_name, name=None):
     """Try to load the entry point ep_name that matches name."""
-    for ep in pkg_resources.iter_entry_points(ep_name, name=name):
+    for ep in iter_entry_points(ep_name, name=name):
         try:
-            # FIXME(dhellmann): It would be better to use stevedore
-            # here, since it abstracts this difference in behavior
-            # between versions of setuptools, but this seemed like a
-            # more expedient fix.
-            if hasattr(ep, 'resolve') and hasattr(ep, 'require'):
-                return ep.resolve()
-            else:
-                return ep.load(require=False)
-        except (ImportError, pkg_resources.UnknownExtra, AttributeError):
+            return ep.load()
+        except (ImportError, AttributeError):
             continue
 
 
@@ -470,9 +654,111 @@ def record_time(times, enabled, *args):
         yield
     else:
         start = time.time()
-        yield
-        end = time.time()
-        times.append((' '.join(args), start, end))
+        try:
+            yield
+        finally:
+            # NOTE: failed requests are recorded too, e.g. the attempts
+            # which were retried.
+            times.append((' '.join(args), start, time.time()))
+
+
+def set_query_param(url, name, value):
+    """Return `url` with the query parameter `name` set to `value`."""
+    scheme, netloc, path, query, fragment = parse.urlsplit(url)
+    params = [(k, v) for k, v in parse.parse_qsl(query, keep_blank_values=True)
+              if k != name]
+    params.append((name, value))
+    return parse.urlunsplit((scheme, netloc, path, parse.urlencode(params),
+                             fragment))
+
+
+_END = object()
+
+
+def _start_producer(iterable, items, done, index=None):
+    """Feed the items of an iterable to a queue from a background thread.
+
+    The queue receives (index, item, exc_info) tuples, the last one holding
+    either _END or the exception raised by the iterable. The thread gives up
+    as soon as `done` is set.
+    """
+    def put(item, exc_info=None):
+        while not done.is_set():
+            try:
+                items.put((index, item, exc_info), timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except Exception:
+            put(None, sys.exc_info())
+        else:
+            put(_END)
+
+    worker = threading.Thread(target=produce)
+    worker.daemon = True
+    worker.start()
+
+
+def prefetch(iterable, depth):
+    """Consume an iterable in a background thread, up to `depth` items ahead.
+
+    The items are yielded in order. An exception raised by the iterable is
+    re-raised when the consumer reaches it. Closing the returned generator
+    stops the background thread after the item it is producing.
+
+    :param iterable: iterable to consume, e.g. a generator fetching pages.
+    :param depth: maximum number of items waiting to be consumed.
+    """
+    return iter_parallel([iterable], depth, ordered=True)
+
+
+def iter_parallel(iterables, depth, ordered=False):
+    """Consume several iterables concurrently, one background thread each.
+
+    An exception raised by one of the iterables is re-raised when the
+    consumer reaches it. Closing the returned generator stops all of the
+    background threads.
+
+    :param iterables: iterables to consume, e.g. generators fetching pages.
+    :param depth: maximum number of items of each iterable waiting to be
+                  consumed.
+    :param ordered: yield all of the items of the first iterable, then the
+                    ones of the second one and so on. Items are yielded in
+                    the order they are produced otherwise.
+    """
+    iterables = list(iterables)
+    done = threading.Event()
+    if ordered:
+        queues = [queue.Queue(maxsize=depth) for _i in iterables]
+    else:
+        queues = [queue.Queue(maxsize=depth * len(iterables))]
+
+    try:
+        for index, iterable in enumerate(iterables):
+            _start_producer(iterable, queues[index % len(queues)], done,
+                            index)
+
+        remaining = len(iterables)
+        while remaining:
+            # NOTE: in ordered mode every iterable has its own queue, they
+            # are drained one after the other.
+            items = queues[(len(iterables) - remaining) % len(queues)]
+            _index, item, exc_info = items.get()
+            if exc_info is not None:
+                six.reraise(*exc_info)
+            if item is _END:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        done.set()
 
 
 def prepare_query_string(params):
@@ -509,6 +795,235 @@ def get_file_size(file_obj):
                 raise
 
 
+def get_remaining_size(file_obj):
+    """Return the number of bytes left to read from a file-like object.
+
+    :param file_obj: file-like object.
+    :retval The number of bytes or None if it cannot be determined.
+    """
+    size = get_file_size(file_obj)
+    if size is None:
+        return None
+    return size - file_obj.tell()
+
+
+def is_regular_file(file_obj):
+    """Tell whether a file-like object is backed by a regular on-disk file."""
+    try:
+        return stat.S_ISREG(os.fstat(file_obj.fileno()).st_mode)
+    except (AttributeError, IOError, OSError, ValueError):
+        # NOTE: io.UnsupportedOperation, raised by in-memory file objects,
+        # is both an OSError and a ValueError.
+        return False
+
+
+def iter_mmap(file_obj, chunk_size, offset, length):
+    """Yield memoryview slices of a memory mapping of a regular file.
+
+    The chunks share the page cache of the file, so sending them to a
+    socket doesn't copy the data through Python objects. Like with
+    iter_buffer, the yielded views are only valid until the next chunk is
+    requested: they are released so that the mapping can be closed.
+
+    :param file_obj: regular on-disk file.
+    :param chunk_size: size of the slices.
+    :param offset: position in the file to start from.
+    :param length: number of bytes to yield.
+    """
+    if length <= 0:
+        return
+    # NOTE: mappings have to start at a multiple of the allocation
+    # granularity.
+    start = offset - offset % mmap.ALLOCATIONGRANULARITY
+    mapped = mmap.mmap(file_obj.fileno(), offset - start + length,
+                       offset=start, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    try:
+        pos = offset - start
+        end = pos + length
+        while pos < end:
+            size = min(chunk_size, end - pos)
+            chunk = view[pos:pos + size]
+            try:
+                yield chunk
+            finally:
+                chunk.release()
+            pos += size
+    finally:
+        view.release()
+        mapped.close()
+
+
+def iter_buffer(file_obj, chunk_size):
+    """Yield the content of a file-like object through a reusable buffer.
+
+    A single buffer is allocated up front and refilled for every chunk. The
+    yielded views are only valid until the next chunk is requested, which is
+    fine for requests since it writes every chunk before asking for the next
+    one.
+    """
+    readinto = getattr(file_obj, 'readinto', None)
+    if readinto is None:
+        # NOTE: not every file-like object exposes readinto, so fall back
+        # to plain reads.
+        while True:
+            chunk = file_obj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+        return
+
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    while True:
+        size = readinto(buf)
+        if not size:
+            break
+        yield view[:size]
+
+
+def iter_chunks(file_obj, chunk_size):
+    """Yield the content of a file-like object in chunks of `chunk_size`.
+
+    Regular on-disk files are memory mapped from their current position
+    (see iter_mmap), anything else, like pipes or stdin, is read through a
+    reusable buffer (see iter_buffer). Wrappers which need to see the data,
+    e.g. to hash it, provide their own ``iter_chunks(chunk_size)`` method,
+    which is used instead.
+    """
+    own_iter_chunks = getattr(file_obj, 'iter_chunks', None)
+    if own_iter_chunks is not None:
+        return own_iter_chunks(chunk_size)
+    # NOTE: python 2 mmap objects don't support memoryview.
+    if six.PY3 and is_regular_file(file_obj):
+        return _iter_file_mmap(file_obj, chunk_size)
+    return iter_buffer(file_obj, chunk_size)
+
+
+def _iter_file_mmap(file_obj, chunk_size):
+    offset = file_obj.tell()
+    length = os.fstat(file_obj.fileno()).st_size - offset
+    for chunk in iter_mmap(file_obj, chunk_size, offset, length):
+        yield chunk
+    # Leave the file where a read() based consumer would have.
+    file_obj.seek(offset + length)
+
+
+class ChecksumReader(object):
+    """File-like wrapper computing digests of the data as it is read.
+
+    Hashing happens on the chunks as they are consumed, so the data is only
+    read once.
+
+    :param fileobj: file-like object to read from.
+    :param expected: dict mapping hashlib algorithm names to the expected
+                     hex digest. Every algorithm in it is computed, and once
+                     the end of the data is reached a mismatch raises
+                     ChecksumMismatch, which aborts a streamed upload before
+                     it completes.
+    :param algorithms: names of additional algorithms to compute.
+    """
+
+    def __init__(self, fileobj, expected=None, algorithms=()):
+        self._fileobj = fileobj
+        self._expected = dict((k, v) for k, v in (expected or {}).items()
+                              if v is not None)
+        names = set(algorithms) | set(self._expected)
+        self._hashers = dict((name, hashlib.new(name)) for name in names)
+
+    def _update(self, data):
+        for hasher in self._hashers.values():
+            hasher.update(data)
+
+    def _verify(self):
+        for name, expected in self._expected.items():
+            actual = self._hashers[name].hexdigest()
+            if actual != expected.lower():
+                raise exceptions.ChecksumMismatch(name, expected, actual)
+
+    def __getattr__(self, attr):
+        # Forward other attribute access (seek, tell...) to the wrapped
+        # object.
+        return getattr(self._fileobj, attr)
+
+    def iter_chunks(self, chunk_size):
+        remaining = get_remaining_size(self._fileobj)
+        for chunk in iter_chunks(self._fileobj, chunk_size):
+            self._update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+                if remaining <= 0:
+                    # NOTE: verify before the last chunk goes out, once it
+                    # is sent the server holds the complete data.
+                    self._verify()
+            yield chunk
+        self._verify()
+
+    def readinto(self, buf):
+        size = self._fileobj.readinto(buf)
+        if size:
+            self._update(memoryview(buf)[:size])
+        else:
+            self._verify()
+        return size
+
+    def read(self, *args, **kwargs):
+        data = self._fileobj.read(*args, **kwargs)
+        if data:
+            self._update(data)
+        else:
+            self._verify()
+        return data
+
+    def hexdigests(self):
+        """Return a dict mapping algorithm names to their hex digest."""
+        return dict((name, hasher.hexdigest())
+                    for name, hasher in self._hashers.items())
+
+
+class IterableWithLength(object):
+    """Iterator over response chunks which knows how many bytes it yields.
+
+    :param iterable: iterator over the chunks of data.
+    :param length: number of bytes the iterator will yield, or None if it
+                   is unknown.
+    """
+
+    def __init__(self, iterable, length):
+        self.iterable = iterable
+        self.length = length
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        return six.next(self.iterable)
+
+    # In Python 3, __next__() has replaced next().
+    __next__ = next
+
+
+def iter_response(resp, chunk_size, skip=0):
+    """Lazily yield the body of a streamed response in chunks.
+
+    :param resp: requests.Response obtained with stream=True.
+    :param chunk_size: size of the chunks to read from the response.
+    :param skip: number of leading bytes to drop, used when the server
+                 ignored a Range header and sent the whole content.
+    """
+    try:
+        for chunk in resp.iter_content(chunk_size):
+            if skip:
+                if len(chunk) <= skip:
+                    skip -= len(chunk)
+                    continue
+                chunk = chunk[skip:]
+                skip = 0
+            yield chunk
+    finally:
+        resp.close()
+
+
 def get_data_file(args):
     if args.file:
         return open(args.file, 'rb')
@@ -0,0 +1,248 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Asyncio interface to the subjects, requires python 3.6 or later.
+"""
+
+import logging
+import time
+
+from subjectclient import aio
+from subjectclient import base
+from subjectclient import client
+from subjectclient import exceptions as exc
+from subjectclient import utils
+from subjectclient.v1 import subjects
+from subjectclient.v1 import versions
+
+
+class AsyncIterableWithLength(object):
+    """Async iterator over response chunks which knows how many bytes it
+    yields.
+
+    :param iterable: async iterator over the chunks of data.
+    :param length: number of bytes the iterator will yield, or None if it
+                   is unknown.
+    """
+
+    def __init__(self, iterable, length):
+        self.iterable = iterable
+        self.length = length
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.iterable.__anext__()
+
+
+async def _iter_response(resp, chunk_size, skip=0):
+    async for chunk in resp.iter_content(chunk_size):
+        if skip:
+            if len(chunk) <= skip:
+                skip -= len(chunk)
+                continue
+            chunk = chunk[skip:]
+            skip = 0
+        yield chunk
+
+
+class AsyncSubjectManager(subjects.SubjectManagerMixin, base.Manager):
+    """Coroutine based counterpart of SubjectManager."""
+
+    resource_class = subjects.Subject
+
+    async def _list_page(self, url, page_size=None):
+        resp, body = await self.api.client.get(url)
+        page = self._list_from_body(resp, body, "subjects")
+        return page, self._next_page_url(url, body, page, page_size), resp
+
+    async def list(self, **kwargs):
+        """Retrieve a listing of Subject objects.
+
+        Takes the same arguments as SubjectManager.list() but `prefetch`.
+
+        :returns: async generator over list of Images.
+        """
+        limit = kwargs.get('limit')
+        page_size = kwargs.get('page_size') or subjects.DEFAULT_PAGE_SIZE
+        adaptive = self._adaptive_page_size(page_size, kwargs)
+        if adaptive:
+            page_size = adaptive.size
+
+        next_url = self._list_url(page_size, kwargs)
+        while next_url:
+            size = min(page_size, limit) if limit else page_size
+            next_url = utils.set_query_param(next_url, 'limit', size)
+
+            complete = size
+            if adaptive:
+                complete = adaptive.complete_size(size)
+            start = time.time()
+            page, next_url, resp = await self._list_page(next_url, complete)
+            if adaptive:
+                page_size = adaptive.update(time.time() - start,
+                                            len(resp.content),
+                                            len(page), size)
+            for subject in page:
+                yield subject
+                if limit:
+                    limit -= 1
+                    if limit <= 0:
+                        return
+
+    async def get(self, subject):
+        """Get a subject."""
+        resp, body = await self.api.client.get(
+            '/v1/subjects/%s' % base.getid(subject))
+        return self.resource_class(self, body['subject'], loaded=True,
+                                   resp=resp)
+
+    async def create(self, **kwargs):
+        """Create a subject."""
+        body = self._create_body(kwargs)
+        self.run_hooks('modify_body_for_create', body, **kwargs)
+        resp, body = await self.api.client.post('/v1/subjects', body=body)
+        return self.resource_class(self, body['subject'], resp=resp)
+
+    async def delete(self, subject):
+        """Delete a subject."""
+        resp, body = await self.api.client.delete(
+            '/v1/subjects/%s' % base.getid(subject))
+        return self.convert_into_with_meta(body, resp)
+
+    async def data(self, subject, chunk_size=client.CHUNKSIZE,
+                   byte_range=None):
+        """Retrieve the data of a subject.
+
+        Takes the same arguments as SubjectManager.data().
+
+        :returns: lazy async iterator over the chunks of data, its `length`
+                  attribute is the number of bytes it will yield (or None if
+                  the server didn't tell).
+        """
+        url, hdrs, start = self._data_request(subject, byte_range)
+        resp, body = await self.api.client.get(url, headers=hdrs,
+                                               stream=True)
+        skip, length = self._data_skip_and_length(resp, start)
+        return AsyncIterableWithLength(
+            _iter_response(resp, chunk_size, skip), length)
+
+    async def upload(self, subject_id, subject_data, subject_size=None,
+                     checksum=None, sha256=None):
+        """Upload the data for a subject.
+
+        The data is streamed in a single request, see SubjectManager.upload()
+        for the checksum arguments.
+
+        :returns: dict of the hex digests computed for the data.
+        :raises: ChecksumMismatch if the data doesn't match the expected or
+                 the server-reported checksum.
+        """
+        url = '/v1/images/%s/file' % subject_id
+        hdrs = {'Content-Type': 'application/octet-stream'}
+        body = utils.ChecksumReader(subject_data,
+                                    expected={'md5': checksum,
+                                              'sha256': sha256},
+                                    algorithms=('md5',))
+        resp, resp_body = await self.api.client.put(url, headers=hdrs,
+                                                    body=body)
+
+        digests = body.hexdigests()
+        server_checksum = subjects._get_server_checksum(resp, resp_body)
+        if server_checksum and server_checksum != digests['md5']:
+            raise exc.ChecksumMismatch('md5', server_checksum,
+                                       digests['md5'])
+        return base.DictWithMeta(digests, resp)
+
+
+class AsyncVersionManager(versions.VersionManager):
+    """Coroutine based counterpart of VersionManager."""
+
+    async def get_current(self):
+        version = self._get_cached()
+        if version is not None:
+            return version
+        try:
+            resp, body = await self.api.client.get(None)
+        except exc.Unauthorized:
+            # NOTE: see VersionManager.get_current.
+            return None
+        version = self._find_current(
+            self._list_from_body(resp, body, "versions"))
+        self._save(version)
+        return version
+
+    async def list(self):
+        """List all versions."""
+        resp, body = await self.api.client.get(None)
+        return self._list_from_body(resp, body, "versions")
+
+
+class Client(object):
+    """Top-level asyncio object to access the Subject API.
+
+    .. warning:: It should be initialized via `subjectclient.aio.Client`.
+
+    Takes the same arguments as subjectclient.v1.client.Client plus
+    `transport`, see subjectclient.aio.AsyncHTTPClient.
+    """
+
+    def __init__(self, username=None, api_key=None, project_id=None,
+                 auth_url=None, service_type='subject', os_cache=False,
+                 no_cache=True, logger=None, version_cache=None, **kwargs):
+        password = kwargs.pop('password', api_key)
+        kwargs.pop('direct_use', None)
+        self.projectid = project_id
+        self.tenant_id = kwargs.get('tenant_id')
+        self.user_id = kwargs.get('user_id')
+        self.os_cache = os_cache or not no_cache
+        self.version_cache = version_cache
+
+        self.subjects = AsyncSubjectManager(self)
+        self.versions = AsyncVersionManager(self)
+
+        self.client = aio.AsyncHTTPClient(
+            username, password, projectid=project_id, auth_url=auth_url,
+            service_type=service_type, os_cache=self.os_cache,
+            logger=logger or logging.getLogger(__name__), **kwargs)
+
+    @property
+    def api_version(self):
+        return self.client.api_version
+
+    @api_version.setter
+    def api_version(self, value):
+        self.client.api_version = value
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, t, v, tb):
+        await self.close()
+
+    async def close(self):
+        """Release the connections held by the client."""
+        await self.client.close()
+
+    def get_timings(self):
+        return self.client.get_timings()
+
+    def reset_timings(self):
+        self.client.reset_timings()
+
+    async def authenticate(self):
+        """Authenticate against the server, see
+        subjectclient.v1.client.Client.authenticate().
+        """
+        await self.client.authenticate()
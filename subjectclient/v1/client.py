@@ -42,7 +42,12 @@ class Client(object):
                  auth_system='keystone', auth_plugin=None, auth_token=None,
                  cacert=None, tenant_id=None, user_id=None,
                  connection_pool=False, session=None, auth=None,
-                 api_version=None, direct_use=True, logger=None, **kwargs):
+                 api_version=None, direct_use=True, logger=None,
+                 thread_safe=False, pool_connections=None,
+                 pool_maxsize=None, pool_block=None, transport=None,
+                 retry_policy=None, circuit_breaker=None,
+                 hedging_policy=None, token_refresh_margin=None,
+                 version_cache=None, **kwargs):
         """Initialization of Client object.
 
         :param str username: Username
@@ -71,12 +76,36 @@ class Client(object):
         :param str tenant_id: Tenant ID
         :param str user_id: User ID
         :param bool connection_pool: Use a connection pool
+        :param int pool_connections: Number of per-host pools cached by the
+            connection pool for each service URL
+        :param int pool_maxsize: Maximum number of connections kept per host
+            by the connection pool
+        :param bool pool_block: Wait for a connection to be released rather
+            than opening one more when the connection pool is exhausted
+        :param transport: requests transport adapter sending the requests,
+            e.g. subjectclient.http2.HTTP2Adapter
+        :param retry_policy: subjectclient.retry.RetryPolicy of the requests
+            failing for a transient reason, they are not retried by default
+        :param circuit_breaker: subjectclient.circuit_breaker.CircuitBreaker
+            failing fast the requests to service URLs which keep failing
+        :param hedging_policy: subjectclient.hedging.HedgingPolicy sending a
+            duplicate of the reads which are slow to answer
+        :param int token_refresh_margin: Obtain a new token in the background
+            that many seconds before the current one expires, instead of
+            after a request fails with a 401. Only applies when no session
+            is given, keystoneauth sessions do it themselves.
+        :param version_cache: subjectclient.version_cache.VersionCache of the
+            versions discovered, by endpoint
         :param str session: Session
         :param str auth: Auth
         :param api_version: Compute API version
         :param direct_use: Inner variable of subjectclient. Do not use it outside
             subjectclient. It's restricted.
         :param logger: Logger
+        :param bool thread_safe: Allow the client to be shared by several
+            threads: re-authentication happens once for all of them, request
+            ids and timings are kept per thread. Only applies when no
+            session is given, keystoneauth sessions handle it themselves.
         :type api_version: subjectclient.api_versions.APIVersion
         """
         if direct_use:
@@ -101,16 +130,13 @@ class Client(object):
         self.tenant_id = tenant_id
         self.user_id = user_id
         self.os_cache = os_cache or not no_cache
+        self.version_cache = version_cache
 
         self.versions = versions.VersionManager(self)
         self.subjects = subjects.SubjectManager(self)
 
         # Add in any extensions...
-        if extensions:
-            for extension in extensions:
-                if extension.manager_class:
-                    setattr(self, extension.name,
-                            extension.manager_class(self))
+        self.add_extensions(extensions)
 
         if not logger:
             logger = logging.getLogger(__name__)
@@ -144,8 +170,40 @@ class Client(object):
             auth=auth,
             api_version=api_version,
             logger=logger,
+            thread_safe=thread_safe,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            transport=transport,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            hedging_policy=hedging_policy,
+            token_refresh_margin=token_refresh_margin,
             **kwargs)
 
+    def add_extensions(self, extensions):
+        """Add the managers of `extensions` as attributes of the client.
+
+        The modules of the extensions not imported yet are imported when
+        their manager is first used.
+        """
+        for extension in extensions or ():
+            if not extension.loaded:
+                self.__dict__.setdefault('_lazy_extensions', {})[
+                    extension.name] = extension
+            elif extension.manager_class:
+                setattr(self, extension.name, extension.manager_class(self))
+
+    def __getattr__(self, name):
+        # NOTE: only called for the attributes not found, which include the
+        # managers of the extensions not imported yet.
+        extension = self.__dict__.get('_lazy_extensions', {}).pop(name, None)
+        if extension is None or not extension.manager_class:
+            raise AttributeError(name)
+        manager = extension.manager_class(self)
+        setattr(self, name, manager)
+        return manager
+
     @property
     def api_version(self):
         return self.client.api_version
@@ -170,6 +228,10 @@ class Client(object):
     def get_timings(self):
         return self.client.get_timings()
 
+    @client._original_only
+    def get_pool_stats(self):
+        return self.client.get_pool_stats()
+
     def reset_timings(self):
         self.client.reset_timings()
 
@@ -22,6 +22,8 @@ import argparse
 import functools
 import logging
 import os
+import sys
+import uuid
 
 
 from oslo_utils import encodeutils
@@ -34,6 +36,7 @@ from subjectclient.i18n import _
 from subjectclient.i18n import _LE
 from subjectclient import utils
 from subjectclient import progressbar
+from subjectclient.v1 import subjects
 
 
 logger = logging.getLogger(__name__)
@@ -58,6 +61,7 @@ SUBJECT_FORMATS = 'Acceptable formats: src, template, subject, answer.'
 TAR_FORMATS = ('Acceptable formats: rar, tar, gzip, zip.')
 PHASE = ('Beginner, Intermediate, Advanced, Challenge')
 LANGUAGE = ('C/C++, JAVA, Python, GO, JavaScript, Ruby, Lua')
+CHECKSUM_ALGORITHMS = ('md5', 'sha256')
 
 _bool_strict = functools.partial(strutils.bool_from_string, strict=True)
 
@@ -184,15 +188,164 @@ def do_subject_create(gc, args):
            default=None)
 @utils.arg('--progress', action='store_true', default=False,
            help=_('Show upload progress bar.'))
+@utils.arg('--parallel', metavar='<N>', type=int, default=None,
+           help=_('Upload the data as byte ranges over N connections at '
+                  'once. Only used when the size of the data is known.'))
+@utils.arg('--checksum', metavar='<CHECKSUM>',
+           help=_('Checksum of the data. The upload is aborted if the '
+                  'data does not match it. Not supported with --parallel.'))
+@utils.arg('--checksum-algorithm', metavar='<ALGORITHM>',
+           choices=CHECKSUM_ALGORITHMS, default='md5',
+           help=_('Algorithm of --checksum, one of %s. Defaults to md5.') %
+           ', '.join(CHECKSUM_ALGORITHMS))
+@utils.arg('--part-size', metavar='<BYTES>', type=int,
+           default=subjects.DEFAULT_PART_SIZE,
+           help=_('Size in bytes of each part of a parallel upload. '
+                  'Defaults to %d.') % subjects.DEFAULT_PART_SIZE)
 @utils.arg('id', metavar='<SUBJECT_ID>',
            help=_('ID of subject to upload data to.'))
 def do_subject_upload(gc, args):
     """Upload data for a specific image."""
+    parallel = getattr(args, 'parallel', None)
+    if args.checksum and parallel and parallel > 1:
+        # NOTE: the parts of a parallel upload are read out of order, the
+        # checksum of the data can't be computed while they are sent.
+        raise exceptions.CommandError(
+            _('--checksum is not supported with --parallel.'))
     subject_data = utils.get_data_file(args)
     if args.progress:
         filesize = utils.get_file_size(subject_data)
         if filesize is not None:
             # NOTE(kragniz): do not show a progress bar if the size of the
             # input is unknown (most likely a piped input)
-            image_data = progressbar.VerboseFileWrapper(subject_data, filesize)
-    gc.subjects.upload(args.id, subject_data, args.size)
\ No newline at end of file
+            subject_data = progressbar.VerboseFileWrapper(subject_data,
+                                                          filesize)
+    # NOTE: subject-create passes its own arguments, which only take an md5
+    # checksum.
+    checksums = {getattr(args, 'checksum_algorithm', 'md5'): args.checksum}
+    gc.subjects.upload(args.id, subject_data, args.size,
+                       concurrency=parallel,
+                       part_size=getattr(args, 'part_size',
+                                         subjects.DEFAULT_PART_SIZE),
+                       checksum=checksums.get('md5'),
+                       sha256=checksums.get('sha256'))
+
+
+def _save_data(data, path, append=False):
+    if path is None:
+        out = getattr(sys.stdout, 'buffer', sys.stdout)
+    else:
+        out = open(path, 'ab' if append else 'wb')
+    try:
+        for chunk in data:
+            out.write(chunk)
+    finally:
+        if path is not None:
+            out.close()
+
+
+@utils.arg('--file', metavar='<FILE>',
+           help=_('Local file to save downloaded subject data to. '
+                  'If this is not specified and there is no redirection '
+                  'the subject data will not be saved.'))
+@utils.arg('--resume', action='store_true', default=False,
+           help=_('Continue an interrupted download into <FILE> from its '
+                  'current size instead of starting over.'))
+@utils.arg('--progress', action='store_true', default=False,
+           help=_('Show download progress bar.'))
+@utils.arg('id', metavar='<SUBJECT_ID>',
+           help=_('ID of subject to download.'))
+def do_subject_download(gc, args):
+    """Download data for a specific subject."""
+    if args.file is None and sys.stdout.isatty():
+        raise exceptions.CommandError(
+            _('No redirection or local file specified for downloaded '
+              'subject data. Please specify a local file with --file to '
+              'save downloaded subject or redirect output to another '
+              'source.'))
+    if args.resume and args.file is None:
+        raise exceptions.CommandError(_('--resume requires --file.'))
+
+    offset = 0
+    if args.resume and os.path.exists(args.file):
+        offset = os.path.getsize(args.file)
+
+    try:
+        body = gc.subjects.data(args.id, byte_range=offset or None)
+    except exceptions.ClientException as e:
+        if offset and e.code == 416:
+            # NOTE: the local file already holds the whole subject data.
+            return
+        raise
+
+    if args.progress and body.length is not None:
+        body = progressbar.VerboseIteratorWrapper(body, body.length)
+    _save_data(body, args.file, append=bool(offset))
+
+
+def _find_subject_ids(gc, names_or_ids):
+    """Return the IDs of subjects given by name or ID, in the same order.
+
+    All the names are looked up in a single listing of the subjects.
+    """
+    names = set()
+    for name_or_id in names_or_ids:
+        try:
+            uuid.UUID(name_or_id)
+        except ValueError:
+            names.add(name_or_id)
+
+    found = {}
+    if names:
+        for subject in gc.subjects.list():
+            name = getattr(subject, 'name', None)
+            if name in names:
+                found.setdefault(name, []).append(subject.id)
+
+    ids = []
+    for name_or_id in names_or_ids:
+        if name_or_id not in names:
+            ids.append(name_or_id)
+        elif not found.get(name_or_id):
+            raise exceptions.CommandError(
+                _("No subject with a name or ID of '%s' exists.") %
+                name_or_id)
+        elif len(found[name_or_id]) > 1:
+            raise exceptions.CommandError(
+                _("Multiple subject matches found for '%s', use an ID to "
+                  "be more specific.") % name_or_id)
+        else:
+            ids.append(found[name_or_id][0])
+    return ids
+
+
+@utils.arg('--concurrency', metavar='<N>', type=int,
+           default=subjects.DEFAULT_BULK_CONCURRENCY,
+           help=_('Number of subjects deleted at the same time. '
+                  'Defaults to %d.') % subjects.DEFAULT_BULK_CONCURRENCY)
+@utils.arg('--rate', metavar='<PER_SECOND>', type=float, default=None,
+           help=_('Maximum number of delete requests sent per second. '
+                  'Not limited by default.'))
+@utils.arg('subject', metavar='<SUBJECT>', nargs='+',
+           help=_('Name or ID of subject(s) to delete.'))
+def do_subject_delete(gc, args):
+    """Delete specified subject(s)."""
+    if args.concurrency < 1:
+        raise exceptions.CommandError(_('--concurrency must be at least 1.'))
+    if args.rate is not None and args.rate <= 0:
+        raise exceptions.CommandError(_('--rate must be greater than 0.'))
+
+    ids = _find_subject_ids(gc, args.subject)
+    failure_flag = False
+    for result in gc.subjects.delete_many(ids, concurrency=args.concurrency,
+                                          rate=args.rate):
+        if result.error is None:
+            print(_("Request to delete subject %s has been accepted.") %
+                  args.subject[result.index])
+        else:
+            failure_flag = True
+            print(encodeutils.safe_encode(six.text_type(result.error)))
+
+    if failure_flag:
+        raise exceptions.CommandError(
+            _("Unable to delete the specified subject(s)."))
@@ -20,16 +20,23 @@ Server interface.
 """
 
 import base64
+import collections
+import os
+import threading
+import time
 
+from concurrent import futures
 from oslo_utils import encodeutils
 import six
 import six.moves.urllib.parse as urlparse
 
 from subjectclient import api_versions
 from subjectclient import base
+from subjectclient import client
 from subjectclient import crypto
 from subjectclient import exceptions as exc
 from subjectclient.i18n import _
+from subjectclient import retry
 from subjectclient import utils
 
 
@@ -46,12 +53,270 @@ CREATE_PARAMS = UPDATE_PARAMS + ("id", "id")
 
 DEFAULT_PAGE_SIZE = 20
 
+# Bounds used when the page size adapts to the observed response times.
+DEFAULT_MIN_PAGE_SIZE = 5
+DEFAULT_MAX_PAGE_SIZE = 1000
+DEFAULT_TARGET_PAGE_TIME = 1.0  # seconds
+DEFAULT_MAX_PAGE_BYTES = 4 * 1024 * 1024  # 4MB
+
+DEFAULT_LIST_WORKERS = 4
+
+DEFAULT_PART_SIZE = 64 * 1024 * 1024  # 64MB
+DEFAULT_PART_RETRIES = 3
+
+DEFAULT_BULK_CONCURRENCY = 8
+DEFAULT_RATE_LIMIT_RETRIES = 5
+
 SORT_DIR_VALUES = ('asc', 'desc')
 SORT_KEY_VALUES = ('name', 'status', 'subject_format', 'tar_format',
                    'size', 'id', 'created_at', 'updated_at')
 
 OS_REQ_ID_HDR = 'x-ojj-request-id'
 
+# Outcome of one item of a bulk operation: `index` is its position in the
+# input, `item` the input itself, `result` what the operation returned and
+# `error` the exception it raised, if any.
+BulkResult = collections.namedtuple('BulkResult',
+                                    ['index', 'item', 'result', 'error'])
+
+
+class _AdaptivePageSize(object):
+    """Pick the size of the next page from how the previous one went.
+
+    The size doubles while pages come back in less than half of
+    `target_time` and below `max_bytes`, and is halved as soon as a page
+    takes longer than `target_time` or is bigger than `max_bytes`. It always
+    stays between `minimum` and `maximum`.
+
+    Servers capping the page size return short pages once the size grows
+    past their cap, see complete_size.
+    """
+
+    def __init__(self, initial, minimum=DEFAULT_MIN_PAGE_SIZE,
+                 maximum=DEFAULT_MAX_PAGE_SIZE,
+                 target_time=DEFAULT_TARGET_PAGE_TIME,
+                 max_bytes=DEFAULT_MAX_PAGE_BYTES):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_time = target_time
+        self.max_bytes = max_bytes
+        self.size = self._clamp(initial)
+        # Biggest page returned so far, the cap of the server (if any) is at
+        # least that.
+        self.served = self.size
+
+    def _clamp(self, size):
+        return int(min(max(size, self.minimum), self.maximum))
+
+    def complete_size(self, size):
+        """Return the number of subjects a page requested with `size` holds
+        unless it is the last one.
+
+        A page shorter than `size` may have been cut by the server rather
+        than be the last one, unless it is shorter than a page the server
+        already returned.
+        """
+        return min(size, self.served)
+
+    def update(self, elapsed, nbytes, count=None, requested=None):
+        """Account for a page fetched in `elapsed` seconds, `nbytes` long.
+
+        :param count: number of subjects in the page.
+        :param requested: number of subjects requested for the page.
+        :returns: the size to request for the next page.
+        """
+        if count is not None and requested is not None:
+            if self.served <= count < requested:
+                # NOTE: the server capped the page, asking for more only
+                # gets short pages.
+                self.maximum = count
+                self.minimum = min(self.minimum, count)
+            self.served = max(self.served, count)
+        if elapsed > self.target_time or nbytes > self.max_bytes:
+            self.size = self._clamp(self.size // 2)
+        elif elapsed < self.target_time / 2 and nbytes < self.max_bytes / 2:
+            self.size = self._clamp(self.size * 2)
+        return self.size
+
+
+class _RangeReader(object):
+    """File-like view over `length` bytes of `fileobj` starting at `offset`.
+
+    Several readers may share the same underlying file object; `lock`
+    serializes their seek/read pairs so concurrent parts don't interfere.
+    """
+
+    def __init__(self, fileobj, offset, length, lock):
+        self._fileobj = fileobj
+        self._offset = offset
+        self._length = length
+        self._lock = lock
+        self._pos = 0
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._length
+        self._pos = min(max(offset, 0), self._length)
+        return self._pos
+
+    def iter_chunks(self, chunk_size):
+        # NOTE: map the range of plain regular files so parts don't copy
+        # the data, wrappers (e.g. a progress bar) need to see it so they
+        # are read through a buffer.
+        if (six.PY3 and not hasattr(self._fileobj, 'iter_chunks') and
+                utils.is_regular_file(self._fileobj)):
+            for chunk in utils.iter_mmap(self._fileobj, chunk_size,
+                                         self._offset + self._pos,
+                                         self._length - self._pos):
+                self._pos += len(chunk)
+                yield chunk
+        else:
+            for chunk in utils.iter_buffer(self, chunk_size):
+                yield chunk
+
+    def readinto(self, buf):
+        view = memoryview(buf)[:self._length - self._pos]
+        if not len(view):
+            return 0
+        with self._lock:
+            self._fileobj.seek(self._offset + self._pos)
+            size = self._fileobj.readinto(view) or 0
+        self._pos += size
+        return size
+
+    def read(self, size=-1):
+        remaining = self._length - self._pos
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        if not size:
+            return b''
+        with self._lock:
+            self._fileobj.seek(self._offset + self._pos)
+            data = self._fileobj.read(size)
+        self._pos += len(data)
+        return data
+
+
+def _id_boundaries(count):
+    """Split the space of hexadecimal ids into `count` even ranges."""
+    return ['%08x' % (i * 0x100000000 // count) for i in range(1, count)]
+
+
+def _iter_range(pages, key, lower, upper):
+    """Keep the subjects of `pages` whose `key` is in ]lower, upper].
+
+    Servers ignoring the range filters of a parallel listing return all the
+    subjects, the pages have to be sorted by `key` in ascending order for
+    the iteration to stop once past `upper`. A missing value comes before
+    any other.
+    """
+    try:
+        for subjects in pages:
+            in_range = []
+            for subject in subjects:
+                value = getattr(subject, key, None)
+                if upper is not None and value is not None and value > upper:
+                    if in_range:
+                        yield in_range
+                    return
+                if lower is None or value is not None and value > lower:
+                    in_range.append(subject)
+            if in_range:
+                yield in_range
+    finally:
+        pages.close()
+
+
+def _get_server_checksum(resp, body):
+    """Extract the checksum the server computed for uploaded data."""
+    checksum = resp.headers.get('x-subject-meta-checksum')
+    if not checksum and isinstance(body, dict):
+        checksum = (body.get('subject') or {}).get('checksum')
+    return checksum
+
+
+class SubjectCursor(object):
+    """Resumable position in a listing of subjects.
+
+    Iterating over the cursor yields the subjects, requesting the next page
+    with the last subject received as marker until a short or empty page is
+    returned. `state` describes the position right after the last subject
+    yielded; it is made of strings and integers only so it can be saved
+    (e.g. as JSON) and handed to SubjectManager.cursor() to carry on with the
+    listing later, from another process if need be.
+    """
+
+    def __init__(self, manager, url, page_size, limit=None, prefetch=None,
+                 adaptive=None):
+        self.manager = manager
+        self.url = url
+        self.page_size = page_size
+        self.limit = limit
+        self.prefetch = prefetch
+        self.adaptive = adaptive
+        self.marker = None
+
+    @property
+    def state(self):
+        url = self.url
+        if self.marker:
+            url = utils.set_query_param(url, 'marker', self.marker)
+        return {'url': url, 'page_size': self.page_size, 'limit': self.limit}
+
+    def _fetch_pages(self):
+        next_url = self.state['url']
+        page_size = self.page_size
+        limit = self.limit
+
+        while next_url:
+            # NOTE(flaper87): Avoid requesting 2000 images when limit is 1
+            size = min(page_size, limit) if limit else page_size
+            next_url = utils.set_query_param(next_url, 'limit', size)
+
+            complete = size
+            if self.adaptive:
+                complete = self.adaptive.complete_size(size)
+            start = time.time()
+            subjects, next_url, resp = self.manager._list_page(next_url,
+                                                               complete)
+            if self.adaptive:
+                page_size = self.adaptive.update(time.time() - start,
+                                                 len(resp.content),
+                                                 len(subjects), size)
+                self.page_size = page_size
+            yield subjects
+            if limit:
+                limit -= len(subjects)
+                if limit <= 0:
+                    return
+
+    def __iter__(self):
+        if self.limit is not None and self.limit <= 0:
+            return
+
+        pages = self._fetch_pages()
+        if self.prefetch:
+            pages = utils.prefetch(pages, self.prefetch)
+
+        for subjects in pages:
+            for subject in subjects:
+                # NOTE: move the position before handing the subject out so
+                # a state saved while processing it resumes after it.
+                self.marker = subject.id
+                if self.limit:
+                    self.limit -= 1
+                yield subject
+                if self.limit is not None and self.limit <= 0:
+                    return
+
 
 class Subject(base.Resource):
     def __repr__(self):
@@ -67,41 +332,75 @@ class Subject(base.Resource):
         return self.manager.data(self, **kwargs)
 
 
-class SubjectManager(base.BootingManagerWithFind):
-    resource_class = Subject
+class SubjectManagerMixin(object):
+    """Request building shared by the subject managers.
 
-    def list(self, **kwargs):
-        """Retrieve a listing of Subject objects.
+    Used by SubjectManager and by the asyncio manager of
+    subjectclient.v1.aio.
+    """
 
-        :param page_size: Number of images to request in each
-                          paginated request.
-        :returns: generator over list of Images.
-        """
+    @staticmethod
+    def _wrap(value):
+        if isinstance(value, six.string_types):
+            return [value]
+        return value
 
-        limit = kwargs.get('limit')
-        # NOTE(flaper87): Don't use `get('page_size', DEFAULT_SIZE)` otherwise,
-        # it could be possible to send invalid data to the server by passing
-        # page_size=None.
-        page_size = kwargs.get('page_size') or DEFAULT_PAGE_SIZE
-
-        def paginate(url, page_size, limit=None):
-            next_url = url
-
-            while True:
-                if limit and page_size > limit:
-                    # NOTE(flaper87): Avoid requesting 2000 images when limit
-                    # is 1
-                    next_url = next_url.replace("limit=%s" % page_size,
-                                                "limit=%s" % limit)
-
-                temp_subjects = self._list(next_url, "subjects")
-                for subject in temp_subjects:
-                    yield subject
-                    if limit:
-                        limit -= 1
-                        if limit <= 0:
-                            raise StopIteration
+    @staticmethod
+    def _validate_sort_param(sort):
+        """Validates sorting argument for invalid keys and directions values.
 
+        :param sort: comma-separated list of sort keys with optional <:dir>
+                     after each key
+        """
+        for sort_param in sort.strip().split(','):
+            key, _sep, dir = sort_param.partition(':')
+            if dir and dir not in SORT_DIR_VALUES:
+                msg = ('Invalid sort direction: %(sort_dir)s.'
+                       ' It must be one of the following: %(available)s.'
+                       ) % {'sort_dir': dir,
+                            'available': ', '.join(SORT_DIR_VALUES)}
+                raise exc.BadRequest(msg)
+            if key not in SORT_KEY_VALUES:
+                msg = ('Invalid sort key: %(sort_key)s.'
+                       ' It must be one of the following: %(available)s.'
+                       ) % {'sort_key': key,
+                            'available': ', '.join(SORT_KEY_VALUES)}
+                raise exc.BadRequest(msg)
+        return sort.strip()
+
+    @staticmethod
+    def _next_page_url(url, body, subjects, page_size=None):
+        """Return the URL of the page following the one fetched from `url`.
+
+        The URL is taken from the `next` link returned by the server or,
+        failing that, built with the last subject as marker. It is None once
+        a page with fewer subjects than `page_size`, or none, is returned.
+        """
+        if body.get('next'):
+            return body['next']
+        if not subjects or (page_size and len(subjects) < page_size):
+            # NOTE: servers capping the page size below what was asked for
+            # are expected to send a `next` link, nothing is left otherwise
+            # (adaptive listings don't rely on it, see
+            # _AdaptivePageSize.complete_size).
+            return None
+        return utils.set_query_param(url, 'marker', subjects[-1].id)
+
+    @staticmethod
+    def _adaptive_page_size(page_size, kwargs):
+        """Return an _AdaptivePageSize if the listing arguments ask for it."""
+        if not kwargs.get('adaptive_page_size'):
+            return None
+        return _AdaptivePageSize(
+            page_size,
+            minimum=kwargs.get('min_page_size') or DEFAULT_MIN_PAGE_SIZE,
+            maximum=kwargs.get('max_page_size') or DEFAULT_MAX_PAGE_SIZE,
+            target_time=(kwargs.get('target_page_time') or
+                         DEFAULT_TARGET_PAGE_TIME),
+            max_bytes=(kwargs.get('max_page_bytes') or
+                       DEFAULT_MAX_PAGE_BYTES))
+
+    def _list_url(self, page_size, kwargs):
         filters = kwargs.get('filters', {})
         # NOTE(flaper87): We paginate in the client, hence we use
         # the page_size as Glance's limit.
@@ -150,18 +449,35 @@ class SubjectManager(base.BootingManagerWithFind):
         if isinstance(kwargs.get('marker'), six.string_types):
             url = '%s&marker=%s' % (url, kwargs['marker'])
 
-        for image in paginate(url, page_size, limit):
-            yield image
-
-    def delete(self, subject_id):
-        """Delete an image."""
-        url = '/v1/subjects/%s' % subject_id
-        self._delete(url)
-
-    def create(self, **kwargs):
-        """Create an image."""
-        resource_url = '/v1/subjects'
-
+        return url
+
+    @staticmethod
+    def _data_request(subject, byte_range=None):
+        """Return the URL, headers and start offset to download data."""
+        url = '/v1/images/%s/file' % base.getid(subject)
+        hdrs = {}
+        start = 0
+        if byte_range is not None:
+            if isinstance(byte_range, six.integer_types):
+                byte_range = (byte_range, None)
+            start, end = byte_range
+            hdrs['Range'] = 'bytes=%d-%s' % (start,
+                                             '' if end is None else end)
+        return url, hdrs, start
+
+    @staticmethod
+    def _data_skip_and_length(resp, start):
+        """Return the bytes to skip and the length left of downloaded data."""
+        # NOTE: a server which doesn't support ranges answers 200 with the
+        # whole content, drop what the caller asked to skip.
+        skip = start if resp.status_code != 206 else 0
+        length = resp.headers.get('Content-Length')
+        if length is not None:
+            length = max(int(length) - skip, 0)
+        return skip, length
+
+    @staticmethod
+    def _create_body(kwargs):
         image_data = kwargs.pop('data', None)
         if image_data is not None:
             image_size = utils.get_file_size(image_data)
@@ -180,17 +496,388 @@ class SubjectManager(base.BootingManagerWithFind):
                 continue
 
         body['subject'] = fields
+        return body
+
+
+class SubjectManager(SubjectManagerMixin, base.BootingManagerWithFind):
+    resource_class = Subject
+
+    def _list_page(self, url, page_size=None):
+        """Fetch a page of subjects.
 
+        :param page_size: Number of subjects in the page unless it is the
+                          last one.
+        :returns: tuple of the subjects, the URL of the next page (see
+                  _next_page_url) and the response.
+        """
+        resp, body = self.api.client.get(url)
+        subjects = self._list_from_body(resp, body, "subjects")
+        return subjects, self._next_page_url(url, body, subjects,
+                                             page_size), resp
+
+    def cursor(self, state=None, **kwargs):
+        """Return a resumable cursor over a listing of subjects.
+
+        :param state: `state` of a previous cursor to resume the listing
+                      from. The filtering, sorting, marker, limit and
+                      page_size arguments are taken from it and ignored.
+        :param kwargs: same arguments as list().
+        :rtype: :class:`SubjectCursor`
+        """
+        prefetch = kwargs.get('prefetch')
+        if state:
+            url = state['url']
+            page_size = state['page_size']
+            limit = state.get('limit')
+        else:
+            # NOTE: a limit of 0 doesn't limit the listing, while the limit
+            # of a state is what is left of it.
+            limit = kwargs.get('limit') or None
+            # NOTE(flaper87): Don't use `get('page_size', DEFAULT_SIZE)`
+            # otherwise, it could be possible to send invalid data to the
+            # server by passing page_size=None.
+            page_size = kwargs.get('page_size') or DEFAULT_PAGE_SIZE
+
+        adaptive = self._adaptive_page_size(page_size, kwargs)
+        if adaptive:
+            page_size = adaptive.size
+
+        if not state:
+            url = self._list_url(page_size, kwargs)
+
+        return SubjectCursor(self, url, page_size, limit=limit,
+                             prefetch=prefetch, adaptive=adaptive)
+
+    def list(self, **kwargs):
+        """Retrieve a listing of Subject objects.
+
+        :param page_size: Number of images to request in each
+                          paginated request.
+        :param prefetch: Number of pages fetched ahead in a background thread
+                         while the current page is being consumed. Pages are
+                         fetched one after the other when not set.
+        :param adaptive_page_size: Grow or shrink the page size between
+                                   pages, starting from `page_size`, based on
+                                   how long the pages take and how big they
+                                   are.
+        :param min_page_size: Smallest page size used in adaptive mode.
+        :param max_page_size: Biggest page size used in adaptive mode.
+        :param target_page_time: Time in seconds a page should take in
+                                 adaptive mode.
+        :param max_page_bytes: Size in bytes a page body should not exceed in
+                               adaptive mode.
+        :returns: generator over list of Images.
+        """
+        for image in self.cursor(**kwargs):
+            yield image
+
+    def list_parallel(self, workers=DEFAULT_LIST_WORKERS, key='id',
+                      boundaries=None, ordered=False, **kwargs):
+        """Retrieve a listing of Subject objects, several ranges at a time.
+
+        The values of `key` are split into disjoint ranges, each one listed
+        in ascending `key` order by its own background thread. The ranges
+        are sent to the server as `<key>_gt` and `<key>_lte` filters, and
+        enforced on the client for servers which ignore them.
+
+        :param workers: Number of ranges listed concurrently.
+        :param key: Sort key the ranges are made of, e.g. `id` or
+                    `created_at`.
+        :param boundaries: Sorted values the ranges are split at, there is
+                           one range more than boundaries. When `key` is
+                           `id` they default to `workers` even ranges of
+                           hexadecimal ids; they are required for any other
+                           key.
+        :param ordered: Yield the subjects in `key` order, the ranges after
+                        the one being consumed are only fetched `prefetch`
+                        pages ahead. Subjects are yielded as soon as their
+                        page is received otherwise.
+        :param prefetch: Number of pages of each range fetched ahead,
+                         defaults to 1.
+        :param kwargs: same arguments as list() except the sorting ones and
+                       `marker`.
+        :returns: generator over list of Images.
+        """
+        if key not in SORT_KEY_VALUES:
+            raise exc.BadRequest(
+                'Invalid sort key: %(sort_key)s. It must be one of the '
+                'following: %(available)s.' % {
+                    'sort_key': key,
+                    'available': ', '.join(SORT_KEY_VALUES)})
+        for arg in ('sort', 'sort_key', 'sort_dir', 'marker'):
+            if arg in kwargs:
+                raise exc.BadRequest("The '%s' argument is not supported "
+                                     "by parallel listings." % arg)
+        if boundaries is None:
+            if key != 'id':
+                raise exc.BadRequest("Boundaries are required to split "
+                                     "the '%s' key in ranges." % key)
+            boundaries = _id_boundaries(workers)
+
+        limit = kwargs.pop('limit', None)
+        if limit:
+            # NOTE: the ranges don't know how many of their subjects are
+            # used, they only request pages that small.
+            kwargs['page_size'] = min(
+                kwargs.get('page_size') or DEFAULT_PAGE_SIZE, limit)
+        depth = kwargs.pop('prefetch', None) or 1
+        filters = kwargs.pop('filters', None) or {}
+        bounds = [None] + list(boundaries) + [None]
+
+        shards = []
+        for lower, upper in zip(bounds[:-1], bounds[1:]):
+            shard_filters = dict(filters)
+            if lower is not None:
+                shard_filters['%s_gt' % key] = lower
+            if upper is not None:
+                shard_filters['%s_lte' % key] = upper
+            shard = self.cursor(filters=shard_filters, sort_key=key,
+                                sort_dir='asc', **kwargs)
+            shards.append(_iter_range(shard._fetch_pages(), key, lower,
+                                      upper))
+
+        for subjects in utils.iter_parallel(shards, depth, ordered=ordered):
+            for subject in subjects:
+                yield subject
+                if limit:
+                    limit -= 1
+                    if limit <= 0:
+                        return
+
+    def _check_concurrency(self, concurrency):
+        """Refuse to share a client which isn't thread safe between several
+        workers.
+
+        :raises: InvalidUsage
+        """
+        http_client = self.api.client
+        if (concurrency > 1 and isinstance(http_client, client.HTTPClient)
+                and not http_client.thread_safe):
+            raise exc.InvalidUsage(
+                _("A concurrency of %d requires a thread safe client, see "
+                  "the thread_safe argument of Client.") % concurrency)
+
+    def data(self, subject, chunk_size=client.CHUNKSIZE, byte_range=None):
+        """Retrieve the data of a subject.
+
+        :param subject: Subject object or ID to download data for.
+        :param chunk_size: Size in bytes of the chunks the data is read in.
+        :param byte_range: Only fetch part of the data. Either the offset to
+                           start from, e.g. to resume an interrupted
+                           download, or a (start, end) tuple of inclusive
+                           offsets, where end may be None.
+        :returns: lazy iterator over the chunks of data, its `length`
+                  attribute is the number of bytes it will yield (or None if
+                  the server didn't tell).
+        """
+        url, hdrs, start = self._data_request(subject, byte_range)
+        resp, body = self.api.client.get(url, headers=hdrs, stream=True)
+        skip, length = self._data_skip_and_length(resp, start)
+        return utils.IterableWithLength(
+            utils.iter_response(resp, chunk_size, skip), length)
+
+    def delete(self, subject_id):
+        """Delete an image."""
+        url = '/v1/subjects/%s' % subject_id
+        self._delete(url)
+
+    def delete_many(self, subjects, concurrency=DEFAULT_BULK_CONCURRENCY,
+                    rate=None, retries=DEFAULT_RATE_LIMIT_RETRIES,
+                    ordered=True):
+        """Delete many subjects, several at a time.
+
+        :param subjects: iterable of Subject objects or IDs, consumed as the
+                         results are.
+        :param concurrency: Number of subjects deleted at the same time.
+        :param rate: Maximum number of deletes started per second, not
+                     limited when not set.
+        :param retries: Number of times a delete rejected with an HTTP 413
+                        or 429 is tried again. The workers wait for the
+                        Retry-After the server sent (or back off
+                        exponentially without one) before going on.
+        :param ordered: Yield the results in the order of `subjects`, or as
+                        soon as each delete completes.
+        :returns: generator of BulkResult. A failed delete doesn't stop the
+                  others, its exception is reported in the BulkResult
+                  instead.
+        :raises: InvalidUsage if the client isn't thread safe and
+                 `concurrency` is greater than 1, see create_many().
+        """
+        self._check_concurrency(concurrency)
+        bucket = utils.TokenBucket(rate) if rate else None
+
+        def delete_one(subject):
+            attempt = 0
+            while True:
+                if bucket:
+                    bucket.acquire()
+                try:
+                    return self._delete('/v1/subjects/%s' %
+                                        base.getid(subject))
+                except exc.RetryAfterException as e:
+                    attempt += 1
+                    if attempt > retries:
+                        raise
+                    delay = e.retry_after or 2 ** attempt
+                    if bucket:
+                        # NOTE: hold back the other workers too, they
+                        # would be rejected the same way.
+                        bucket.pause(delay)
+                    else:
+                        time.sleep(delay)
+
+        for result in utils.map_concurrently(delete_one, subjects,
+                                             concurrency, ordered=ordered):
+            yield BulkResult(*result)
+
+    def create(self, **kwargs):
+        """Create an image."""
+        resource_url = '/v1/subjects'
+        body = self._create_body(kwargs)
         return self._create(resource_url, body, "subject", **kwargs)
 
-    def upload(self, subject_id, subject_data, subject_size=None):
+    def create_many(self, specs, concurrency=DEFAULT_BULK_CONCURRENCY,
+                    ordered=True):
+        """Create many subjects, several at a time.
+
+        The completion caches are written once, when the generator is
+        exhausted or closed. The workers share the client, which must be
+        thread safe when `concurrency` is greater than 1 (see Client's
+        thread_safe argument, keystoneauth sessions are). Its connection
+        pool should be at least `concurrency` connections big (see the
+        connection_pool and pool_maxsize arguments).
+
+        :param specs: iterable of dicts of create() arguments. It is
+                      consumed as the results are, so it can be a lazy
+                      iterable of any length.
+        :param concurrency: Number of subjects created at the same time.
+        :param ordered: Yield the results in the order of `specs`, or as
+                        soon as each create completes.
+        :returns: generator of BulkResult whose result is the created
+                  Subject. A failed create doesn't stop the others, its
+                  exception is reported in the BulkResult instead.
+        :raises: InvalidUsage if the client isn't thread safe and
+                 `concurrency` is greater than 1.
+        """
+        self._check_concurrency(concurrency)
+
+        def create_one(spec):
+            spec = dict(spec)
+            body = self._create_body(spec)
+            self.run_hooks('modify_body_for_create', body, **spec)
+            resp, body = self.api.client.post('/v1/subjects', body=body)
+            return self.resource_class(self, body['subject'], resp=resp)
+
+        created = []
+        try:
+            for result in utils.map_concurrently(create_one, specs,
+                                                 concurrency,
+                                                 ordered=ordered):
+                result = BulkResult(*result)
+                if result.error is None:
+                    created.append(result.result)
+                yield result
+        finally:
+            self.write_many_to_completion_cache(created)
+
+    def upload(self, subject_id, subject_data, subject_size=None,
+               concurrency=None, part_size=DEFAULT_PART_SIZE,
+               part_retries=DEFAULT_PART_RETRIES, checksum=None,
+               sha256=None):
         """Upload the data for an subject.
 
+        The md5 checksum of the data is computed while it is streamed and
+        compared with the checksum reported by the server.
+
         :param subject_id: ID of the image to upload data for.
         :param subject_data: File-like object supplying the data to upload.
         :param subject_size: Unused - present for backwards compatibility
+        :param concurrency: Number of parts to upload at the same time. When
+                            greater than 1 and the size of `subject_data` can
+                            be determined, the data is split in byte ranges
+                            of `part_size` which are uploaded in parallel and
+                            then committed. Otherwise the data is streamed in
+                            a single request.
+        :param part_size: Size in bytes of each part of a parallel upload.
+        :param part_retries: Number of times a failed part is retried, when
+                             the client has no retry policy of its own.
+        :param checksum: Expected md5 checksum of the data. The upload is
+                         aborted before completing if the data doesn't match.
+        :param sha256: Expected sha256 checksum of the data, verified the
+                       same way.
+        :returns: dict of the hex digests computed for the data. Parallel
+                  uploads can't hash the data in order, they pass the
+                  expected md5 checksum along for the server to verify and
+                  return the body of the commit response instead.
+        :raises: ChecksumMismatch if the data doesn't match the expected or
+                 the server-reported checksum.
+        :raises: InvalidUsage for a parallel upload with a client which
+                 isn't thread safe, see create_many().
         """
         url = '/v1/images/%s/file' % subject_id
+        if concurrency and concurrency > 1:
+            size = utils.get_file_size(subject_data)
+            if size is not None and size > part_size:
+                self._check_concurrency(concurrency)
+                return self._upload_parts(url, subject_data, size,
+                                          concurrency, part_size,
+                                          part_retries, checksum)
+
         hdrs = {'Content-Type': 'application/octet-stream'}
-        body = subject_data
-        self.api.client.put(url, headers=hdrs, body=body)
+        body = utils.ChecksumReader(subject_data,
+                                    expected={'md5': checksum,
+                                              'sha256': sha256},
+                                    algorithms=('md5',))
+        resp, resp_body = self.api.client.put(url, headers=hdrs, body=body)
+
+        digests = body.hexdigests()
+        server_checksum = _get_server_checksum(resp, resp_body)
+        if server_checksum and server_checksum != digests['md5']:
+            raise exc.ChecksumMismatch('md5', server_checksum,
+                                       digests['md5'])
+        return base.DictWithMeta(digests, resp)
+
+    def _upload_parts(self, url, subject_data, size, concurrency, part_size,
+                      part_retries, checksum=None):
+        """Upload `subject_data` as parallel ranged PUTs, then commit it.
+
+        Each part is sent to `url` with a ``Content-Range`` header describing
+        its position, and a final POST to ``<url>/commit`` tells the server
+        that all the parts have been received. Failed parts are sent again
+        as the retry policy of the client says, or as a RetryPolicy of
+        `part_retries` retries when it has none.
+        """
+        lock = threading.Lock()
+        policy = (self.api.client.retry_policy or
+                  retry.RetryPolicy(retries=part_retries))
+
+        def upload_part(offset):
+            length = min(part_size, size - offset)
+            hdrs = {'Content-Type': 'application/octet-stream',
+                    'Content-Range': 'bytes %d-%d/%d' % (
+                        offset, offset + length - 1, size)}
+
+            def send(attempt):
+                # NOTE: the client doesn't retry file-like bodies itself,
+                # every attempt reads the part again.
+                body = _RangeReader(subject_data, offset, length, lock)
+                return self.api.client.put(url, headers=hdrs, body=body)
+
+            return policy.call('PUT', send)
+
+        with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            parts = [executor.submit(upload_part, offset)
+                     for offset in six.moves.range(0, size, part_size)]
+            try:
+                for part in parts:
+                    part.result()
+            except Exception:
+                for part in parts:
+                    part.cancel()
+                raise
+
+        body = {'size': size, 'parts': len(parts)}
+        if checksum:
+            body['checksum'] = checksum
+        resp, resp_body = self.api.client.post('%s/commit' % url, body=body)
+        return base.DictWithMeta(resp_body or {}, resp)
@@ -39,12 +39,10 @@ class VersionManager(base.ManagerWithFind):
 
     def _get_current(self):
         """Returns info about current version."""
-        # TODO(sdague): we've now got to make up to 3 HTTP requests to
+        # NOTE(sdague): we've now got to make up to 3 HTTP requests to
         # determine what version we are running, due to differences in
-        # deployments and versions. We really need to cache the
-        # results of this per endpoint and keep the results of it for
-        # some reasonable TTL (like 24 hours) to reduce our round trip
-        # traffic.
+        # deployments and versions. Give the client a version_cache to
+        # only do it once per endpoint.
         if self._is_session_client():
             try:
                 # Assume that the value of get_endpoint() is something
@@ -71,23 +69,63 @@ class VersionManager(base.ManagerWithFind):
         else:
             # NOTE(andreykurilin): HTTPClient doesn't have ability to send get
             # request without token in the url, so `self._get` doesn't work.
-            all_versions = self.list()
-            url = self.client.management_url.rsplit("/", 1)[0]
-            for version in all_versions:
-                for link in version.links:
-                    if link["href"].rstrip('/') == url:
-                        version.append_request_ids(all_versions.request_ids)
-                        return version
+            return self._find_current(self.list())
+
+    def _find_current(self, all_versions):
+        """Return the version of `all_versions` served at the endpoint of
+        the client.
+        """
+        url = self.client.management_url.rsplit("/", 1)[0]
+        for version in all_versions:
+            for link in version.links:
+                if link["href"].rstrip('/') == url:
+                    version.append_request_ids(all_versions.request_ids)
+                    return version
+
+    def _get_cache_key(self):
+        if self._is_session_client():
+            return self.api.client.get_endpoint()
+        return self.client.management_url
+
+    def _get_cached(self):
+        cache = self.api.version_cache
+        if cache is not None:
+            key = self._get_cache_key()
+            info = cache.get(key) if key else None
+            if info is not None:
+                return self.resource_class(self, info, loaded=True)
+
+    def _save(self, version):
+        cache = self.api.version_cache
+        if cache is not None and version is not None:
+            # NOTE: HTTPClient only knows its endpoint once authenticated.
+            key = self._get_cache_key()
+            if key:
+                cache.set(key, version.to_dict())
 
     def get_current(self):
+        version = self._get_cached()
+        if version is not None:
+            return version
         try:
-            return self._get_current()
+            version = self._get_current()
         except exc.Unauthorized:
             # NOTE(sdague): RAX's repose configuration blocks access to the
             # versioned endpoint, which is definitely non-compliant behavior.
             # However, there is no defcore test for this yet. Remove this code
             # block once we land things in defcore.
             return None
+        self._save(version)
+        return version
+
+    def invalidate_cache(self):
+        """Forget the cached version of the endpoint of the client.
+
+        :returns: whether a version was cached.
+        """
+        cache = self.api.version_cache
+        key = self._get_cache_key() if cache is not None else None
+        return bool(key) and cache.invalidate(key)
 
     def list(self):
         """List all versions."""
@@ -0,0 +1,97 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Cache of the API versions served by each endpoint.
+
+Pass a VersionCache as the `version_cache` of a client to discover the
+version of an endpoint once per `ttl` instead of on every client::
+
+    >>> from subjectclient import client
+    >>> from subjectclient import version_cache
+    >>> cache = version_cache.VersionCache()
+    >>> subject = client.Client(VERSION, USERNAME, PASSWORD, PROJECT_ID,
+    ...                         AUTH_URL, version_cache=cache)
+"""
+
+import threading
+import time
+
+from subjectclient import utils
+
+
+# Seconds the versions of an endpoint are kept.
+DEFAULT_TTL = 24 * 60 * 60
+
+
+class VersionCache(object):
+    """Versions of the API served by each endpoint, kept for `ttl` seconds.
+
+    :param ttl: Seconds the version of an endpoint is kept.
+    :param path: Directory the versions are also saved in, shared by the
+                 processes using it. They are only kept in memory when not
+                 given.
+
+    The same cache can be given to every client of a process.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, path=None):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._store = None
+        if path:
+            self._store = utils.JsonFileCache(path)
+
+    def get(self, endpoint):
+        """Return the version info saved for `endpoint`, or None."""
+        with self._lock:
+            entry = self._entries.get(endpoint)
+        if entry is None and self._store is not None:
+            entry = self._store.get(endpoint)
+            if entry is not None:
+                with self._lock:
+                    self._entries[endpoint] = entry
+        if entry is None or entry['expires_at'] <= time.time():
+            return None
+        return entry['version']
+
+    def set(self, endpoint, version):
+        """Save the version info (a dict) of `endpoint`."""
+        entry = {'version': version, 'expires_at': time.time() + self.ttl}
+        with self._lock:
+            self._entries[endpoint] = entry
+        if self._store is not None:
+            try:
+                self._store.set(endpoint, entry)
+            except (IOError, OSError):
+                # NOTE: the version is discovered again by the next process,
+                # which is no reason to fail this one.
+                pass
+
+    def invalidate(self, endpoint):
+        """Forget the version of `endpoint`.
+
+        :returns: whether a version was saved for it.
+        """
+        with self._lock:
+            found = self._entries.pop(endpoint, None) is not None
+        if self._store is not None:
+            found = endpoint in self._store or found
+            self._store.delete(endpoint)
+        return found
+
+
+def default_path():
+    """Directory the shell saves the versions in."""
+    return utils.env('OS_VERSION_CACHE_DIR',
+                     default='~/.subjectclient/versions')